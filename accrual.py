@@ -0,0 +1,167 @@
+import threading
+from datetime import datetime
+from config import Config
+from lazy_imports import lazy_import
+
+np = lazy_import('numpy')
+pd = lazy_import('pandas')
+
+
+class AccrualEngine:
+    """Monthly leave accrual computed from JoinDate and the Config limits"""
+
+    # Annual entitlement per leave type - accrued evenly across 12 months
+    ANNUAL_LIMITS = {
+        'EL': Config.MAX_EL_PER_YEAR,
+        'SL': Config.MAX_SL_PER_YEAR,
+        'CL': Config.MAX_CL_PER_YEAR,
+    }
+    # Only EL is credited to balances month by month
+    MONTHLY_CREDIT_TYPES = ['EL']
+    MARKER_COLUMN = 'AccruedThrough'
+
+    def __init__(self, database):
+        self.db = database
+
+    @staticmethod
+    def _to_days(values):
+        """Convert dates/strings to a datetime64[D] array"""
+        return pd.to_datetime(pd.Series(values), errors='coerce').values.astype('datetime64[D]')
+
+    @staticmethod
+    def service_months(join_dates, as_of):
+        """Completed months of service at `as_of` for each JoinDate (vectorised)"""
+        join = AccrualEngine._to_days(join_dates)
+        as_of = np.broadcast_to(AccrualEngine._to_days(np.atleast_1d(as_of)), join.shape)
+
+        join_month = join.astype('datetime64[M]')
+        as_of_month = as_of.astype('datetime64[M]')
+        months = (as_of_month - join_month).astype(int)
+
+        # A month only counts once its anniversary day has been reached
+        join_day = (join - join_month.astype('datetime64[D]')).astype(int)
+        as_of_day = (as_of - as_of_month.astype('datetime64[D]')).astype(int)
+        months = months - (as_of_day < join_day)
+
+        months = np.where(np.isnat(join) | np.isnat(as_of), 0, months)
+        return np.maximum(months, 0)
+
+    @staticmethod
+    def is_eligible(join_date, as_of=None):
+        """Check if an employee has completed the minimum service period"""
+        as_of = as_of or datetime.now().date()
+        if join_date is None or pd.isna(join_date):
+            return True
+        months = AccrualEngine.service_months([join_date], as_of)[0]
+        return bool(months >= Config.MIN_SERVICE_MONTHS)
+
+    @classmethod
+    def credited_days(cls, join_dates, as_of, leave_type):
+        """Whole days credited up to `as_of` - nothing is usable during the service period"""
+        months = cls.service_months(join_dates, as_of)
+        rate = cls.ANNUAL_LIMITS[leave_type] / 12.0
+        credited = np.floor(months * rate + 1e-9).astype(int)
+        return np.where(months >= Config.MIN_SERVICE_MONTHS, credited, 0)
+
+    def entitlements(self, period_start, period_end, roster=None):
+        """Pro-rated entitlement per employee and leave type for any period"""
+        df = roster if roster is not None else self._read_roster()
+        result = pd.DataFrame({'UserId': df['UserId'].astype(int).values})
+
+        for leave_type in self.ANNUAL_LIMITS:
+            start = self.credited_days(df['JoinDate'], period_start, leave_type)
+            end = self.credited_days(df['JoinDate'], period_end, leave_type)
+            result[leave_type] = np.maximum(end - start, 0)
+
+        result['Eligible'] = self.service_months(df['JoinDate'], period_end) >= Config.MIN_SERVICE_MONTHS
+        return result
+
+    def run_monthly_accrual(self, as_of=None):
+        """Credit accrued EL for every employee - safe to re-run, catches up missed months
+
+        The Available sheet is rewritten through the database's locked
+        update_sheet(), so it works on a single workbook and on shards, and
+        errors propagate to the caller.
+        """
+        as_of = pd.Timestamp(as_of or datetime.now()).date()
+        # Accrue for completed months only: evaluate at the start of the current month
+        accrue_to = np.datetime64(as_of, 'M').astype('datetime64[D]')
+
+        credited = []
+
+        def accrue(df):
+            updated, credited_rows = self._accrue(df, as_of, accrue_to)
+            credited.append(credited_rows)
+            return updated
+
+        self.db.update_sheet('Available', accrue)
+        credited_rows = sum(credited)
+        print(f"✅ Accrual through {accrue_to}: credited {credited_rows} employees")
+        return credited_rows
+
+    def _accrue(self, df, as_of, accrue_to):
+        """Credit one roster - returns (updated roster or None if nothing changes, rows credited)"""
+        if df.empty:
+            return None, 0
+        if self.MARKER_COLUMN in df.columns and (df[self.MARKER_COLUMN].astype(str) == str(accrue_to)).all():
+            return None, 0
+
+        df = df.copy()
+        if self.MARKER_COLUMN not in df.columns:
+            df[self.MARKER_COLUMN] = None
+
+        # Rows never accrued before start from the previous month so seeded balances aren't re-credited
+        previous = (np.datetime64(as_of, 'M') - 1).astype('datetime64[D]')
+        last_run = self._to_days(df[self.MARKER_COLUMN])
+        last_run = np.where(np.isnat(last_run), previous, last_run)
+        last_run = np.minimum(last_run, accrue_to)
+
+        credited_rows = 0
+        for leave_type in self.MONTHLY_CREDIT_TYPES:
+            delta = (self.credited_days(df['JoinDate'], accrue_to, leave_type)
+                     - self.credited_days(df['JoinDate'], last_run, leave_type))
+            delta = np.maximum(delta, 0)
+
+            cap = self.ANNUAL_LIMITS[leave_type] + Config.MAX_CARRY_FORWARD
+            current = df[leave_type].fillna(0).astype(int).values
+            updated = np.where(current >= cap, current, np.minimum(current + delta, cap))
+
+            credited_rows += int(np.count_nonzero(updated != current))
+            df[leave_type] = updated
+
+        df['TL'] = df['EL'] + df['SL'] + df['CL']
+        df[self.MARKER_COLUMN] = str(accrue_to)
+        return df, credited_rows
+
+    def _read_roster(self):
+        """Read the Available sheet"""
+        return self.db.read_sheet('Available')
+
+
+def start_accrual_scheduler(database, interval=None):
+    """Run the accrual now and then every `interval` seconds on a daemon thread - returns a stop Event
+
+    Re-runs within a month change nothing, so a short interval only
+    bounds how late after the 1st the credit lands.
+    """
+    interval = interval or Config.ACCRUAL_CHECK_INTERVAL_SECONDS
+    engine = AccrualEngine(database)
+    stop = threading.Event()
+
+    def run():
+        while not stop.is_set():
+            try:
+                engine.run_monthly_accrual()
+            except Exception as e:
+                print(f"❌ Error running monthly accrual: {e}")
+                import traceback
+                traceback.print_exc()
+            stop.wait(interval)
+
+    threading.Thread(target=run, name="accrual", daemon=True).start()
+    return stop
+
+
+if __name__ == "__main__":
+    from database import LeaveDatabase
+    AccrualEngine(LeaveDatabase()).run_monthly_accrual()
@@ -1,9 +1,11 @@
 import gradio as gr
-import pandas as pd
 from datetime import datetime, timedelta
 import os
 import sys
 import re
+import functools
+import inspect
+import math
 from chatbot_enhanced import EnhancedLeaveChatbot
 
 # Add current directory to Python path to ensure imports work
@@ -11,8 +13,22 @@ sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 # Now import your modules
 from database import LeaveDatabase
+from sharding import ShardedLeaveDatabase
 from auth import AuthSystem
 from config import Config
+from work_calendar import get_calendar
+from rate_limit import RateLimiter, WriteGate
+from intent_router import route_message
+import date_engine
+from lazy_imports import lazy_import, warm_up_in_background
+from conversation_store import ConversationState, create_conversation_store
+from chat_writer import get_chat_writer
+from turn_context import TurnContext
+from message_guard import prepare, message_budget
+from accrual import start_accrual_scheduler
+
+# Gradio may load pandas itself; the handlers only need it on first use
+pd = lazy_import('pandas')
 
 # Initialize systems
 print("🚀 Initializing AI Leave Management System...")
@@ -20,23 +36,25 @@ print("🚀 Initializing AI Leave Management System...")
 class SimpleLeaveAgent:
     def __init__(self, db):
         self.db = db
-        # We'll use database for persistent storage instead of memory
+        # Pending flow per user - keyed get/put instead of re-reading chat history each turn
+        self.conversations = create_conversation_store()
+        self.chat_log = get_chat_writer(db)
     
     def get_chat_history(self, user_id):
         """Get chat history from database for persistent storage"""
         try:
             # Load from database - this ensures persistence across page refreshes
-            db_history = self.db.get_chat_history(user_id)
+            db_history = self.chat_log.get_chat_history(user_id)
             
             # Convert database format to Gradio format
             gradio_history = []
             current_user_msg = None
             
             for record in db_history:
-                if record['Role'] == 'user':
-                    current_user_msg = record['Message']
-                elif record['Role'] == 'assistant' and current_user_msg is not None:
-                    gradio_history.append([current_user_msg, record['Message']])
+                if record.role == 'user':
+                    current_user_msg = record.message
+                elif record.role == 'assistant' and current_user_msg is not None:
+                    gradio_history.append([current_user_msg, record.message])
                     current_user_msg = None
             
             print(f"✅ Loaded {len(gradio_history)} chat messages for user {user_id}")
@@ -48,22 +66,25 @@ class SimpleLeaveAgent:
     
     def process_message(self, user_id, message):
         """Process user message and return response - WITH COMPLETE DEBUG"""
+        # Bounded and normalized before any pattern runs over it
+        message = prepare(message).text
         print(f"🔍 PROCESS_MESSAGE START: user_id={user_id}, message='{message}'")
         
         try:
-            # Save user message to database FIRST for persistence
-            print("💾 Saving user message to database...")
-            save_success = self.db.save_chat_message(user_id, 'user', message)
-            print(f"💾 Save result: {save_success}")
-            
             # Generate response
             print("🤖 Generating response...")
-            response = self._generate_response(user_id, message)
+            try:
+                with message_budget():
+                    response = self._generate_response(user_id, message)
+            except Exception:
+                # No reply - still keep the user's message
+                self.chat_log.save_turn(user_id, message, None)
+                raise
             print(f"🤖 Response generated: {response[:100]}...")
             
-            # Save assistant response to database for persistence
-            print("💾 Saving bot response to database...")
-            save_success = self.db.save_chat_message(user_id, 'assistant', response)
+            # Hand the turn to the chat writer - the reply does not wait for the sheet write
+            print("💾 Saving chat turn to database...")
+            save_success = self.chat_log.save_turn(user_id, message, response)
             print(f"💾 Save result: {save_success}")
             
             print("✅ PROCESS_MESSAGE COMPLETED SUCCESSFULLY")
@@ -83,48 +104,50 @@ class SimpleLeaveAgent:
             message_lower = message.lower().strip()
             print(f"🔍 Processing message: '{message_lower}'")
             
-            # Get recent chat history for context
-            recent_history = self.db.get_chat_history(user_id, limit=5)
+            # User data read during this turn is loaded once and shared by every step
+            turn = TurnContext(self.db, user_id, self.chat_log)
             
             # Check if this is a continuation of previous conversation
-            is_continuation = self._is_continuation(message_lower, recent_history)
-            
-            if is_continuation:
+            context = self.conversations.get(user_id)
+            if self._is_continuation(message_lower, context):
                 print("✅ Detected continuation of previous conversation")
-                return self._handle_continuation(user_id, message, recent_history)
+                return self._handle_continuation(user_id, message, context, turn)
             
-            # Handle leave applications FIRST (most important)
-            if any(word in message_lower for word in ['apply', 'application', 'request', 'want to apply', 'need leave', 'i want', 'can i apply', 'apply leave']):
+            # The best-ranked intent wins - "I need my balance" is a balance query
+            intent = route_message(message_lower).first('apply', 'balance', 'status', 'policy', 'greeting', 'help')
+            
+            # Handle leave applications
+            if intent == 'apply':
                 print("✅ Detected leave application request")
-                return self._handle_leave_application(user_id, message)
+                return self._handle_leave_application(user_id, message, turn)
             
             # Handle balance inquiries
-            elif any(word in message_lower for word in ['balance', 'remaining', 'available', 'how many', 'leave left']):
+            elif intent == 'balance':
                 print("✅ Detected balance request")
-                balance = self.db.get_user_balance(user_id)
+                balance = turn.balance
                 if balance:
-                    return f"""**Your Leave Balance:**\n\n• 🏖️ Earned Leave (EL): {balance['EL']} days\n• 🤒 Sick Leave (SL): {balance['SL']} days\n• 🎯 Casual Leave (CL): {balance['CL']} days\n• 📊 Total Available: {balance['TL']} days"""
+                    return f"""**Your Leave Balance:**\n\n• 🏖️ Earned Leave (EL): {balance.el} days\n• 🤒 Sick Leave (SL): {balance.sl} days\n• 🎯 Casual Leave (CL): {balance.cl} days\n• 📊 Total Available: {balance.tl} days"""
                 else:
                     return "I couldn't retrieve your leave balance at the moment. Please try again later."
             
             # Handle status inquiries
-            elif any(word in message_lower for word in ['status', 'application status', 'my applications', 'pending', 'approved']):
+            elif intent == 'status':
                 print("✅ Detected status request")
-                requests = self.db.get_user_leave_requests(user_id)
+                requests = turn.recent_requests(limit=5)
                 if requests:
                     status_text = "**Your Leave Applications:**\n\n"
-                    for req in requests[-5:]:
-                        date_str = req['Leave_Date'].split()[0] if ' ' in str(req['Leave_Date']) else str(req['Leave_Date'])
-                        icon = "✅" if req['Status'] == 'Approved' else "❌" if req['Status'] == 'Rejected' else "⏳"
-                        status_text += f"• {date_str}: {req['LeaveType']} - {icon} {req['Status']}\n"
-                        if req['Reason']:
-                            status_text += f"  Reason: {req['Reason']}\n"
+                    for req in reversed(requests):
+                        date_str = req.leave_day
+                        icon = "✅" if req.status == 'Approved' else "❌" if req.status == 'Rejected' else "⏳"
+                        status_text += f"• {date_str}: {req.leave_type} - {icon} {req.status}\n"
+                        if req.reason:
+                            status_text += f"  Reason: {req.reason}\n"
                     return status_text
                 else:
                     return "You have no leave applications."
             
             # Handle policy inquiries
-            elif any(word in message_lower for word in ['policy', 'rule', 'regulation', 'how to', 'can i', 'what is']):
+            elif intent == 'policy':
                 print("✅ Detected policy request")
                 return """**Leave Policies (From Company Rules):**\n
     • **Earned Leave (EL):** 20 days per year (minimum 3 consecutive days)
@@ -137,24 +160,24 @@ class SimpleLeaveAgent:
     - No leaves on weekends or public holidays"""
             
             # Handle greetings
-            elif any(word in message_lower for word in ['hello', 'hi', 'hey', 'hola', 'greetings']):
+            elif intent == 'greeting':
                 print("✅ Detected greeting")
-                balance = self.db.get_user_balance(user_id)
+                balance = turn.balance
                 if balance:
                     return f"""👋 **Hello! I'm your AI Leave Management Assistant**
 
     📊 **Your Current Leave Balance:**
-    • 🏖️ Earned Leave (EL): {balance['EL']} days
-    • 🤒 Sick Leave (SL): {balance['SL']} days  
-    • 🎯 Casual Leave (CL): {balance['CL']} days
-    • 📈 Total Available: {balance['TL']} days
+    • 🏖️ Earned Leave (EL): {balance.el} days
+    • 🤒 Sick Leave (SL): {balance.sl} days  
+    • 🎯 Casual Leave (CL): {balance.cl} days
+    • 📈 Total Available: {balance.tl} days
 
     How can I help you with leave policies, applications, or balances today?"""
                 else:
                     return "Hello! I'm your AI leave management assistant. How can I help you with leave policies, applications, or balances today?"
             
             # Handle help requests
-            elif any(word in message_lower for word in ['help', 'what can you do', 'options', 'menu']):
+            elif intent == 'help':
                 print("✅ Detected help request")
                 return """**I can help you with:**\n
     • 📚 Leave policies and rules
@@ -191,43 +214,25 @@ class SimpleLeaveAgent:
             traceback.print_exc()
             return "I apologize, but I'm having trouble processing your request right now. Please try again."
 
-    def _is_continuation(self, current_message, recent_history):
-        """Check if current message is continuation of previous conversation"""
-        if not recent_history:
+    def _is_continuation(self, current_message, context):
+        """Check if current message answers the leave type we asked for"""
+        if context.current_flow != 'leave_application' or context.current_step != 1:
             return False
-        
-        # Get the last assistant message
-        last_assistant_msg = None
-        for record in reversed(recent_history):
-            if record['Role'] == 'assistant':
-                last_assistant_msg = record['Message'].lower()
-                break
-        
-        if not last_assistant_msg:
-            return False
-        
-        # Check if last message was asking for leave type
-        if 'specify the type' in last_assistant_msg or 'leave types' in last_assistant_msg:
-            return current_message in ['el', 'sl', 'cl']
-        
-        return False
+        return current_message in ['el', 'sl', 'cl']
 
-    def _handle_continuation(self, user_id, message, recent_history):
+    def _handle_continuation(self, user_id, message, context, turn=None):
         """Handle continuation of previous conversation"""
         message_lower = message.lower().strip()
         
-        # Get the original user message that triggered the leave type request
-        original_message = None
-        for record in reversed(recent_history):
-            if record['Role'] == 'user' and any(word in record['Message'].lower() for word in ['apply', 'leave']):
-                original_message = record['Message']
-                break
+        # The original user message that triggered the leave type request
+        original_message = context.pending_message
+        self.conversations.discard(user_id)
         
         if original_message and message_lower in ['el', 'sl', 'cl']:
             # Combine the original message with the leave type
             combined_message = f"{original_message} {message_lower.upper()}"
             print(f"✅ Combined message: {combined_message}")
-            return self._handle_leave_application(user_id, combined_message)
+            return self._handle_leave_application(user_id, combined_message, turn)
         
         return "I'm not sure what you're referring to. How can I help you with leave management?"
 
@@ -262,7 +267,7 @@ class SimpleLeaveAgent:
     def _clear_chat_history(self, user_id):
         """Clear chat history for user from database"""
         try:
-            success = self.db.clear_chat_history(user_id)
+            success = self.chat_log.clear_chat_history(user_id)
             if success:
                 return "🗑️ Chat history cleared successfully!"
             else:
@@ -270,206 +275,24 @@ class SimpleLeaveAgent:
         except Exception as e:
             return f"❌ Error clearing chat: {str(e)}"
     
-    def _parse_natural_language_date(self, date_text, base_date=None):
-        """Parse natural language dates like 'last monday', 'day before yesterday' etc."""
-        if base_date is None:
-            base_date = datetime.now().date()
-        
-        date_text = date_text.lower().strip()
-        
-        # Direct mappings
-        if date_text in ['today', 'now']:
-            return base_date
-        elif date_text in ['yesterday']:
-            return base_date - timedelta(days=1)
-        elif date_text in ['tomorrow']:
-            return base_date + timedelta(days=1)
-        elif date_text in ['day after tomorrow']:
-            return base_date + timedelta(days=2)
-        elif date_text in ['day before yesterday']:
-            return base_date - timedelta(days=2)
-        
-        # Last/Next week patterns
-        if 'last week' in date_text:
-            base_date = base_date - timedelta(days=7)
-            date_text = date_text.replace('last week', '').strip()
-        elif 'next week' in date_text:
-            base_date = base_date + timedelta(days=7)
-            date_text = date_text.replace('next week', '').strip()
-        
-        # Day of week patterns
-        days_map = {
-            'monday': 0, 'tuesday': 1, 'wednesday': 2, 'thursday': 3,
-            'friday': 4, 'saturday': 5, 'sunday': 6,
-            'mon': 0, 'tue': 1, 'wed': 2, 'thu': 3, 'fri': 4, 'sat': 5, 'sun': 6
-        }
-        
-        for day_name, day_num in days_map.items():
-            if day_name in date_text:
-                current_weekday = base_date.weekday()
-                
-                if 'last' in date_text:
-                    # Find the most recent past occurrence
-                    days_ago = (current_weekday - day_num) % 7
-                    if days_ago == 0:
-                        days_ago = 7  # Go back one week
-                    return base_date - timedelta(days=days_ago)
-                elif 'next' in date_text:
-                    # Find the next future occurrence
-                    days_ahead = (day_num - current_weekday) % 7
-                    if days_ahead == 0:
-                        days_ahead = 7  # Go to next week
-                    return base_date + timedelta(days=days_ahead)
-                else:
-                    # Default to next occurrence
-                    days_ahead = (day_num - current_weekday) % 7
-                    if days_ahead == 0:
-                        days_ahead = 7
-                    return base_date + timedelta(days=days_ahead)
-        
-        # Relative day patterns
-        if 'days ago' in date_text:
-            try:
-                num_days = int(re.search(r'(\d+)\s+days?\s+ago', date_text).group(1))
-                return base_date - timedelta(days=num_days)
-            except:
-                pass
-        elif 'days from now' in date_text or 'days later' in date_text:
-            try:
-                num_days = int(re.search(r'(\d+)\s+days?\s+(from now|later)', date_text).group(1))
-                return base_date + timedelta(days=num_days)
-            except:
-                pass
-        
-        return None
-
-    def _extract_dates_from_message(self, message):
-        """Extract dates from natural language message with comprehensive parsing"""
-        message_lower = message.lower()
-        today = datetime.now().date()
-        leave_dates = []
-        
-        print(f"🔍 Parsing dates from: '{message_lower}'")
-        
-        # Clean the message
-        clean_message = message_lower
-        remove_phrases = [
-            'i want to apply', 'apply for', 'i need', 'want to take', 'take', 
-            'leave', 'sl', 'el', 'cl', 'sick', 'earned', 'casual', 'medical',
-            'apply', 'for', 'a', 'an', 'the'
-        ]
-        
-        for phrase in remove_phrases:
-            clean_message = clean_message.replace(phrase, ' ')
-        
-        clean_message = ' '.join(clean_message.split()).strip()
-        print(f"🔍 Cleaned message: '{clean_message}'")
-        
-        # Try specific date patterns first (DD-MM-YYYY, DD/MM/YYYY, etc.)
-        date_patterns = [
-            r'(\d{1,2})[-/](\d{1,2})[-/](\d{4})',  # DD-MM-YYYY
-            r'(\d{1,2})[-/](\d{1,2})',             # DD-MM (current year)
-            r'(\d{4})[-/](\d{1,2})[-/](\d{1,2})',  # YYYY-MM-DD
-        ]
-        
-        for pattern in date_patterns:
-            matches = re.findall(pattern, clean_message)
-            if matches:
-                for match in matches:
-                    try:
-                        if len(match) == 3:  # DD-MM-YYYY or YYYY-MM-DD
-                            if len(match[0]) == 4:  # YYYY-MM-DD
-                                year, month, day = int(match[0]), int(match[1]), int(match[2])
-                            else:  # DD-MM-YYYY
-                                day, month, year = int(match[0]), int(match[1]), int(match[2])
-                            leave_date = datetime(year, month, day).date()
-                            leave_dates.append(leave_date)
-                            print(f"✅ Found specific date: {leave_date}")
-                        elif len(match) == 2:  # DD-MM (current year)
-                            day, month = int(match[0]), int(match[1])
-                            year = today.year
-                            leave_date = datetime(year, month, day).date()
-                            leave_dates.append(leave_date)
-                            print(f"✅ Found date (current year): {leave_date}")
-                    except ValueError as e:
-                        print(f"❌ Date parsing error: {e}")
-                        continue
-        
-        # If no specific dates found, try natural language parsing
-        if not leave_dates:
-            # Look for natural language date patterns
-            natural_patterns = [
-                r'(today|tomorrow|yesterday|day after tomorrow|day before yesterday)',
-                r'(last|next)\s+(monday|tuesday|wednesday|thursday|friday|saturday|sunday|mon|tue|wed|thu|fri|sat|sun)',
-                r'(monday|tuesday|wednesday|thursday|friday|saturday|sunday|mon|tue|wed|thu|fri|sat|sun)',
-                r'(\d+)\s+days?\s+ago',
-                r'(\d+)\s+days?\s+(from now|later)',
-                r'last week',
-                r'next week'
-            ]
-            
-            for pattern in natural_patterns:
-                matches = re.findall(pattern, clean_message)
-                if matches:
-                    for match in matches:
-                        if isinstance(match, tuple):
-                            date_text = ' '.join(match).strip()
-                        else:
-                            date_text = match.strip()
-                        
-                        parsed_date = self._parse_natural_language_date(date_text, today)
-                        if parsed_date:
-                            leave_dates.append(parsed_date)
-                            print(f"✅ Found natural language date '{date_text}': {parsed_date}")
-                            break
-                    if leave_dates:
-                        break
-        
-        # If still no dates found, try to extract any remaining date-like phrases
-        if not leave_dates:
-            # Final attempt with the entire cleaned message
-            parsed_date = self._parse_natural_language_date(clean_message, today)
-            if parsed_date:
-                leave_dates.append(parsed_date)
-                print(f"✅ Final natural language parsing: {parsed_date}")
-        
-        # Remove duplicates and sort
-        leave_dates = sorted(list(set(leave_dates)))
-        
-        print(f"📅 Final parsed dates: {leave_dates}")
-        return leave_dates
-
     def calculate_working_days(self, start_date, num_days):
         """Calculate actual working days excluding weekends and holidays"""
-        working_days = []
-        current_date = start_date
-        days_found = 0
-        
-        while days_found < num_days:
-            if not db.is_weekend(current_date) and not db.is_public_holiday(current_date):
-                working_days.append(current_date)
-                days_found += 1
-            current_date += timedelta(days=1)
-        
-        return working_days
+        return get_calendar().working_days_from(start_date, num_days)
     
-    def _handle_leave_application(self, user_id, message):
+    def _handle_leave_application(self, user_id, message, turn=None):
         """Handle leave application from chat - FIXED DATE PARSING"""
         print(f"🔍 LEAVE APPLICATION: user_id={user_id}, message='{message}'")
+        turn = turn or TurnContext(self.db, user_id, self.chat_log)
         
         try:
             message_lower = message.lower()
             
-            # Leave type detection - more comprehensive
-            leave_type = None
-            if any(word in message_lower for word in ['el', 'earned']):
-                leave_type = 'EL'
-            elif any(word in message_lower for word in ['sl', 'sick']):
-                leave_type = 'SL'
-            elif any(word in message_lower for word in ['cl', 'casual']):
-                leave_type = 'CL'
+            # Leave type detection - word-boundary slot from the intent router
+            leave_type = route_message(message_lower).leave_type
             
             if not leave_type:
+                # Remember the request so a bare "EL"/"SL"/"CL" reply can complete it
+                self.conversations.put(user_id, ConversationState('leave_application', 1, pending_message=message))
                 return """**To apply for leave, please specify the type:**\n
     **Leave Types:**
     • EL (Earned Leave) - For planned vacations (minimum 3 consecutive days)
@@ -586,11 +409,11 @@ class SimpleLeaveAgent:
             # ========== APPLICATION PROCESSING ==========
             
             # Check balance
-            balance = self.db.get_user_balance(user_id)
+            balance = turn.balance
             print(f"✅ Balance check: {balance}")
             
-            if not balance or balance[leave_type] < duration_days:
-                return f"❌ Insufficient {leave_type} balance. Available: {balance[leave_type] if balance else 0} days, Required: {duration_days} days"
+            if not balance or balance.days(leave_type) < duration_days:
+                return f"❌ Insufficient {leave_type} balance. Available: {balance.days(leave_type) if balance else 0} days, Required: {duration_days} days"
             
             # Simple reason detection
             reason = "Personal"
@@ -613,7 +436,7 @@ class SimpleLeaveAgent:
                 print(f"🔍 Processing date: {leave_date_str}")
                 
                 # Check for date overlaps
-                overlap = self.db.check_date_overlap(user_id, leave_date_str)
+                overlap = turn.has_leave_on(leave_date)
                 print(f"✅ Overlap check for {leave_date_str}: {overlap}")
                 
                 if overlap:
@@ -632,6 +455,7 @@ class SimpleLeaveAgent:
                 print(f"💾 Database result for {leave_date_str}: {success}")
                 
                 if success:
+                    turn.record_leave(leave_date)
                     successful_applications += 1
                     application_dates.append(leave_date.strftime('%Y-%m-%d'))
                 else:
@@ -649,7 +473,7 @@ class SimpleLeaveAgent:
     • **Date:** {date_range} ({successful_applications} working days)
     • **Reason:** {reason}
     • **Status:** ⏳ Pending Approval
-    • **Balance After Approval:** {balance[leave_type] - successful_applications} {leave_type} days
+    • **Balance After Approval:** {balance.days(leave_type) - successful_applications} {leave_type} days
 
     Your manager will review your request."""
             else:
@@ -662,95 +486,10 @@ class SimpleLeaveAgent:
             return "❌ Error processing your application. Please try again."
 
     def _extract_dates_improved(self, message, today):
-        """Improved date extraction with better month name parsing"""
-        leave_dates = []
-        message_lower = message.lower()
-        
-        # Clean the message
-        clean_message = message_lower
-        remove_phrases = [
-            'i want to apply', 'apply for', 'i need', 'want to take', 'take', 
-            'leave', 'sl', 'el', 'cl', 'sick', 'earned', 'casual', 'medical',
-            'apply', 'for', 'a', 'an', 'the'
-        ]
-        
-        for phrase in remove_phrases:
-            clean_message = clean_message.replace(phrase, ' ')
-        
-        clean_message = ' '.join(clean_message.split()).strip()
-        print(f"🔍 Cleaned message: '{clean_message}'")
-        
-        # Handle month names like "sep25", "september25", "sep 25"
-        month_patterns = {
-            'jan': 1, 'january': 1, 'feb': 2, 'february': 2, 'mar': 3, 'march': 3,
-            'apr': 4, 'april': 4, 'may': 5, 'jun': 6, 'june': 6, 'jul': 7, 'july': 7,
-            'aug': 8, 'august': 8, 'sep': 9, 'september': 9, 'oct': 10, 'october': 10,
-            'nov': 11, 'november': 11, 'dec': 12, 'december': 12
-        }
-        
-        # Try to find month patterns
-        for month_name, month_num in month_patterns.items():
-            if month_name in clean_message:
-                # Extract day number
-                day_match = re.search(r'(\d{1,2})', clean_message)
-                if day_match:
-                    day = int(day_match.group(1))
-                    year = today.year
-                    try:
-                        parsed_date = datetime(year, month_num, day).date()
-                        if parsed_date >= today:  # Only future dates for month names
-                            leave_dates.append(parsed_date)
-                            print(f"✅ Found month date: {month_name} {day} → {parsed_date}")
-                            return leave_dates
-                    except ValueError:
-                        pass
-        
-        # Try specific date patterns (DD-MM-YYYY, DD/MM/YYYY, etc.)
-        date_patterns = [
-            r'(\d{1,2})[-/](\d{1,2})[-/](\d{4})',  # DD-MM-YYYY
-            r'(\d{1,2})[-/](\d{1,2})',             # DD-MM (current year)
-            r'(\d{4})[-/](\d{1,2})[-/](\d{1,2})',  # YYYY-MM-DD
-        ]
-        
-        for pattern in date_patterns:
-            matches = re.findall(pattern, clean_message)
-            if matches:
-                for match in matches:
-                    try:
-                        if len(match) == 3:  # DD-MM-YYYY or YYYY-MM-DD
-                            if len(match[0]) == 4:  # YYYY-MM-DD
-                                year, month, day = int(match[0]), int(match[1]), int(match[2])
-                            else:  # DD-MM-YYYY
-                                day, month, year = int(match[0]), int(match[1]), int(match[2])
-                            leave_date = datetime(year, month, day).date()
-                            leave_dates.append(leave_date)
-                            print(f"✅ Found specific date: {leave_date}")
-                        elif len(match) == 2:  # DD-MM (current year)
-                            day, month = int(match[0]), int(match[1])
-                            year = today.year
-                            leave_date = datetime(year, month, day).date()
-                            leave_dates.append(leave_date)
-                            print(f"✅ Found date (current year): {leave_date}")
-                        return leave_dates
-                    except ValueError as e:
-                        print(f"❌ Date parsing error: {e}")
-                        continue
-        
-        # Handle natural language dates
-        if 'today' in clean_message:
-            leave_dates.append(today)
-        elif 'yesterday' in clean_message:
-            leave_dates.append(today - timedelta(days=1))
-        elif 'tomorrow' in clean_message:
-            leave_dates.append(today + timedelta(days=1))
-        elif 'day after tomorrow' in clean_message:
-            leave_dates.append(today + timedelta(days=2))
-        
-        # If still no dates found, try the original natural language parsing
-        if not leave_dates:
-            leave_dates = self._extract_dates_from_message(message)
-        
-        return leave_dates  
+        """Dates in a leave request - ranges expanded to working days"""
+        leave_dates = date_engine.leave_dates(message, today)
+        print(f"📅 Parsed dates: {leave_dates}")
+        return leave_dates
     
     def clear_chat_history_employee(user_id):
         """Clear chat history for employee from database"""
@@ -765,8 +504,10 @@ class SimpleLeaveAgent:
             return f"Error clearing chat: {str(e)}", []
 
 try:
-    db = LeaveDatabase()
+    db = ShardedLeaveDatabase() if Config.SHARD_BY else LeaveDatabase()
     auth = AuthSystem(db)
+    limiters = {name: RateLimiter.from_config(name) for name in Config.RATE_LIMITS}
+    write_gate = WriteGate()
     agent = EnhancedLeaveChatbot(db)  # Use enhanced chatbot instead of SimpleLeaveAgent
     print("✅ All systems initialized successfully!")
     
@@ -826,9 +567,9 @@ with gr.Blocks(
     """
 ) as demo:
     
-    # State variables
-    current_user_state = gr.State("")
-    user_role_state = gr.State("")
+    # State variables - the session token is the only per-browser identity
+    session_state = gr.State("")
+    pending_page_state = gr.State(0)
     
     # =============================================
     # LOGIN INTERFACE
@@ -956,6 +697,10 @@ with gr.Blocks(
             admin_status = gr.Markdown("### Loading pending requests...")
             pending_display = gr.Markdown()
             
+            with gr.Row():
+                prev_page_btn = gr.Button("⬅️ Previous Page", size="sm", variant="secondary")
+                next_page_btn = gr.Button("Next Page ➡️", size="sm", variant="secondary")
+            
             with gr.Row():
                 approve_all_btn = gr.Button("✅ Approve All Requests", variant="primary", size="lg")
                 refresh_admin_btn = gr.Button("🔄 Refresh List", variant="secondary")
@@ -1006,69 +751,117 @@ with gr.Blocks(
         if not user_id or not password:
             return (
                 gr.update(visible=True), gr.update(visible=False), gr.update(visible=False),
-                "❌ Please enter both User ID and Password", "", "", [], []
+                "❌ Please enter both User ID and Password", "", [], []
+            )
+        
+        throttled = rate_limited("login", user_id)
+        if throttled:
+            return (
+                gr.update(visible=True), gr.update(visible=False), gr.update(visible=False),
+                f"❌ {throttled}", "", [], []
             )
         
-        success, message = auth.authenticate(user_id, password)
+        token, message, role = auth.login(user_id, password)
         
-        if success:
-            current_user, role = auth.get_current_user()
+        if token:
+            current_user, role = auth.get_current_user(token)
             print(f"✅ Login successful: User={current_user}, Role={role}")  # Debug print
             
             # Get pending requests for dropdowns
             requests = db.get_pending_requests(current_user) if role == "admin" else []
-            user_choices = list(set([str(req['UserId']) for req in requests]))
-            date_choices = [req['Leave_Date'] for req in requests]
+            user_choices = list(set([str(req.user_id) for req in requests]))
+            date_choices = [req.leave_date for req in requests]
             
             if role == "employee":
                 return (
                     gr.update(visible=False), gr.update(visible=True), gr.update(visible=False),
-                    f"✅ {message}", current_user, role, user_choices, date_choices
+                    f"✅ {message}", token, user_choices, date_choices
                 )
             else:  # admin
                 return (
                     gr.update(visible=False), gr.update(visible=False), gr.update(visible=True),
-                    f"✅ {message}", current_user, role, user_choices, date_choices
+                    f"✅ {message}", token, user_choices, date_choices
                 )
         else:
             print(f"❌ Login failed: {message}")  # Debug print
             return (
                 gr.update(visible=True), gr.update(visible=False), gr.update(visible=False),
-                f"❌ {message}", "", "", [], []
+                f"❌ {message}", "", [], []
             )
     
-    def handle_logout():
+    def handle_logout(token):
         """Handle user logout"""
-        auth.logout()
+        auth.logout(token)
         return (
             gr.update(visible=True), gr.update(visible=False), gr.update(visible=False),
-            "✅ Logged out successfully!", "", "", [], []
+            "✅ Logged out successfully!", "", [], []
         )
     
-    def chat_with_agent_employee(user_id, user_message, chat_history):
-        """Handle chat with context-aware AI agent"""
+    def with_session(handler, role=None):
+        """Resolve the session token passed as a handler's first input into a user id"""
+        def resolve(token):
+            user_id, user_role = auth.get_current_user(token)
+            if role and user_role != role:
+                user_id = None
+            return user_id or ""
+        
+        # Gradio streams only from generator functions - keep the wrapper one too
+        if inspect.isgeneratorfunction(handler):
+            @functools.wraps(handler)
+            def stream_wrapper(token, *args):
+                yield from handler(resolve(token), *args)
+            return stream_wrapper
+        
+        @functools.wraps(handler)
+        def wrapper(token, *args):
+            return handler(resolve(token), *args)
+        return wrapper
+    
+    BUSY_MESSAGE = "⏳ The system is busy right now - please retry in a moment."
+    
+    def rate_limited(name, key):
+        """Message for a user who is over the `name` budget, else None"""
+        limiter = limiters[name]
+        if limiter.allow(str(key)):
+            return None
+        return f"⏳ Too many requests - please wait {math.ceil(limiter.retry_after(str(key)))}s and try again."
+    
+    def stream_chat_with_agent_employee(user_id, user_message, chat_history):
+        """Handle chat with context-aware AI agent - the reply grows in place while it is produced"""
         print(f"🔍 CHAT: user_id={user_id}, message='{user_message}'")
         
         if not user_id or user_id == "":
-            return chat_history, "🔐 Please login first!"
+            yield chat_history, "🔐 Please login first!"
+            return
         
         if not user_message or user_message.strip() == "":
-            return chat_history, ""
+            yield chat_history, ""
+            return
         
         try:
             # Ensure chat_history is a list
             if chat_history is None:
                 chat_history = []
                 
-            print(f"✅ Processing message for user: {user_id}")
+            throttled = rate_limited("chat", user_id)
+            if throttled:
+                yield chat_history + [[user_message, throttled]], user_message
+                return
             
-            # Process message - make sure user_id is passed correctly
-            bot_response = agent.process_message(str(user_id), user_message.strip())
+            print(f"✅ Processing message for user: {user_id}")
             
-            # Add to history in correct format
-            new_history = chat_history + [[user_message, bot_response]]
+            # Show the message straight away, before any work is done
+            yield chat_history + [[user_message, "⏳ ..."]], ""
             
-            return new_history, ""
+            # Every turn rewrites the workbook - turn away fast when writers are backed up
+            with write_gate.admit() as admitted:
+                if not admitted:
+                    yield chat_history + [[user_message, BUSY_MESSAGE]], user_message
+                    return
+                # Process message - make sure user_id is passed correctly
+                for partial_response in agent.process_message_stream(str(user_id), user_message.strip()):
+                    # Add to history in correct format
+                    yield chat_history + [[user_message, partial_response]], ""
             
         except Exception as e:
             print(f"❌ Chat error: {e}")
@@ -1076,7 +869,14 @@ with gr.Blocks(
             traceback.print_exc()
             error_msg = "I apologize, but I'm having trouble processing your request."
             new_history = chat_history + [[user_message, error_msg]]
-            return new_history, ""
+            yield new_history, ""
+    
+    def chat_with_agent_employee(user_id, user_message, chat_history):
+        """Handle chat with context-aware AI agent - the final reply only"""
+        result = (chat_history, "")
+        for result in stream_chat_with_agent_employee(user_id, user_message, chat_history):
+            pass
+        return result
 
     def get_chat_history_employee(user_id):
         """Get chat history for display - ENSURES PROPER FORMAT"""
@@ -1144,19 +944,19 @@ with gr.Blocks(
                 <h3 style='margin: 0 0 20px 0; text-align: center;'>🎯 Your Leave Balance</h3>
                 <div style='display: grid; grid-template-columns: 1fr 1fr; gap: 15px;'>
                     <div style='text-align: center; background: rgba(255,255,255,0.2); padding: 15px; border-radius: 10px; backdrop-filter: blur(10px);'>
-                        <div style='font-size: 28px; font-weight: bold;'>{balance['EL']}</div>
+                        <div style='font-size: 28px; font-weight: bold;'>{balance.el}</div>
                         <div style='font-size: 14px;'>🏖️ Earned Leave</div>
                     </div>
                     <div style='text-align: center; background: rgba(255,255,255,0.2); padding: 15px; border-radius: 10px; backdrop-filter: blur(10px);'>
-                        <div style='font-size: 28px; font-weight: bold;'>{balance['SL']}</div>
+                        <div style='font-size: 28px; font-weight: bold;'>{balance.sl}</div>
                         <div style='font-size: 14px;'>🤒 Sick Leave</div>
                     </div>
                     <div style='text-align: center; background: rgba(255,255,255,0.2); padding: 15px; border-radius: 10px; backdrop-filter: blur(10px);'>
-                        <div style='font-size: 28px; font-weight: bold;'>{balance['CL']}</div>
+                        <div style='font-size: 28px; font-weight: bold;'>{balance.cl}</div>
                         <div style='font-size: 14px;'>🎯 Casual Leave</div>
                     </div>
                     <div style='text-align: center; background: rgba(255,255,255,0.2); padding: 15px; border-radius: 10px; backdrop-filter: blur(10px);'>
-                        <div style='font-size: 28px; font-weight: bold;'>{balance['TL']}</div>
+                        <div style='font-size: 28px; font-weight: bold;'>{balance.tl}</div>
                         <div style='font-size: 14px;'>📈 Total Available</div>
                     </div>
                 </div>
@@ -1174,7 +974,8 @@ with gr.Blocks(
         if not user_id:
             return "<p>Please login to view your applications</p>"
         
-        requests = db.get_user_leave_requests(user_id)
+        page = db.get_user_leave_requests_page(user_id, limit=Config.EMPLOYEE_PAGE_SIZE)
+        requests = list(reversed(page.items))
         if not requests:
             return """
             <div style='text-align: center; padding: 40px; background: #f8f9fa; border-radius: 10px;'>
@@ -1183,7 +984,8 @@ with gr.Blocks(
             </div>
             """
         
-        html = """
+        html = f"""
+        <p style='color: #6c757d;'>Showing latest {len(requests)} of {page.total} applications</p>
         <div style='background: white; border-radius: 10px; overflow: hidden; box-shadow: 0 2px 10px rgba(0,0,0,0.1);'>
             <table style='width: 100%; border-collapse: collapse;'>
                 <thead style='background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); color: white;'>
@@ -1197,18 +999,12 @@ with gr.Blocks(
                 <tbody>
         """
         
-        for req in requests[-10:]:
-            # Fix datetime parsing safely
-            leave_date = req['Leave_Date']
-            if hasattr(leave_date, 'split'):
-                date_str = leave_date.split()[0] if ' ' in str(leave_date) else str(leave_date)
-            else:
-                # Handle datetime objects
-                date_str = str(leave_date).split()[0] if ' ' in str(leave_date) else str(leave_date)
+        for req in requests:
+            date_str = req.leave_day
             
-            if req['Status'] == 'Approved':
+            if req.status == 'Approved':
                 status_badge = "<span style='background: #28a745; color: white; padding: 5px 10px; border-radius: 15px; font-size: 12px;'>✅ Approved</span>"
-            elif req['Status'] == 'Rejected':
+            elif req.status == 'Rejected':
                 status_badge = "<span style='background: #dc3545; color: white; padding: 5px 10px; border-radius: 15px; font-size: 12px;'>❌ Rejected</span>"
             else:
                 status_badge = "<span style='background: #ffc107; color: black; padding: 5px 10px; border-radius: 15px; font-size: 12px;'>⏳ Pending</span>"
@@ -1216,8 +1012,8 @@ with gr.Blocks(
             html += f"""
             <tr style='border-bottom: 1px solid #eee;'>
                 <td style='padding: 15px;'>{date_str}</td>
-                <td style='padding: 15px;'>{req['LeaveType']}</td>
-                <td style='padding: 15px;'>{req['Reason']}</td>
+                <td style='padding: 15px;'>{req.leave_type}</td>
+                <td style='padding: 15px;'>{req.reason}</td>
                 <td style='padding: 15px; text-align: center;'>{status_badge}</td>
             </tr>
             """
@@ -1230,30 +1026,36 @@ with gr.Blocks(
         return html
     
     
-    def get_pending_display_admin(admin_id):
-        """Get pending requests for admin - FIXED"""
+    def get_pending_display_admin(admin_id, page_number=0):
+        """Get one page of pending requests for admin"""
         if not admin_id:
             return "Please login as admin", "Please login to view pending requests"
         
         try:
-            requests = db.get_pending_requests(admin_id)
+            page_size = Config.ADMIN_PAGE_SIZE
+            offset = max(int(page_number or 0), 0) * page_size
+            page = db.get_pending_requests_page(admin_id, limit=page_size, cursor=offset)
+            requests = page.items
             
             if not requests:
+                if page.total:
+                    return "### 📋 Pending Approvals", f"**No requests on this page.** {page.total} pending in total."
                 return "### 📋 Pending Approvals", "**No pending leave requests found.**\n\nIf you just created leave applications, make sure they are assigned to your admin ID."
             
             # Simple text display
-            display_text = f"**Pending Leave Requests: {len(requests)}**\n\n"
+            total_pages = (page.total + page_size - 1) // page_size
+            display_text = f"**Pending Leave Requests: {page.total}** (page {offset // page_size + 1} of {total_pages}, showing {offset + 1}-{offset + len(requests)})\n\n"
             
-            for i, req in enumerate(requests, 1):
+            for i, req in enumerate(requests, offset + 1):
                 # Safe date formatting
-                leave_date = str(req['Leave_Date']).split()[0]
-                applied_date = str(req['AppliedDate']).split()[0]
+                leave_date = req.leave_day
+                applied_date = req.applied_day
                 
                 display_text += f"**Request {i}:**\n"
-                display_text += f"• **User:** {req['UserId']}\n"
+                display_text += f"• **User:** {req.user_id}\n"
                 display_text += f"• **Date:** {leave_date}\n"
-                display_text += f"• **Type:** {req['LeaveType']}\n"
-                display_text += f"• **Reason:** {req['Reason']}\n"
+                display_text += f"• **Type:** {req.leave_type}\n"
+                display_text += f"• **Reason:** {req.reason}\n"
                 display_text += f"• **Applied:** {applied_date}\n\n"
             
             return "### 📋 Pending Approvals", display_text
@@ -1261,6 +1063,18 @@ with gr.Blocks(
         except Exception as e:
             return "### ❌ Error", f"Error loading requests: {str(e)}"
     
+    def change_pending_page(admin_id, page_number, step):
+        """Move the pending list one page forward or back"""
+        if not admin_id:
+            return "Please login as admin", "Please login to view pending requests", 0
+        
+        total = db.get_pending_requests_page(admin_id, limit=0).total
+        last_page = max((total - 1) // Config.ADMIN_PAGE_SIZE, 0)
+        page_number = min(max(int(page_number or 0) + step, 0), last_page)
+        
+        status, display = get_pending_display_admin(admin_id, page_number)
+        return status, display, page_number
+    
     def update_user_dropdown(admin_id):
         """Update user dropdown choices"""
         if not admin_id:
@@ -1268,7 +1082,7 @@ with gr.Blocks(
         
         try:
             requests = db.get_pending_requests(admin_id)
-            user_choices = list(set([str(req['UserId']) for req in requests]))
+            user_choices = list(set([str(req.user_id) for req in requests]))
             print(f"✅ User dropdown updated: {user_choices}")
             return user_choices
         except Exception as e:
@@ -1289,15 +1103,8 @@ with gr.Blocks(
             date_choices = []
             for req in requests:
                 # Convert both to string for comparison
-                if str(req['UserId']) == str(selected_user):
-                    # Format the date nicely
-                    leave_date = req['Leave_Date']
-                    if hasattr(leave_date, 'split'):
-                        formatted_date = leave_date.split()[0] if ' ' in str(leave_date) else str(leave_date)
-                    else:
-                        formatted_date = str(leave_date).split()[0] if ' ' in str(leave_date) else str(leave_date)
-                    
-                    date_choices.append(req['Leave_Date'])  # Keep original for database operations
+                if str(req.user_id) == str(selected_user):
+                    date_choices.append(req.leave_date)  # Keep original for database operations
             
             print(f"✅ Date choices for user {selected_user}: {len(date_choices)} dates")
             return gr.update(choices=date_choices)
@@ -1319,7 +1126,7 @@ with gr.Blocks(
                 return gr.update(choices=[]), gr.update(choices=[])
             
             # Convert user IDs to strings for dropdown compatibility
-            user_choices = [str(req['UserId']) for req in requests]
+            user_choices = [str(req.user_id) for req in requests]
             user_choices = list(set(user_choices))  # Remove duplicates
             user_choices.sort()  # Sort for better UX
             
@@ -1345,8 +1152,15 @@ with gr.Blocks(
         if not leave_date:
             return "❌ Please select a date", gr.update(), gr.update(), gr.update(), gr.update()
         
+        throttled = rate_limited("approval", admin_id)
+        if throttled:
+            return f"❌ {throttled}", gr.update(), gr.update(), gr.update(), gr.update()
+        
         try:
-            success = db.update_leave_status(user_id, leave_date, "Approved")
+            with write_gate.admit() as admitted:
+                if not admitted:
+                    return BUSY_MESSAGE, gr.update(), gr.update(), gr.update(), gr.update()
+                success = db.update_leave_status(user_id, leave_date, "Approved")
             if success:
                 result = f"✅ Approved leave for User {user_id} on {leave_date.split()[0]}"
             else:
@@ -1375,8 +1189,15 @@ with gr.Blocks(
         if not leave_date:
             return "❌ Please select a date", gr.update(), gr.update(), gr.update(), gr.update()
         
+        throttled = rate_limited("approval", admin_id)
+        if throttled:
+            return f"❌ {throttled}", gr.update(), gr.update(), gr.update(), gr.update()
+        
         try:
-            success = db.update_leave_status(user_id, leave_date, "Rejected")
+            with write_gate.admit() as admitted:
+                if not admitted:
+                    return BUSY_MESSAGE, gr.update(), gr.update(), gr.update(), gr.update()
+                success = db.update_leave_status(user_id, leave_date, "Rejected")
             if success:
                 result = f"❌ Rejected leave for User {user_id} on {leave_date.split()[0]}"
             else:
@@ -1399,8 +1220,15 @@ with gr.Blocks(
         if not admin_id:
             return "❌ Please login as admin", gr.update(), gr.update(), gr.update(), gr.update()
         
+        throttled = rate_limited("approval", admin_id)
+        if throttled:
+            return f"❌ {throttled}", gr.update(), gr.update(), gr.update(), gr.update()
+        
         try:
-            approved_count, total_count = db.approve_all_pending(admin_id)
+            with write_gate.admit() as admitted:
+                if not admitted:
+                    return BUSY_MESSAGE, gr.update(), gr.update(), gr.update(), gr.update()
+                approved_count, total_count = db.approve_all_pending(admin_id)
             
             if approved_count > 0:
                 result = f"✅ Successfully approved {approved_count} out of {total_count} requests!"
@@ -1422,8 +1250,8 @@ with gr.Blocks(
         """Get system analytics for admin"""
         try:
             # Read data from Excel
-            df_available = pd.read_excel(Config.EXCEL_FILE, sheet_name='Available')
-            df_hierarchy = pd.read_excel(Config.EXCEL_FILE, sheet_name='Hierarchy')
+            df_available = db.read_sheet('Available')
+            df_hierarchy = db.read_sheet('Hierarchy')
             
             # Calculate stats
             total_employees = len(df_available)
@@ -1494,99 +1322,100 @@ with gr.Blocks(
     login_btn.click(
         fn=handle_login,
         inputs=[user_id_input, password_input],
-        outputs=[login_section, employee_section, admin_section, login_status, current_user_state, user_role_state, action_user_id, action_leave_date]
+        outputs=[login_section, employee_section, admin_section, login_status, session_state, action_user_id, action_leave_date]
     ).then(
-        fn=lambda uid: get_pending_display_admin(uid),
-        inputs=[current_user_state],
+        fn=with_session(lambda uid: get_pending_display_admin(uid), role="admin"),
+        inputs=[session_state],
         outputs=[pending_display, admin_status]
     ).then(
-        fn=lambda uid: update_admin_dropdowns(uid),
-        inputs=[current_user_state],
+        fn=with_session(lambda uid: update_admin_dropdowns(uid), role="admin"),
+        inputs=[session_state],
         outputs=[action_user_id, action_leave_date]
     ).then(
-        fn=lambda uid: get_leave_balance_employee(uid),  # ADD THIS LINE
-        inputs=[current_user_state],
+        fn=with_session(lambda uid: get_leave_balance_employee(uid), role="employee"),  # ADD THIS LINE
+        inputs=[session_state],
         outputs=[balance_display]
     ).then(
-        fn=lambda uid: get_leave_requests_employee(uid),  # ADD THIS LINE
-        inputs=[current_user_state],
+        fn=with_session(lambda uid: get_leave_requests_employee(uid), role="employee"),  # ADD THIS LINE
+        inputs=[session_state],
         outputs=[leave_requests_display]
     ).then(
-        fn=lambda uid: get_chat_history_employee(uid),  # ADD THIS LINE
-        inputs=[current_user_state],
+        fn=with_session(lambda uid: get_chat_history_employee(uid), role="employee"),  # ADD THIS LINE
+        inputs=[session_state],
         outputs=[chatbot_interface]
     )
     
     # Employee interface handlers
     chat_submit.click(
-        fn=chat_with_agent_employee,
-        inputs=[current_user_state, chat_input, chatbot_interface],
+        fn=with_session(stream_chat_with_agent_employee, role="employee"),
+        inputs=[session_state, chat_input, chatbot_interface],
         outputs=[chatbot_interface, chat_input]
     ).then(
-        fn=lambda uid: get_leave_balance_employee(uid),
-        inputs=[current_user_state],
+        fn=with_session(lambda uid: get_leave_balance_employee(uid), role="employee"),
+        inputs=[session_state],
         outputs=[balance_display]
     )
     
     chat_input.submit(
-        fn=chat_with_agent_employee,
-        inputs=[current_user_state, chat_input, chatbot_interface],
+        fn=with_session(stream_chat_with_agent_employee, role="employee"),
+        inputs=[session_state, chat_input, chatbot_interface],
         outputs=[chatbot_interface, chat_input]
     ).then(
-        fn=lambda uid: get_leave_balance_employee(uid),
-        inputs=[current_user_state],
+        fn=with_session(lambda uid: get_leave_balance_employee(uid), role="employee"),
+        inputs=[session_state],
         outputs=[balance_display]
     )
     
     # Quick action buttons
         # Quick action buttons
     quick_policy.click(
-        fn=lambda uid: chat_with_agent_employee(uid, "What are the leave policies?", get_chat_history_employee(uid)),
-        inputs=[current_user_state],
+        fn=with_session(lambda uid: chat_with_agent_employee(uid, "What are the leave policies?", get_chat_history_employee(uid)), role="employee"),
+        inputs=[session_state],
         outputs=[chatbot_interface, chat_input]
     ).then(
-        fn=lambda uid: get_leave_balance_employee(uid),
-        inputs=[current_user_state],
+        fn=with_session(lambda uid: get_leave_balance_employee(uid), role="employee"),
+        inputs=[session_state],
         outputs=[balance_display]
     )
     
     quick_balance.click(
-        fn=lambda uid: chat_with_agent_employee(uid, "What is my leave balance?", get_chat_history_employee(uid)),
-        inputs=[current_user_state],
+        fn=with_session(lambda uid: chat_with_agent_employee(uid, "What is my leave balance?", get_chat_history_employee(uid)), role="employee"),
+        inputs=[session_state],
         outputs=[chatbot_interface, chat_input]
     ).then(
-        fn=lambda uid: get_leave_balance_employee(uid),
-        inputs=[current_user_state],
+        fn=with_session(lambda uid: get_leave_balance_employee(uid), role="employee"),
+        inputs=[session_state],
         outputs=[balance_display]
     )
     
     quick_status.click(
-        fn=lambda uid: chat_with_agent_employee(uid, "What is my application status?", get_chat_history_employee(uid)),
-        inputs=[current_user_state],
+        fn=with_session(lambda uid: chat_with_agent_employee(uid, "What is my application status?", get_chat_history_employee(uid)), role="employee"),
+        inputs=[session_state],
         outputs=[chatbot_interface, chat_input]
     )
     
     quick_help.click(
-        fn=lambda uid: chat_with_agent_employee(uid, "What can you help me with?", get_chat_history_employee(uid)),
-        inputs=[current_user_state],
+        fn=with_session(lambda uid: chat_with_agent_employee(uid, "What can you help me with?", get_chat_history_employee(uid)), role="employee"),
+        inputs=[session_state],
         outputs=[chatbot_interface, chat_input]
     )
     
     clear_chat_btn.click(
-        fn=clear_chat_history_employee,
-        inputs=[current_user_state],
+        fn=with_session(clear_chat_history_employee, role="employee"),
+        inputs=[session_state],
         outputs=[clear_chat_status, chatbot_interface]
     )
     
     refresh_btn.click(
-        fn=get_leave_requests_employee,
-        inputs=[current_user_state],
+        fn=with_session(get_leave_requests_employee, role="employee"),
+        inputs=[session_state],
         outputs=[leave_requests_display]
     )
     
     logout_btn.click(
         fn=handle_logout,
-        outputs=[login_section, employee_section, admin_section, logout_status, current_user_state, user_role_state, action_user_id, action_leave_date]
+        inputs=[session_state],
+        outputs=[login_section, employee_section, admin_section, logout_status, session_state, action_user_id, action_leave_date]
     ).then(
         fn=reset_admin_dropdowns,
         outputs=[action_user_id, action_leave_date]
@@ -1594,37 +1423,49 @@ with gr.Blocks(
     
     # Admin interface handlers
     refresh_admin_btn.click(
-        fn=lambda uid: get_pending_display_admin(uid),
-        inputs=[current_user_state],
-        outputs=[admin_status, pending_display]
+        fn=with_session(lambda uid: get_pending_display_admin(uid) + (0,), role="admin"),
+        inputs=[session_state],
+        outputs=[admin_status, pending_display, pending_page_state]
     ).then(
-        fn=lambda uid: update_admin_dropdowns(uid),
-        inputs=[current_user_state],
+        fn=with_session(lambda uid: update_admin_dropdowns(uid), role="admin"),
+        inputs=[session_state],
         outputs=[action_user_id, action_leave_date]
     )
     
+    prev_page_btn.click(
+        fn=with_session(lambda uid, page: change_pending_page(uid, page, -1), role="admin"),
+        inputs=[session_state, pending_page_state],
+        outputs=[admin_status, pending_display, pending_page_state]
+    )
+    
+    next_page_btn.click(
+        fn=with_session(lambda uid, page: change_pending_page(uid, page, 1), role="admin"),
+        inputs=[session_state, pending_page_state],
+        outputs=[admin_status, pending_display, pending_page_state]
+    )
+    
     # When user selection changes, update date dropdown
     action_user_id.change(
-        fn=lambda uid, user: update_date_dropdown(uid, user),
-        inputs=[current_user_state, action_user_id],
+        fn=with_session(lambda uid, user: update_date_dropdown(uid, user), role="admin"),
+        inputs=[session_state, action_user_id],
         outputs=[action_leave_date]
     )
     
     approve_all_btn.click(
-        fn=lambda uid: handle_approve_all(uid),
-        inputs=[current_user_state],
+        fn=with_session(lambda uid: handle_approve_all(uid), role="admin"),
+        inputs=[session_state],
         outputs=[bulk_action_status, pending_display, admin_status, action_user_id, action_leave_date]
     )
     
     individual_approve_btn.click(
-        fn=lambda uid, user_id, date: handle_individual_approve(uid, user_id, date),
-        inputs=[current_user_state, action_user_id, action_leave_date],
+        fn=with_session(lambda uid, user_id, date: handle_individual_approve(uid, user_id, date), role="admin"),
+        inputs=[session_state, action_user_id, action_leave_date],
         outputs=[individual_status, pending_display, admin_status, action_user_id, action_leave_date]
     )
     
     individual_reject_btn.click(
-        fn=lambda uid, user_id, date: handle_individual_reject(uid, user_id, date),
-        inputs=[current_user_state, action_user_id, action_leave_date],
+        fn=with_session(lambda uid, user_id, date: handle_individual_reject(uid, user_id, date), role="admin"),
+        inputs=[session_state, action_user_id, action_leave_date],
         outputs=[individual_status, pending_display, admin_status, action_user_id, action_leave_date]
     )
     
@@ -1635,7 +1476,8 @@ with gr.Blocks(
     
     admin_logout_btn.click(
         fn=handle_logout,
-        outputs=[login_section, employee_section, admin_section, admin_logout_status, current_user_state, user_role_state, action_user_id, action_leave_date]
+        inputs=[session_state],
+        outputs=[login_section, employee_section, admin_section, admin_logout_status, session_state, action_user_id, action_leave_date]
     ).then(
         fn=reset_admin_dropdowns,
         outputs=[action_user_id, action_leave_date]
@@ -1643,16 +1485,16 @@ with gr.Blocks(
     
     # Initial loads
     demo.load(
-        fn=lambda uid: get_leave_balance_employee(uid),
-        inputs=[current_user_state],
+        fn=with_session(lambda uid: get_leave_balance_employee(uid), role="employee"),
+        inputs=[session_state],
         outputs=[balance_display]
     ).then(
-        fn=lambda uid: get_leave_requests_employee(uid),
-        inputs=[current_user_state],
+        fn=with_session(lambda uid: get_leave_requests_employee(uid), role="employee"),
+        inputs=[session_state],
         outputs=[leave_requests_display]
     ).then(
-        fn=lambda uid: get_chat_history_employee(uid),
-        inputs=[current_user_state],
+        fn=with_session(lambda uid: get_chat_history_employee(uid), role="employee"),
+        inputs=[session_state],
         outputs=[chatbot_interface]
     )
 
@@ -1678,6 +1520,11 @@ if __name__ == "__main__":
     print(f"🌐 Server starting at: http://{Config.HOST}:{Config.PORT}")
     print(f"{'='*60}")
     
+    # Load deferred modules while the server comes up
+    warm_up_in_background()
+    # Credit monthly EL accrual now if a month was missed, then keep checking
+    start_accrual_scheduler(db)
+    
     try:
         demo.launch(
             server_name=Config.HOST,
@@ -1698,7 +1545,7 @@ if __name__ == "__main__":
             return "No admin ID"
         
         requests = db.get_pending_requests(admin_id)
-        user_choices = list(set([str(req['UserId']) for req in requests]))
+        user_choices = list(set([str(req.user_id) for req in requests]))
         
         debug_info = f"""
         **Debug Info:**
@@ -1708,7 +1555,7 @@ if __name__ == "__main__":
         """
         
         for user in user_choices:
-            user_dates = [req['Leave_Date'] for req in requests if str(req['UserId']) == user]
+            user_dates = [req.leave_date for req in requests if str(req.user_id) == user]
             debug_info += f"\n- User {user}: {len(user_dates)} dates"
         
         return debug_info
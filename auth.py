@@ -1,48 +1,55 @@
 from database import LeaveDatabase
+from sessions import SessionStore
+from directory import UserDirectory
 
 class AuthSystem:
-    def __init__(self, database):
+    def __init__(self, database, sessions=None, directory=None):
         self.db = database
-        self.current_user = None
-        self.user_role = None
-        self.default_password = "leave"
+        self.sessions = sessions or SessionStore()
+        self.directory = directory or UserDirectory(database)
     
     def authenticate(self, user_id, password):
-        """Authenticate user"""
+        """Check credentials - returns (success, message, role)"""
         if not user_id or not password:
-            return False, "Please enter both User ID and Password"
-        
-        if password != self.default_password:
-            return False, "Invalid password"
+            return False, "Please enter both User ID and Password", None
         
         try:
             user_id_int = int(user_id)
             
-            # Check if employee (1000-1010)
-            if 1000 <= user_id_int <= 1010:
-                self.current_user = user_id
-                self.user_role = "employee"
-                return True, f"Employee login successful! Welcome User {user_id}"
+            # O(1) role lookup in the user directory
+            role = self.directory.role(user_id_int)
+            if role is None:
+                return False, "User ID not found", None
             
-            # Check if admin
-            if user_id_int in [5000, 8001, 6099]:
-                self.current_user = user_id
-                self.user_role = "admin"
-                return True, f"Admin login successful! Welcome Admin {user_id}"
+            # Password is verified once per login - the session token carries the result afterwards
+            if not self.directory.check_password(user_id_int, password):
+                return False, "Invalid password", None
             
-            return False, "User ID not found. Valid IDs: 1000-1010 (Employees), 5000/8001/6099 (Admins)"
+            if role == "admin":
+                return True, f"Admin login successful! Welcome Admin {user_id}", "admin"
+            return True, f"Employee login successful! Welcome User {user_id}", "employee"
         except ValueError:
-            return False, "Invalid User ID format"
+            return False, "Invalid User ID format", None
         except Exception as e:
-            return False, f"Authentication error: {str(e)}"
+            return False, f"Authentication error: {str(e)}", None
+    
+    def login(self, user_id, password):
+        """Authenticate and open a session - returns (token, message, role)"""
+        success, message, role = self.authenticate(user_id, password)
+        if not success:
+            return None, message, None
+        return self.sessions.create(str(user_id).strip(), role), message, role
     
-    def logout(self):
-        """Logout current user"""
-        self.current_user = None
-        self.user_role = None
+    def logout(self, token):
+        """End the session behind a token"""
+        self.sessions.end(token)
     
-    def get_current_user(self):
-        return self.current_user, self.user_role
+    def get_current_user(self, token):
+        """Resolve a session token into (user_id, role)"""
+        session = self.sessions.get(token)
+        if session is None:
+            return None, None
+        return session.user_id, session.role
     
-    def is_logged_in(self):
-        return self.current_user is not None
\ No newline at end of file
+    def is_logged_in(self, token):
+        return self.sessions.get(token) is not None
@@ -0,0 +1,340 @@
+"""The agents' own date extractors from before date_engine, frozen for bench_dates
+
+Copied from EnhancedLeaveChatbot, LeaveAgent and SimpleLeaveAgent as they
+stood before the shared engine replaced them, so the benchmark always has
+the old paths to compare against. Only two changes were made: the
+reference day is passed in rather than read from the clock, and the log
+prints are gone. The shared date_grammar and date_service.parse_date are
+still called live, as they were then. Do not fix these functions - they
+are the baseline.
+"""
+import re
+from datetime import datetime, timedelta
+from work_calendar import get_calendar
+from date_service import parse_date
+import date_grammar
+
+DAYS_MAP = {
+    'monday': 0, 'tuesday': 1, 'wednesday': 2, 'thursday': 3,
+    'friday': 4, 'saturday': 5, 'sunday': 6,
+    'mon': 0, 'tue': 1, 'wed': 2, 'thu': 3, 'fri': 4, 'sat': 5, 'sun': 6
+}
+
+# EnhancedLeaveChatbot.DATE_FORMATS
+ENHANCED_DATE_FORMATS = (
+    '%d-%b-%Y', '%d-%m-%Y', '%d/%m/%Y', '%d %b %Y',
+    '%d-%b', '%d-%m', '%d/%m', '%b %d', '%d %b', '%d%b'
+)
+# LeaveAgent.DATE_FORMATS - DD-MM first, then MM-DD
+RAG_DATE_FORMATS = (
+    '%d-%m-%Y', '%d/%m/%Y', '%d-%m', '%d/%m',
+    '%m-%d-%Y', '%m/%d/%Y', '%m-%d', '%m/%d',
+    '%Y-%m-%d'
+)
+
+
+# --- EnhancedLeaveChatbot._extract_dates_advanced ---
+
+def _enhanced_single_date(date_str, today):
+    natural_dates = {
+        'today': today,
+        'tomorrow': today + timedelta(days=1),
+        'yesterday': today - timedelta(days=1),
+    }
+    for key, date_val in natural_dates.items():
+        if key in date_str.lower():
+            return date_val
+
+    clean_str = re.sub(r'[^\w\s/-]', '', date_str.strip())
+    return parse_date(clean_str, today, ENHANCED_DATE_FORMATS)
+
+
+def enhanced_dates(message, today):
+    match = date_grammar.extract(message, today)
+    if match:
+        return match.expand()
+
+    range_pattern = r'(\d{1,2}[-\/]?\w+[-\/]?\d{0,4})\s*(?:to|until|til|-)\s*(\d{1,2}[-\/]?\w+[-\/]?\d{0,4})'
+    range_match = re.search(range_pattern, message, re.IGNORECASE)
+    if range_match:
+        start_str, end_str = range_match.groups()
+        start_date = _enhanced_single_date(start_str, today)
+        end_date = _enhanced_single_date(end_str, today)
+        if start_date and end_date and start_date <= end_date:
+            return get_calendar().working_days_in_range(start_date, end_date)
+
+    single_date = _enhanced_single_date(message, today)
+    return [single_date] if single_date else []
+
+
+# --- LeaveAgent._extract_dates_from_message (rag_system) ---
+
+def _rag_relative_day(day_str, today, past=False):
+    for day_name, day_num in DAYS_MAP.items():
+        if day_name in day_str.lower():
+            days_ahead = (day_num - today.weekday()) % 7
+            if past:
+                if days_ahead == 0:
+                    days_ahead = 7
+                return today - timedelta(days=days_ahead)
+            if days_ahead == 0:
+                days_ahead = 7
+            return today + timedelta(days=days_ahead)
+    return None
+
+
+def _rag_date_range(message, today):
+    for separator in [' to ', ' till ', ' until ', ' - ', ' through ']:
+        if separator in message:
+            parts = message.split(separator)
+            if len(parts) >= 2:
+                start_date = parse_date(parts[0].strip(), today, RAG_DATE_FORMATS)
+                end_date = parse_date(parts[1].strip(), today, RAG_DATE_FORMATS)
+                if start_date and end_date and start_date <= end_date:
+                    return get_calendar().working_days_in_range(start_date, end_date)
+    return None
+
+
+def _rag_single_date(message, today):
+    matches = re.findall(r'\b\d{1,2}[-/]\d{1,2}[-/]?\d{0,4}\b', message)
+    if matches:
+        date_obj = parse_date(matches[0], today, RAG_DATE_FORMATS)
+        if date_obj:
+            return date_obj
+    return parse_date(message, today)
+
+
+def _rag_day_of_week(message, today):
+    for day_name, day_num in DAYS_MAP.items():
+        if day_name in message.lower():
+            days_ahead = (day_num - today.weekday()) % 7
+            if days_ahead == 0:
+                days_ahead = 7
+            return today + timedelta(days=days_ahead)
+    return None
+
+
+def rag_agent_dates(message, today):
+    """Takes the message lower-cased, as _parse_leave_request passed it"""
+    match = date_grammar.extract(message, today)
+    if match:
+        return match.expand()
+
+    clean_message = message
+    remove_phrases = [
+        'i want to apply', 'apply for', 'i need', 'want to take', 'take',
+        'leave', 'sl', 'el', 'cl', 'sick', 'earned', 'casual', 'medical',
+        'apply', 'for'
+    ]
+    for phrase in remove_phrases:
+        clean_message = clean_message.replace(phrase, ' ')
+    clean_message = ' '.join(clean_message.split()).strip()
+
+    date_range = _rag_date_range(clean_message, today)
+    if date_range:
+        return date_range
+
+    if 'before' in clean_message:
+        parts = clean_message.split('before')
+        if len(parts) > 1:
+            target_date = _rag_relative_day(parts[1].strip(), today)
+            if target_date:
+                return [target_date - timedelta(days=1)]
+
+    if 'last' in clean_message:
+        leave_date = _rag_relative_day(clean_message.replace('last', '').strip(), today, past=True)
+        if leave_date:
+            return [leave_date]
+
+    if 'yesterday' in clean_message:
+        return [today - timedelta(days=1)]
+    if 'today' in clean_message:
+        return [today]
+    if 'tomorrow' in clean_message:
+        return [today + timedelta(days=1)]
+
+    single_date = _rag_single_date(clean_message, today)
+    if single_date:
+        return [single_date]
+
+    day_date = _rag_day_of_week(clean_message, today)
+    if day_date:
+        return [day_date]
+
+    single_date_final = _rag_single_date(message, today)
+    return [single_date_final] if single_date_final else []
+
+
+# --- SimpleLeaveAgent._extract_dates_improved (app.py) ---
+
+_SIMPLE_REMOVE_PHRASES = [
+    'i want to apply', 'apply for', 'i need', 'want to take', 'take',
+    'leave', 'sl', 'el', 'cl', 'sick', 'earned', 'casual', 'medical',
+    'apply', 'for', 'a', 'an', 'the'
+]
+_NUMERIC_PATTERNS = [
+    r'(\d{1,2})[-/](\d{1,2})[-/](\d{4})',  # DD-MM-YYYY
+    r'(\d{1,2})[-/](\d{1,2})',             # DD-MM (current year)
+    r'(\d{4})[-/](\d{1,2})[-/](\d{1,2})',  # YYYY-MM-DD
+]
+
+
+def _simple_clean(message_lower):
+    clean_message = message_lower
+    for phrase in _SIMPLE_REMOVE_PHRASES:
+        clean_message = clean_message.replace(phrase, ' ')
+    return ' '.join(clean_message.split()).strip()
+
+
+def _simple_natural_language_date(date_text, base_date):
+    date_text = date_text.lower().strip()
+
+    if date_text in ['today', 'now']:
+        return base_date
+    elif date_text in ['yesterday']:
+        return base_date - timedelta(days=1)
+    elif date_text in ['tomorrow']:
+        return base_date + timedelta(days=1)
+    elif date_text in ['day after tomorrow']:
+        return base_date + timedelta(days=2)
+    elif date_text in ['day before yesterday']:
+        return base_date - timedelta(days=2)
+
+    if 'last week' in date_text:
+        base_date = base_date - timedelta(days=7)
+        date_text = date_text.replace('last week', '').strip()
+    elif 'next week' in date_text:
+        base_date = base_date + timedelta(days=7)
+        date_text = date_text.replace('next week', '').strip()
+
+    for day_name, day_num in DAYS_MAP.items():
+        if day_name in date_text:
+            current_weekday = base_date.weekday()
+            if 'last' in date_text:
+                days_ago = (current_weekday - day_num) % 7
+                if days_ago == 0:
+                    days_ago = 7
+                return base_date - timedelta(days=days_ago)
+            days_ahead = (day_num - current_weekday) % 7
+            if days_ahead == 0:
+                days_ahead = 7
+            return base_date + timedelta(days=days_ahead)
+
+    if 'days ago' in date_text:
+        try:
+            num_days = int(re.search(r'(\d+)\s+days?\s+ago', date_text).group(1))
+            return base_date - timedelta(days=num_days)
+        except:
+            pass
+    elif 'days from now' in date_text or 'days later' in date_text:
+        try:
+            num_days = int(re.search(r'(\d+)\s+days?\s+(from now|later)', date_text).group(1))
+            return base_date + timedelta(days=num_days)
+        except:
+            pass
+
+    return None
+
+
+def _simple_dates_from_message(message, today):
+    clean_message = _simple_clean(message.lower())
+    leave_dates = []
+
+    for pattern in _NUMERIC_PATTERNS:
+        for match in re.findall(pattern, clean_message):
+            try:
+                if len(match) == 3:
+                    if len(match[0]) == 4:
+                        year, month, day = int(match[0]), int(match[1]), int(match[2])
+                    else:
+                        day, month, year = int(match[0]), int(match[1]), int(match[2])
+                    leave_dates.append(datetime(year, month, day).date())
+                elif len(match) == 2:
+                    day, month = int(match[0]), int(match[1])
+                    leave_dates.append(datetime(today.year, month, day).date())
+            except ValueError:
+                continue
+
+    if not leave_dates:
+        natural_patterns = [
+            r'(today|tomorrow|yesterday|day after tomorrow|day before yesterday)',
+            r'(last|next)\s+(monday|tuesday|wednesday|thursday|friday|saturday|sunday|mon|tue|wed|thu|fri|sat|sun)',
+            r'(monday|tuesday|wednesday|thursday|friday|saturday|sunday|mon|tue|wed|thu|fri|sat|sun)',
+            r'(\d+)\s+days?\s+ago',
+            r'(\d+)\s+days?\s+(from now|later)',
+            r'last week',
+            r'next week'
+        ]
+        for pattern in natural_patterns:
+            for match in re.findall(pattern, clean_message):
+                date_text = ' '.join(match).strip() if isinstance(match, tuple) else match.strip()
+                parsed_date = _simple_natural_language_date(date_text, today)
+                if parsed_date:
+                    leave_dates.append(parsed_date)
+                    break
+            if leave_dates:
+                break
+
+    if not leave_dates:
+        parsed_date = _simple_natural_language_date(clean_message, today)
+        if parsed_date:
+            leave_dates.append(parsed_date)
+
+    return sorted(set(leave_dates))
+
+
+def simple_agent_dates(message, today):
+    leave_dates = []
+    message_lower = message.lower()
+
+    match = date_grammar.extract(message_lower, today)
+    if match:
+        return match.expand()
+
+    clean_message = _simple_clean(message_lower)
+
+    month_patterns = {
+        'jan': 1, 'january': 1, 'feb': 2, 'february': 2, 'mar': 3, 'march': 3,
+        'apr': 4, 'april': 4, 'may': 5, 'jun': 6, 'june': 6, 'jul': 7, 'july': 7,
+        'aug': 8, 'august': 8, 'sep': 9, 'september': 9, 'oct': 10, 'october': 10,
+        'nov': 11, 'november': 11, 'dec': 12, 'december': 12
+    }
+    for month_name, month_num in month_patterns.items():
+        if month_name in clean_message:
+            day_match = re.search(r'(\d{1,2})', clean_message)
+            if day_match:
+                try:
+                    parsed_date = datetime(today.year, month_num, int(day_match.group(1))).date()
+                    if parsed_date >= today:
+                        return [parsed_date]
+                except ValueError:
+                    pass
+
+    for pattern in _NUMERIC_PATTERNS:
+        for match in re.findall(pattern, clean_message):
+            try:
+                if len(match) == 3:
+                    if len(match[0]) == 4:
+                        year, month, day = int(match[0]), int(match[1]), int(match[2])
+                    else:
+                        day, month, year = int(match[0]), int(match[1]), int(match[2])
+                    leave_dates.append(datetime(year, month, day).date())
+                elif len(match) == 2:
+                    day, month = int(match[0]), int(match[1])
+                    leave_dates.append(datetime(today.year, month, day).date())
+                return leave_dates
+            except ValueError:
+                continue
+
+    if 'today' in clean_message:
+        leave_dates.append(today)
+    elif 'yesterday' in clean_message:
+        leave_dates.append(today - timedelta(days=1))
+    elif 'tomorrow' in clean_message:
+        leave_dates.append(today + timedelta(days=1))
+    elif 'day after tomorrow' in clean_message:
+        leave_dates.append(today + timedelta(days=2))
+
+    if not leave_dates:
+        leave_dates = _simple_dates_from_message(message, today)
+    return leave_dates
@@ -0,0 +1,344 @@
+import os
+import io
+import sys
+import json
+import time
+import argparse
+import tempfile
+import contextlib
+from collections import namedtuple, Counter
+from datetime import date, timedelta
+import numpy as np
+from config import Config
+from work_calendar import get_calendar
+import date_engine
+import bench_baseline
+
+Case = namedtuple('Case', ['text', 'expected', 'category'])
+
+# Fixed so runs on different days score the same corpus
+REFERENCE = date(2025, 10, 15)
+
+WEEKDAY_NAMES = ['monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday']
+
+# How users write a single date - (label, strftime-like builder)
+SINGLE_FORMATS = [
+    ('dd-mm-yyyy', lambda d: d.strftime('%d-%m-%Y')),
+    ('dd/mm/yyyy', lambda d: d.strftime('%d/%m/%Y')),
+    ('iso', lambda d: d.strftime('%Y-%m-%d')),
+    ('d mon yyyy', lambda d: f"{d.day} {d.strftime('%b')} {d.year}"),
+    ('d month', lambda d: f"{d.day} {d.strftime('%B')}"),
+    ('month d', lambda d: f"{d.strftime('%B')} {d.day}"),
+    ('ddmon', lambda d: f"{d.day}{d.strftime('%b').lower()}"),
+    ('ordinal', lambda d: f"{d.day}{_ordinal(d.day)} {d.strftime('%B')}"),
+]
+
+# How users write a range - (label, builder(start, end))
+RANGE_FORMATS = [
+    ('dd-mm-yyyy to', lambda s, e: f"{s.strftime('%d-%m-%Y')} to {e.strftime('%d-%m-%Y')}"),
+    ('d mon to d mon', lambda s, e: f"{s.day} {s.strftime('%b')} to {e.day} {e.strftime('%b')}"),
+    ('from d till d month', lambda s, e: f"from {s.day} {s.strftime('%B')} till {e.day} {e.strftime('%B')}"),
+    ('d to d mon', lambda s, e: f"{s.day} to {e.day} {e.strftime('%b')}"),
+]
+
+# The sentence around the date
+SINGLE_WRAPPERS = [
+    "{}",
+    "apply EL for {}",
+    "I want to take leave on {}",
+    "need sick leave {}",
+    "CL {} please",
+]
+RANGE_WRAPPERS = [
+    "{}",
+    "apply EL {}",
+    "I want leave {}",
+]
+# Reasons that contain a weekday or month prefix but no date
+PREFIX_WORDS = [
+    "my cousin wedding", "I am not satisfied", "this month", "monitor repair", "a friendly visit",
+    "a sunny trip", "marriage function", "the decorator", "junk food", "augmented reality demo",
+]
+RELATIVE_WRAPPERS = [
+    "{}",
+    "need sick leave {}",
+    "CL {} please",
+]
+
+
+def _ordinal(day):
+    if 11 <= day % 100 <= 13:
+        return 'th'
+    return {1: 'st', 2: 'nd', 3: 'rd'}.get(day % 10, 'th')
+
+
+def _upcoming(reference, weekday):
+    """Next occurrence strictly after the reference day"""
+    return reference + timedelta(days=(weekday - reference.weekday()) % 7 or 7)
+
+
+def _previous(reference, weekday):
+    """Most recent occurrence strictly before the reference day"""
+    return reference - timedelta(days=(reference.weekday() - weekday) % 7 or 7)
+
+
+def build_corpus(reference):
+    """Labeled phrasings with the dates they mean, relative to `reference`"""
+    cases = []
+    calendar = get_calendar()
+
+    for offset in range(-30, 46):
+        day = reference + timedelta(days=offset)
+        for label, render in SINGLE_FORMATS:
+            # Formats without a year only mean this year's date
+            if day.year != reference.year and 'yyyy' not in label and label != 'iso':
+                continue
+            for wrapper in SINGLE_WRAPPERS:
+                cases.append(Case(wrapper.format(render(day)), (day,), f"single/{label}"))
+
+    relative = {'today': 0, 'tomorrow': 1, 'yesterday': -1, 'day after tomorrow': 2}
+    for phrase, offset in relative.items():
+        for wrapper in SINGLE_WRAPPERS:
+            cases.append(Case(wrapper.format(phrase), (reference + timedelta(days=offset),), "relative"))
+
+    for weekday, name in enumerate(WEEKDAY_NAMES):
+        for phrase, day in ((name, _upcoming(reference, weekday)),
+                            (f"next {name}", _upcoming(reference, weekday)),
+                            (f"last {name}", _previous(reference, weekday))):
+            for wrapper in SINGLE_WRAPPERS:
+                cases.append(Case(wrapper.format(phrase), (day,), "weekday"))
+
+    for offset in range(1, 31, 2):
+        start = reference + timedelta(days=offset)
+        for length in (1, 2, 4):
+            end = start + timedelta(days=length)
+            expected = tuple(calendar.working_days_in_range(start, end))
+            if not expected:
+                continue
+            for label, render in RANGE_FORMATS:
+                if label == 'd to d mon' and start.month != end.month:
+                    continue
+                if 'yyyy' not in label and end.year != reference.year:
+                    continue
+                for wrapper in RANGE_WRAPPERS:
+                    cases.append(Case(wrapper.format(render(start, end)), expected, f"range/{label}"))
+
+    # Shapes outside the common grammar - the fallback paths
+    for n in (2, 3, 5, 10):
+        for phrase in (f"in {n} days", f"{n} days from now"):
+            for wrapper in RELATIVE_WRAPPERS:
+                cases.append(Case(wrapper.format(phrase), (reference + timedelta(days=n),), "fuzzy/in n days"))
+    for phrase in ('tmrw', 'tommorow', 'tomorow'):
+        for wrapper in RELATIVE_WRAPPERS:
+            cases.append(Case(wrapper.format(phrase), (reference + timedelta(days=1),), "fuzzy/misspelled"))
+    for offset in range(1, 31, 3):
+        day = reference + timedelta(days=offset)
+        for phrase in (day.strftime('%d.%m.%Y'), f"{day.strftime('%b').upper()} {day.day}"):
+            for wrapper in SINGLE_WRAPPERS:
+                cases.append(Case(wrapper.format(phrase), (day,), "fuzzy/format"))
+        end = day + timedelta(days=2)
+        expected = tuple(calendar.working_days_in_range(day, end))
+        if expected and day.month == end.month:
+            for phrase in (f"{day.strftime('%b')} {day.day}-{end.day}",
+                           f"{day.day}{_ordinal(day.day)}-{end.day}{_ordinal(end.day)} {day.strftime('%B')}"):
+                for wrapper in RANGE_WRAPPERS:
+                    cases.append(Case(wrapper.format(phrase), expected, "fuzzy/range"))
+    for first, last in ((0, 2), (1, 4), (3, 0)):
+        start, end = _upcoming(reference, first), _upcoming(reference, last)
+        if end < start:
+            end += timedelta(days=7)
+        expected = tuple(calendar.working_days_in_range(start, end))
+        for phrase in (f"{WEEKDAY_NAMES[first]} to {WEEKDAY_NAMES[last]}",
+                       f"from {WEEKDAY_NAMES[first]} till {WEEKDAY_NAMES[last]}"):
+            for wrapper in RANGE_WRAPPERS:
+                cases.append(Case(wrapper.format(phrase), expected, "weekday/range"))
+
+    # No date at all - an extractor should find nothing
+    for text in ("what is my leave balance", "may i take 3 days", "I need 2 days off", "hello",
+                 "show my application status", "apply EL", "CL please", "what are the leave policies"):
+        cases.append(Case(text, (), "negative"))
+    # Words that start like a weekday or month name - 'wedding' is not Wednesday
+    for text in PREFIX_WORDS:
+        cases.append(Case(text, (), "prefix/no date"))
+        for phrase, expected in (("tomorrow", (reference + timedelta(days=1),)),
+                                 ((reference + timedelta(days=9)).strftime('%d-%m-%Y'),
+                                  (reference + timedelta(days=9),))):
+            cases.append(Case(f"CL {phrase} for {text}", expected, "prefix/with date"))
+
+    return cases
+
+
+def _temp_database():
+    from database import LeaveDatabase
+    return LeaveDatabase(os.path.join(tempfile.mkdtemp(prefix='bench-dates-'), 'Leave_Data.xlsx'))
+
+
+def enhanced_extractor(db):
+    from chatbot_enhanced import EnhancedLeaveChatbot
+    bot = EnhancedLeaveChatbot(db)
+    return lambda message, reference: bot._extract_dates_advanced(message, reference)
+
+
+def rag_extractor(db):
+    from rag_system import LeaveAgent
+    agent = LeaveAgent(db, None)
+    # _parse_leave_request lower-cases the message before extracting
+    return lambda message, reference: agent._extract_dates_from_message(message.lower(), reference)
+
+
+def simple_extractor(db):
+    from app import SimpleLeaveAgent
+    agent = SimpleLeaveAgent(db)
+    return lambda message, reference: agent._extract_dates_improved(message, reference)
+
+
+def engine_extractor(db):
+    return date_engine.leave_dates
+
+
+def baseline_extractor(extract):
+    return lambda db: extract
+
+
+EXTRACTORS = {
+    'date_engine': engine_extractor,     # date_engine.leave_dates, no agent around it
+    'enhanced': enhanced_extractor,      # EnhancedLeaveChatbot._extract_dates_advanced
+    'rag_agent': rag_extractor,          # LeaveAgent._extract_dates_from_message
+    'simple_agent': simple_extractor,    # SimpleLeaveAgent._extract_dates_improved
+    # The agents' extractors from before date_engine, frozen in bench_baseline
+    'old_enhanced': baseline_extractor(bench_baseline.enhanced_dates),
+    'old_rag_agent': baseline_extractor(lambda message, reference: bench_baseline.rag_agent_dates(message.lower(), reference)),
+    'old_simple': baseline_extractor(bench_baseline.simple_agent_dates),
+}
+
+
+def _as_dates(result):
+    """Extractor output as a sorted tuple of dates"""
+    days = set()
+    for value in result or []:
+        days.add(value.date() if hasattr(value, 'date') and callable(value.date) else value)
+    return tuple(sorted(days))
+
+
+def score(extract, corpus, reference):
+    """Accuracy overall and per category, plus microseconds per call
+
+    The us_per_call_* figures are cold: the date caches are emptied before
+    every call, so no extractor is timed on a cache hit. The cached figure
+    is a second pass over the same phrasings and is reported on its own -
+    what it measures is lru_cache hits on identical text, not parsing.
+    """
+    timings = []
+    correct = Counter()
+    totals = Counter()
+    shape_correct = Counter()
+    shape_totals = Counter()
+    failures = Counter()
+    failure_samples = []
+
+    for case in corpus:
+        date_engine.clear_cache()  # also clears the date_service cache the old extractors use
+        started = time.perf_counter()
+        try:
+            result = extract(case.text, reference)
+        except Exception as e:
+            result = e
+        timings.append(time.perf_counter() - started)
+
+        group = case.category.split('/')[0]
+        totals[group] += 1
+        shape_totals[case.category] += 1
+        got = None if isinstance(result, Exception) else _as_dates(result)
+        if got == case.expected:
+            correct[group] += 1
+            shape_correct[case.category] += 1
+        elif failures[case.category] < 3:
+            # A few samples from every category that failed, not just the first one
+            failures[case.category] += 1
+            failure_samples.append({'category': case.category,
+                'text': case.text,
+                'expected': [d.isoformat() for d in case.expected],
+                'got': repr(result) if got is None else [d.isoformat() for d in got],
+            })
+
+    # Same phrasings again once every one is cached - only identical text repeated
+    warm_seconds = 0.0
+    for timed in (False, True):
+        started = time.perf_counter()
+        for case in corpus:
+            try:
+                extract(case.text, reference)
+            except Exception:
+                pass
+        if timed:
+            warm_seconds = time.perf_counter() - started
+
+    micros = np.asarray(timings) * 1e6
+    return {
+        'cases': len(corpus),
+        'accuracy': round(sum(correct.values()) / len(corpus), 4) if corpus else 0.0,
+        'by_category': {group: round(correct[group] / totals[group], 4) for group in sorted(totals)},
+        'by_shape': {shape: round(shape_correct[shape] / shape_totals[shape], 4) for shape in sorted(shape_totals)},
+        'us_per_call_mean': round(float(micros.mean()), 1) if len(micros) else 0.0,
+        'us_per_call_p50': round(float(np.percentile(micros, 50)), 1) if len(micros) else 0.0,
+        'us_per_call_p95': round(float(np.percentile(micros, 95)), 1) if len(micros) else 0.0,
+        'cached_us_per_call': round(warm_seconds * 1e6 / len(corpus), 1) if corpus else 0.0,
+        'failure_samples': failure_samples,
+    }
+
+
+def run(names=None, limit=None, verbose=False, reference=REFERENCE):
+    """Score the named extractors on the corpus for a reference day"""
+    corpus = build_corpus(reference)
+    if limit:
+        corpus = corpus[::max(len(corpus) // limit, 1)][:limit]
+
+    results = {}
+    output = contextlib.nullcontext() if verbose else contextlib.redirect_stdout(io.StringIO())
+    with output:
+        db = _temp_database()
+        for name in names or EXTRACTORS:
+            results[name] = score(EXTRACTORS[name](db), corpus, reference)
+    return {'reference': reference.isoformat(), 'cases': len(corpus), 'extractors': results}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Score the chat date extractors on a labeled corpus")
+    parser.add_argument('--extractors', nargs='+', choices=sorted(EXTRACTORS), help="default: all")
+    parser.add_argument('--limit', type=int, help="score an evenly spread subset of the corpus")
+    parser.add_argument('--dump', help="write the labeled corpus as JSON lines and exit")
+    parser.add_argument('--report', help="write the scores as JSON")
+    parser.add_argument('--reference', type=date.fromisoformat, default=REFERENCE,
+                        help=f"day the phrasings are relative to (default {REFERENCE})")
+    parser.add_argument('--verbose', action='store_true', help="keep the extractors' own log output")
+    args = parser.parse_args(argv)
+
+    if args.dump:
+        with open(args.dump, 'w', encoding='utf-8') as f:
+            for case in build_corpus(args.reference):
+                f.write(json.dumps({'text': case.text, 'category': case.category,
+                                    'expected': [d.isoformat() for d in case.expected]}) + "\n")
+        print(f"💾 Corpus written to {args.dump}")
+        return None
+
+    report = run(args.extractors, args.limit, args.verbose, args.reference)
+    print(f"📅 {report['cases']} phrasings relative to {report['reference']}")
+    print("Cold - date caches emptied before every call:")
+    for name, result in report['extractors'].items():
+        categories = ", ".join(f"{group} {value:.0%}" for group, value in result['by_category'].items())
+        print(f"  {name:13} accuracy {result['accuracy']:.1%}  "
+              f"{result['us_per_call_mean']:.0f}µs/call (p50 {result['us_per_call_p50']:.0f}µs, "
+              f"p95 {result['us_per_call_p95']:.0f}µs)  [{categories}]")
+    print("Cached - the same phrasings again; a speedup here comes from cache hits on identical text only:")
+    for name, result in report['extractors'].items():
+        print(f"  {name:13} {result['cached_us_per_call']:.0f}µs/call")
+
+    if args.report:
+        with open(args.report, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"💾 Report written to {args.report}")
+    return report
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,223 @@
+import atexit
+import queue
+import threading
+import time
+from datetime import datetime
+from config import Config
+from records import ChatMessage
+
+
+class SyncChatWriter:
+    """Writes every chat turn before the reply is returned"""
+
+    def __init__(self, database):
+        self.db = database
+
+    def save_turn(self, user_id, user_message, reply):
+        """Persist a user message and its reply - reply=None saves the user message alone"""
+        return self.db.save_chat_turn(user_id, user_message, reply)
+
+    def get_chat_history(self, user_id, limit=50):
+        return self.db.get_chat_history(user_id, limit)
+
+    def clear_chat_history(self, user_id):
+        return self.db.clear_chat_history(user_id)
+
+    def flush(self, timeout=None):
+        """Nothing is ever pending"""
+        return True
+
+    def close(self, timeout=None):
+        pass
+
+    @property
+    def closed(self):
+        return False
+
+    def stats(self):
+        return {'mode': 'sync', 'pending': 0, 'batches': 0, 'sync_fallbacks': 0, 'failed_writes': 0}
+
+
+class ChatWriter(SyncChatWriter):
+    """Queues chat turns and writes them to ChatHistory in batches on a background thread"""
+
+    def __init__(self, database, max_pending=None, batch_size=None, retry_delay=None):
+        super().__init__(database)
+        self.batch_size = batch_size or Config.CHAT_WRITE_BATCH_SIZE
+        self.retry_delay = retry_delay or Config.CHAT_WRITE_RETRY_SECONDS
+        self._queue = queue.Queue(maxsize=max_pending or Config.CHAT_WRITE_QUEUE_SIZE)
+        self._lock = threading.Lock()
+        self._written = threading.Condition(self._lock)
+        # Held across each batch write and each history read - a read sees a turn stored or pending, never both
+        self._io_lock = threading.Lock()
+        self._pending = {}                # user_id -> ChatMessages queued but not yet written
+        self._unwritten = 0
+        self._closed = False
+        self.batches = 0
+        self.sync_fallbacks = 0
+        self.failed_writes = 0
+
+        self._thread = threading.Thread(target=self._run, name='chat-writer', daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def save_turn(self, user_id, user_message, reply):
+        """Queue a turn and return at once - writes inline when the queue is full or closed"""
+        timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        turn = (user_id, user_message, reply, timestamp)
+
+        with self._lock:
+            if not self._closed:
+                try:
+                    self._queue.put_nowait(turn)
+                except queue.Full:
+                    pass
+                else:
+                    rows = self._pending.setdefault(str(user_id), [])
+                    rows.append(ChatMessage(int(user_id), 'user', user_message, timestamp))
+                    if reply is not None:
+                        rows.append(ChatMessage(int(user_id), 'assistant', reply, timestamp))
+                    self._unwritten += 1
+                    return True
+
+            self.sync_fallbacks += 1
+        return self.db.save_chat_turns([turn])
+
+    def _run(self):
+        """Drain the queue - everything already waiting goes into the same write"""
+        while True:
+            turn = self._queue.get()
+            if turn is None:
+                return
+            batch = [turn]
+            stop = False
+            while len(batch) < self.batch_size:
+                try:
+                    turn = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if turn is None:
+                    stop = True
+                    break
+                batch.append(turn)
+
+            self._write(batch)
+            if stop:
+                return
+
+    def _write(self, batch):
+        """Write a batch, retrying with backoff - its turns stay pending (and in the history) until stored
+
+        After close() the retries are bounded so shutdown cannot hang on a
+        broken workbook; turns still unwritten then are reported, and
+        flush() keeps returning False.
+        """
+        delay = self.retry_delay
+        attempts = 0
+        while True:
+            with self._io_lock:
+                if self.db.save_chat_turns(batch):
+                    self._forget(batch)
+                    return
+            attempts += 1
+            with self._lock:
+                self.failed_writes += 1
+                give_up = self._closed and attempts >= Config.CHAT_WRITE_SHUTDOWN_RETRIES
+            if give_up:
+                print(f"❌ Chat writer could not save {len(batch)} turns before shutdown")
+                return
+            print(f"⚠️ Chat writer failed to save {len(batch)} turns - retrying in {delay:.1f}s")
+            time.sleep(delay)
+            delay = min(delay * 2, Config.CHAT_WRITE_RETRY_MAX_SECONDS)
+
+    def _forget(self, batch):
+        """Drop a stored batch from the pending turns"""
+        with self._lock:
+            for user_id, _, reply, _ in batch:
+                key = str(user_id)
+                rows = self._pending.get(key, [])
+                del rows[:1 if reply is None else 2]
+                if not rows:
+                    self._pending.pop(key, None)
+            self._unwritten -= len(batch)
+            self.batches += 1
+            self._written.notify_all()
+
+    def get_chat_history(self, user_id, limit=50):
+        """Stored history followed by turns still waiting in the queue"""
+        with self._io_lock:
+            with self._lock:
+                pending = list(self._pending.get(str(user_id), ()))
+            records = self.db.get_chat_history(user_id, limit)
+        if not pending:
+            return records
+        records = list(records) + pending
+        return records[-limit:] if limit else records
+
+    def clear_chat_history(self, user_id):
+        """Flush first so no queued turn lands after the clear - False if the queue cannot be written"""
+        if not self.flush(Config.CHAT_WRITE_RETRY_MAX_SECONDS):
+            print(f"❌ Chat history for {user_id} not cleared - queued turns are still unwritten")
+            return False
+        return self.db.clear_chat_history(user_id)
+
+    def flush(self, timeout=None):
+        """Wait until every queued turn is written - False on timeout"""
+        with self._lock:
+            return self._written.wait_for(lambda: self._unwritten == 0, timeout)
+
+    def close(self, timeout=None):
+        """Stop accepting turns, write what is queued and stop the thread"""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+        self._queue.put(None)
+        self._thread.join(timeout)
+        atexit.unregister(self.close)
+
+    @property
+    def closed(self):
+        with self._lock:
+            return self._closed
+
+    def stats(self):
+        with self._lock:
+            return {
+                'mode': 'async',
+                'pending': self._unwritten,
+                'batches': self.batches,
+                'sync_fallbacks': self.sync_fallbacks,
+                'failed_writes': self.failed_writes,
+            }
+
+
+_writers_lock = threading.Lock()
+
+
+def get_chat_writer(database, mode=None):
+    """Shared writer for a database - Config.CHAT_PERSISTENCE picks 'async' or 'sync'
+
+    Writers are kept on the database object itself, so they share its
+    lifetime; close_chat_writers() stops an async writer's thread.
+    """
+    mode = mode or Config.CHAT_PERSISTENCE
+    if mode not in ('async', 'sync'):
+        raise ValueError(f"Unknown chat persistence mode: {mode}")
+    with _writers_lock:
+        writers = getattr(database, '_chat_writers', None)
+        if writers is None:
+            writers = database._chat_writers = {}
+        writer = writers.get(mode)
+        if writer is None or writer.closed:
+            writer = writers[mode] = ChatWriter(database) if mode == 'async' else SyncChatWriter(database)
+        return writer
+
+
+def close_chat_writers(database, timeout=None):
+    """Write everything a database's writers have queued, stop them and detach them"""
+    with _writers_lock:
+        writers = getattr(database, '_chat_writers', None) or {}
+        database._chat_writers = {}
+    for writer in writers.values():
+        writer.close(timeout)
@@ -1,87 +1,169 @@
-import re
-import pandas as pd
-from datetime import datetime, timedelta
-from dateparser import parse as date_parse
+from datetime import datetime
 import os
+import queue
+import threading
+from intent_router import route_message
+import date_engine
+from conversation_store import create_conversation_store
+from chat_writer import get_chat_writer
+from turn_context import TurnContext, Prefetcher
+from message_guard import prepare, message_budget
+
+
+class BackgroundSteps:
+    """Runs a progress generator to completion on its own thread, whether or not the progress is read"""
+
+    def __init__(self, steps):
+        self.lines = []
+        self.reply = None
+        self.error = None
+        self._updates = queue.Queue()
+        self._thread = threading.Thread(target=self._run, args=(steps,), name='leave-application', daemon=True)
+        self._thread.start()
+
+    def _run(self, steps):
+        try:
+            while True:
+                try:
+                    line = next(steps)
+                except StopIteration as done:
+                    self.reply = done.value
+                    return
+                self._updates.put(line)
+        except Exception as e:
+            self.error = e
+        finally:
+            self._updates.put(None)
+
+    def progress(self):
+        """Yield the progress lines so far after each step - returns the final reply"""
+        while True:
+            line = self._updates.get()
+            if line is None:
+                break
+            self.lines.append(line)
+            yield "\n\n".join(self.lines)
+        self.join()
+        if self.error is not None:
+            raise self.error
+        return self.reply
+
+    def join(self):
+        """Wait until every step has run"""
+        self._thread.join()
+
+    def outcome(self):
+        """Final reply once every step has run - the progress read so far, or None, if the steps failed"""
+        self.join()
+        return self.reply or "\n\n".join(self.lines) or None
+
 
 class EnhancedLeaveChatbot:
-    def __init__(self, database):
+    def __init__(self, database, conversations=None, persistence=None):
         self.db = database
-        self.conversation_context = {}
+        # Injectable so a load test keeps its state out of the shared stores
+        self.conversations = conversations if conversations is not None else create_conversation_store()
+        self.chat_log = get_chat_writer(database, persistence)
+        self.prefetcher = Prefetcher(database)
+    
+    def close(self):
+        """Write queued chat turns and stop the background threads"""
+        self.chat_log.close()
+        self.prefetcher.close()
         
     def process_message(self, user_id, message):
         """Process user message with clear step-by-step conversation flow"""
-        print(f"🔍 CHAT PROCESSING: user_id={user_id}, message='{message}'")
+        response = None
+        for response in self.process_message_stream(user_id, message):
+            pass
+        return response
+
+    def process_message_stream(self, user_id, message):
+        """Yield the reply as it grows - progress for long applications, the final reply last"""
+        # Bounded and normalized before any pattern runs over it
+        user_message = prepare(message).text
+        print(f"🔍 CHAT PROCESSING: user_id={user_id}, message='{user_message}'")
         
         try:
             if not user_id:
-                return "🔐 Please login first to use the chatbot."
+                yield "🔐 Please login first to use the chatbot."
+                return
                 
-            if not message or str(message).strip() == "":
-                return "Please provide a valid message."
-            
-            # Initialize or get user context
-            if user_id not in self.conversation_context:
-                self.conversation_context[user_id] = {
-                    'current_flow': None,  # 'leave_application'
-                    'current_step': 0,     # 0=idle, 1=asked_type, 2=asked_dates
-                    'pending_leave_type': None,
-                    'pending_dates': None,
-                    'conversation_history': []
-                }
+            if not user_message:
+                yield "Please provide a valid message."
+                return
             
-            context = self.conversation_context[user_id]
-            user_message = str(message).strip()
-            
-            # Save user message
-            self.db.save_chat_message(user_id, 'user', user_message)
+            # Get user context - idle users have no stored state
+            context = self.conversations.get(user_id)
+            # User data read during this turn is loaded once and shared by every step -
+            # at the date step it was already loaded while the user was typing
+            warm = self.prefetcher.take(user_id) if context.current_step == 2 else None
+            turn = TurnContext(self.db, user_id, self.chat_log, preloaded=warm)
             
             # Generate response based on current flow state
-            response = self._handle_conversation_flow(user_id, user_message, context)
-            
-            # Save bot response
-            self.db.save_chat_message(user_id, 'assistant', response)
+            response = None
+            application = None
+            try:
+                # Parsing shares one time budget; the application below only writes
+                with message_budget():
+                    response = self._handle_conversation_flow(turn, user_message, context)
+                if not isinstance(response, str):
+                    # A multi-date application runs on its own thread - the stream only shows its progress
+                    application = BackgroundSteps(response)
+                    response = yield from application.progress()
+                if context.current_step == 2:
+                    # Waiting for dates - warm what _process_leave_application will read
+                    self.prefetcher.prefetch(user_id)
+            finally:
+                # Also runs when the client disconnects mid-stream and the generator is closed -
+                # every date is still filed, then the flow state and the turn are saved
+                if not isinstance(response, str):
+                    response = application.outcome() if application is not None else None
+                self.conversations.put(user_id, context)
+                # The reply does not wait for the write
+                self.chat_log.save_turn(user_id, user_message, response)
             
-            return response
+            yield response
             
         except Exception as e:
             print(f"❌ Error in process_message: {e}")
             import traceback
             traceback.print_exc()
-            return "I apologize, but I'm having trouble processing your request right now. Please try again."
+            yield "I apologize, but I'm having trouble processing your request right now. Please try again."
 
-    def _handle_conversation_flow(self, user_id, message, context):
+    def _handle_conversation_flow(self, turn, message, context):
         """Handle the step-by-step conversation flow"""
         message_lower = message.lower()
         
-        print(f"🎯 Current flow: {context['current_flow']}, step: {context['current_step']}")
+        print(f"🎯 Current flow: {context.current_flow}, step: {context.current_step}")
         
         # Step 0: No active flow - detect if user wants to apply leave
-        if context['current_flow'] is None:
-            if any(word in message_lower for word in ['apply', 'want', 'need', 'request', 'would like']) and 'leave' in message_lower:
+        if context.current_flow is None:
+            route = route_message(message_lower)
+            if route.has('leave') and route.first('apply', 'balance', 'status', 'policy') == 'apply':
                 return self._start_leave_application(message, context)
             else:
-                return self._handle_other_requests(user_id, message)
+                return self._handle_other_requests(turn, message)
         
         # Step 1: We've asked for leave type, waiting for response
-        elif context['current_flow'] == 'leave_application' and context['current_step'] == 1:
+        elif context.current_flow == 'leave_application' and context.current_step == 1:
             leave_type = self._extract_leave_type(message_lower)
             if leave_type:
-                context['pending_leave_type'] = leave_type
-                context['current_step'] = 2  # Move to date step
+                context.pending_leave_type = leave_type
+                context.current_step = 2  # Move to date step
                 return self._ask_for_dates(leave_type)
             else:
                 return self._ask_leave_type_again()
         
         # Step 2: We've asked for dates, waiting for response
-        elif context['current_flow'] == 'leave_application' and context['current_step'] == 2:
+        elif context.current_flow == 'leave_application' and context.current_step == 2:
             dates = self._extract_dates_advanced(message)
             if dates:
-                context['pending_dates'] = dates
-                # Process the complete application
-                return self._process_leave_application(user_id, context)
+                context.pending_dates = dates
+                # Process the complete application - streamed, one line per date
+                return self._process_leave_application(turn, context)
             else:
-                return self._ask_for_dates_again(context['pending_leave_type'])
+                return self._ask_for_dates_again(context.pending_leave_type)
         
         else:
             # Reset if something unexpected happens
@@ -96,23 +178,23 @@ class EnhancedLeaveChatbot:
         leave_type = self._extract_leave_type(message.lower())
         dates = self._extract_dates_advanced(message)
         
-        context['current_flow'] = 'leave_application'
+        context.current_flow = 'leave_application'
         
         if leave_type and dates:
             # User provided both type and dates in one message
-            context['pending_leave_type'] = leave_type
-            context['pending_dates'] = dates
-            context['current_step'] = 2
+            context.pending_leave_type = leave_type
+            context.pending_dates = dates
+            context.current_step = 2
             # We'll process this in the main flow
             return "I see you want to apply for leave. Let me process your request..."
         elif leave_type:
             # User provided only type
-            context['pending_leave_type'] = leave_type
-            context['current_step'] = 2
+            context.pending_leave_type = leave_type
+            context.current_step = 2
             return self._ask_for_dates(leave_type)
         else:
             # User didn't specify type
-            context['current_step'] = 1
+            context.current_step = 1
             return self._ask_leave_type()
 
     def _ask_leave_type(self):
@@ -160,12 +242,13 @@ Please specify when:
 
 **Today:** {datetime.now().strftime('%d-%b-%Y')}"""
 
-    def _process_leave_application(self, user_id, context):
-        """Process the complete leave application and reset flow"""
-        leave_type = context['pending_leave_type']
-        dates = context['pending_dates']
+    def _process_leave_application(self, turn, context):
+        """Process the complete leave application and reset flow - yields a progress line per date, returns the summary"""
+        leave_type = context.pending_leave_type
+        dates = context.pending_dates
         
         print(f"✅ Processing {leave_type} application for dates: {dates}")
+        yield f"⏳ Processing your {leave_type} application for {len(dates)} day{'s' if len(dates) > 1 else ''}..."
         
         # Reset flow first
         self._reset_flow(context)
@@ -195,12 +278,12 @@ Please specify when:
             return "\n".join(validation_errors) + "\n\nPlease start over with 'Apply for leave'."
         
         # Check balance
-        balance = self.db.get_user_balance(user_id)
+        balance = turn.balance
         if not balance:
             return "❌ Unable to check your leave balance. Please try 'Apply for leave' again."
             
-        if balance[leave_type] < len(dates):
-            return f"❌ Insufficient {leave_type} balance. Available: {balance[leave_type]} days, Required: {len(dates)} days\n\nPlease start over with 'Apply for leave'."
+        if balance.days(leave_type) < len(dates):
+            return f"❌ Insufficient {leave_type} balance. Available: {balance.days(leave_type)} days, Required: {len(dates)} days\n\nPlease start over with 'Apply for leave'."
         
         # Submit applications
         successful_applications = 0
@@ -208,12 +291,13 @@ Please specify when:
             leave_date_str = leave_date.strftime('%Y-%m-%d 00:00:00')
             
             # Check for date conflicts
-            if self.db.check_date_overlap(user_id, leave_date_str):
+            if turn.has_leave_on(leave_date):
                 return f"❌ Date conflict: You already have leave on {leave_date.strftime('%d-%b-%Y')}\n\nPlease start over with 'Apply for leave'."
+            yield f"🔍 {leave_date.strftime('%d-%b-%Y')} is free"
             
             # Add leave request
             success = self.db.add_leave_request(
-                user_id=user_id,
+                user_id=turn.user_id,
                 leave_date=leave_date_str,
                 leave_type=leave_type,
                 reason="Personal",
@@ -221,7 +305,9 @@ Please specify when:
             )
             
             if success:
+                turn.record_leave(leave_date)
                 successful_applications += 1
+                yield f"📝 Submitted {leave_date.strftime('%d-%b-%Y')} ({successful_applications}/{len(dates)})"
         
         if successful_applications > 0:
             date_range = dates[0].strftime('%d-%b-%Y')
@@ -234,147 +320,71 @@ Please specify when:
 • **Type:** {leave_type}
 • **Date:** {date_range} ({successful_applications} day{'s' if successful_applications > 1 else ''})
 • **Status:** ⏳ Pending Approval
-• **Balance After:** {balance[leave_type] - successful_applications} {leave_type} days
+• **Balance After:** {balance.days(leave_type) - successful_applications} {leave_type} days
 
 Your manager will review your request."""
         
         return "❌ Failed to submit application. Please try 'Apply for leave' again."
 
-    def _handle_other_requests(self, user_id, message):
+    def _handle_other_requests(self, turn, message):
         """Handle non-leave-application requests"""
-        message_lower = message.lower()
+        intent = route_message(message).first('balance', 'status', 'policy', 'greeting', 'help')
         
-        if any(word in message_lower for word in ['balance', 'remaining']):
-            return self._get_balance_response(user_id)
-        elif any(word in message_lower for word in ['status', 'pending']):
-            return self._get_status_response(user_id)
-        elif any(word in message_lower for word in ['policy', 'rule']):
+        if intent == 'balance':
+            return self._get_balance_response(turn)
+        elif intent == 'status':
+            return self._get_status_response(turn)
+        elif intent == 'policy':
             return self._get_policy_response()
-        elif any(word in message_lower for word in ['hello', 'hi', 'hey']):
-            return self._get_greeting_response(user_id)
-        elif any(word in message_lower for word in ['help']):
+        elif intent == 'greeting':
+            return self._get_greeting_response(turn)
+        elif intent == 'help':
             return self._get_help_response()
         else:
             return self._handle_general_query(message)
 
     def _reset_flow(self, context):
         """Reset the conversation flow"""
-        context['current_flow'] = None
-        context['current_step'] = 0
-        context['pending_leave_type'] = None
-        context['pending_dates'] = None
+        context.reset()
 
     def _extract_leave_type(self, message):
         """Extract leave type from message"""
-        if any(word in message for word in ['el', 'earned']):
-            return 'EL'
-        elif any(word in message for word in ['sl', 'sick']):
-            return 'SL'
-        elif any(word in message for word in ['cl', 'casual']):
-            return 'CL'
-        return None
-
-    def _extract_dates_advanced(self, message):
+        return route_message(message).leave_type
+
+    def _extract_dates_advanced(self, message, today=None):
         """Extract dates from natural language"""
-        dates = []
-        today = datetime.now().date()
+        today = today or datetime.now().date()
         
         print(f"🔍 Extracting dates from: '{message}'")
         
-        # Handle date ranges with "to" or "until"
-        range_pattern = r'(\d{1,2}[-\/]?\w+[-\/]?\d{0,4})\s*(?:to|until|til|-)\s*(\d{1,2}[-\/]?\w+[-\/]?\d{0,4})'
-        range_match = re.search(range_pattern, message, re.IGNORECASE)
-        
-        if range_match:
-            start_str, end_str = range_match.groups()
-            start_date = self._parse_single_date(start_str)
-            end_date = self._parse_single_date(end_str)
-            
-            if start_date and end_date and start_date <= end_date:
-                current = start_date
-                while current <= end_date:
-                    if not self.db.is_weekend(current):
-                        dates.append(current)
-                    current += timedelta(days=1)
-                print(f"✅ Found date range: {start_date} to {end_date} -> {len(dates)} dates")
-                return dates
-        
-        # Handle single dates
-        single_date = self._parse_single_date(message)
-        if single_date:
-            dates.append(single_date)
-            print(f"✅ Found single date: {single_date}")
-        
+        dates = date_engine.leave_dates(message, today)
+        if dates:
+            print(f"✅ Found {len(dates)} date{'s' if len(dates) > 1 else ''}: {dates[0]} to {dates[-1]}")
         return dates
 
-    def _parse_single_date(self, date_str):
-        """Parse a single date from various formats"""
-        today = datetime.now().date()
-        
-        # Natural language dates
-        natural_dates = {
-            'today': today,
-            'tomorrow': today + timedelta(days=1),
-            'yesterday': today - timedelta(days=1),
-        }
-        
-        for key, date_val in natural_dates.items():
-            if key in date_str.lower():
-                return date_val
-        
-        # Try different date formats
-        date_formats = [
-            '%d-%b-%Y', '%d-%m-%Y', '%d/%m/%Y', '%d %b %Y',
-            '%d-%b', '%d-%m', '%d/%m', '%b %d', '%d %b'
-        ]
-        
-        for fmt in date_formats:
-            try:
-                # Clean the date string
-                clean_str = re.sub(r'[^\w\s-]', '', date_str.strip())
-                parsed_date = datetime.strptime(clean_str, fmt)
-                
-                # If year not specified, use current year
-                if parsed_date.year == 1900:
-                    parsed_date = parsed_date.replace(year=today.year)
-                
-                return parsed_date.date()
-            except ValueError:
-                continue
-        
-        # Try dateparser as fallback
-        try:
-            parsed = date_parse(date_str)
-            if parsed:
-                return parsed.date()
-        except:
-            pass
-        
-        return None
-
-    def _get_balance_response(self, user_id):
+    def _get_balance_response(self, turn):
         """Get balance response"""
-        balance = self.db.get_user_balance(user_id)
+        balance = turn.balance
         if balance:
             return f"""📊 **Your Leave Balance:**
 
-• EL: {balance['EL']} days (min 3 days)
-• SL: {balance['SL']} days (today/past dates)  
-• CL: {balance['CL']} days (max 2 days)
-• Total: {balance['TL']} days
+• EL: {balance.el} days (min 3 days)
+• SL: {balance.sl} days (today/past dates)  
+• CL: {balance.cl} days (max 2 days)
+• Total: {balance.tl} days
 
 **Today:** {datetime.now().strftime('%d-%b-%Y')}"""
         return "❌ Unable to fetch your leave balance."
 
-    def _get_status_response(self, user_id):
+    def _get_status_response(self, turn):
         """Get status response"""
-        requests = self.db.get_user_leave_requests(user_id)
+        requests = turn.recent_requests(limit=5)
         if requests:
             response = "📋 **Your Applications:**\n\n"
-            for req in reversed(requests[-5:]):
-                status_icon = "✅" if req['Status'] == 'Approved' else "❌" if req['Status'] == 'Rejected' else "⏳"
-                date_str = req['Leave_Date'].split()[0] if ' ' in str(req['Leave_Date']) else str(req['Leave_Date'])
-                response += f"{status_icon} {date_str} - {req['LeaveType']} - {req['Status']}\n"
+            for req in requests:
+                status_icon = "✅" if req.status == 'Approved' else "❌" if req.status == 'Rejected' else "⏳"
+                date_str = req.leave_day
+                response += f"{status_icon} {date_str} - {req.leave_type} - {req.status}\n"
             return response
         return "📋 No applications found."
 
@@ -388,9 +398,9 @@ Your manager will review your request."""
 
 **Today:** {datetime.now().strftime('%d-%b-%Y')}"""
 
-    def _get_greeting_response(self, user_id):
+    def _get_greeting_response(self, turn):
         """Get greeting response"""
-        balance = self.db.get_user_balance(user_id)
+        balance = turn.balance
         if balance:
             return f"""👋 **Hello! I'm your AI Leave Assistant**
 
@@ -434,15 +444,15 @@ I'll walk you through the process step by step!"""
     def get_chat_history(self, user_id):
         """Get chat history in Gradio format"""
         try:
-            chat_records = self.db.get_chat_history(user_id)
+            chat_records = self.chat_log.get_chat_history(user_id)
             gradio_history = []
             current_user_msg = None
             
             for record in chat_records:
-                if record['Role'] == 'user':
-                    current_user_msg = record['Message']
-                elif record['Role'] == 'assistant' and current_user_msg is not None:
-                    gradio_history.append([current_user_msg, record['Message']])
+                if record.role == 'user':
+                    current_user_msg = record.message
+                elif record.role == 'assistant' and current_user_msg is not None:
+                    gradio_history.append([current_user_msg, record.message])
                     current_user_msg = None
             
             return gradio_history
@@ -453,12 +463,5 @@ I'll walk you through the process step by step!"""
 
     def clear_conversation_context(self, user_id):
         """Clear conversation context"""
-        if user_id in self.conversation_context:
-            self.conversation_context[user_id] = {
-                'current_flow': None,
-                'current_step': 0,
-                'pending_leave_type': None,
-                'pending_dates': None,
-                'conversation_history': []
-            }
-        self.db.clear_chat_history(user_id)
\ No newline at end of file
+        self.conversations.discard(user_id)
+        self.chat_log.clear_chat_history(user_id)
\ No newline at end of file
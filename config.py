@@ -10,6 +10,93 @@ class Config:
     BASE_DIR = os.path.dirname(os.path.abspath(__file__))
     EXCEL_FILE = os.path.join(BASE_DIR, "Leave_Data.xlsx")
     PDF_FILE = os.path.join(BASE_DIR, "rules.pdf")
+    # Parsed PDF text and rules, keyed by the PDF's SHA-256 - build with `python policy_cache.py build`
+    POLICY_CACHE_FILE = os.path.join(BASE_DIR, "policy_cache.json")
+    # Policy questions are answered from the PDF's passages (BM25 over chunks of about this many words)
+    POLICY_PASSAGE_WORDS = 60
+    POLICY_SEARCH_TOP_K = 3
+    
+    # Sharded storage - set SHARD_BY to "Admin ID" (or a "Department" column) to split the workbook
+    SHARD_BY = None
+    SHARD_DIR = os.path.join(BASE_DIR, "shards")
+    
+    # Paging for employee and admin views
+    EMPLOYEE_PAGE_SIZE = 10
+    ADMIN_PAGE_SIZE = 20
+    
+    # Login sessions - idle sessions expire after the TTL, oldest evicted beyond the cap
+    SESSION_TTL_SECONDS = 8 * 60 * 60
+    SESSION_MAX_ENTRIES = 1000
+    
+    # Passwords - employees without a PasswordHash in the Available sheet, and admins without
+    # one in the Admins sheet, use the default
+    DEFAULT_PASSWORD = "leave"
+    PASSWORD_HASH_ITERATIONS = 100_000
+    # A login with an unknown ID re-reads the directory at most this often; the ID is then
+    # remembered as unknown for as long
+    DIRECTORY_RELOAD_INTERVAL_SECONDS = 5
+    DIRECTORY_NEGATIVE_CACHE_SIZE = 10000
+    
+    # Rate limits per user - (burst, requests per minute)
+    RATE_LIMITS = {
+        "chat": (5, 20),
+        "login": (5, 10),
+        "approval": (10, 60),
+    }
+    # Backpressure - writers allowed in flight before new requests get a "busy" reply
+    MAX_PENDING_WRITES = 8
+    WRITE_WAIT_SECONDS = 0.5
+    
+    # Parsed date expressions kept in the LRU cache
+    DATE_CACHE_SIZE = 4096
+    
+    # Chat input bounds - longer messages are cut before any pattern runs over them
+    MAX_MESSAGE_LENGTH = 1000
+    MAX_WORD_LENGTH = 40
+    # Time one message may spend in slow parsers (dateparser) before the reply degrades
+    MESSAGE_TIME_BUDGET_SECONDS = 0.5
+    GUARD_WORKERS = 2
+    # Longest text handed to dateparser - a runaway call keeps its guard worker until it returns,
+    # so its input is bounded before it is handed off
+    DATEPARSER_MAX_LENGTH = 48
+    DATEPARSER_MAX_WORDS = 6
+    
+    # Multi-step chat flows - idle conversations expire, oldest evicted beyond the cap
+    CONVERSATION_TTL_SECONDS = 30 * 60
+    CONVERSATION_MAX_ENTRIES = 10000
+    # 'memory' keeps flows in this process; 'sqlite' shares them across workers and restarts
+    CONVERSATION_BACKEND = "memory"
+    CONVERSATION_DB = os.path.join(BASE_DIR, "conversations.db")
+    
+    # Chat persistence - 'async' replies first and writes ChatHistory in background batches,
+    # 'sync' writes every turn before the reply is returned (use where it must be durable first)
+    CHAT_PERSISTENCE = "async"
+    CHAT_WRITE_QUEUE_SIZE = 1000
+    CHAT_WRITE_BATCH_SIZE = 50
+    # A failed batch is retried with backoff and stays in the history until it is written;
+    # after shutdown starts it gets this many attempts
+    CHAT_WRITE_RETRY_SECONDS = 0.5
+    CHAT_WRITE_RETRY_MAX_SECONDS = 30
+    CHAT_WRITE_SHUTDOWN_RETRIES = 3
+    
+    # Balance and existing leave are loaded in the background once the chatbot asks for dates.
+    # Writes from this process invalidate them; the TTL bounds how stale other writers can make them
+    PREFETCH_TTL_SECONDS = 2 * 60
+    PREFETCH_MAX_ENTRIES = 1000
+    PREFETCH_WORKERS = 2
+    # How long a turn waits for a load still running before reading synchronously
+    PREFETCH_WAIT_SECONDS = 0.2
+    
+    # Startup - heavy modules are imported on first use; warm-up loads them after the server starts
+    WARM_UP_MODULES = ("numpy", "pandas", "dateparser", "PyPDF2")
+    # Reported by `python lazy_imports.py` - the tests check which modules load, not timings
+    IMPORT_TIME_BUDGET_SECONDS = 0.5
+    IMPORT_BUDGET_STATEMENTS = (
+        "import database",
+        "import chatbot_enhanced",
+        "import rag_system",
+        "import auth",
+    )
     
     # Leave Policy from PDF
     MAX_EL_PER_YEAR = 20  # From PDF
@@ -19,6 +106,8 @@ class Config:
     MIN_EL_DAYS = 3  # Minimum 3 consecutive days for EL
     MAX_CARRY_FORWARD = 10  # Max carry forward days
     LEAVE_NOTICE_DAYS = 7  # 1 week advance notice for planned leave
+    # The server checks for a due monthly accrual at startup and then this often
+    ACCRUAL_CHECK_INTERVAL_SECONDS = 6 * 60 * 60
     
     # Public Holidays 2024-2025 (you can update this list)
     PUBLIC_HOLIDAYS = [
@@ -0,0 +1,168 @@
+import json
+import sqlite3
+import threading
+import time
+from datetime import date
+from config import Config
+from ttl_cache import TTLCache
+
+
+class ConversationState:
+    """Where one user is in a multi-step chat flow"""
+    __slots__ = ('current_flow', 'current_step', 'pending_leave_type', 'pending_dates', 'pending_message')
+
+    def __init__(self, current_flow=None, current_step=0, pending_leave_type=None, pending_dates=None,
+                 pending_message=None):
+        self.current_flow = current_flow              # None or 'leave_application'
+        self.current_step = current_step              # 0=idle, 1=asked_type, 2=asked_dates
+        self.pending_leave_type = pending_leave_type
+        self.pending_dates = pending_dates
+        self.pending_message = pending_message        # message that started the flow
+
+    def reset(self):
+        """Back to idle"""
+        self.current_flow = None
+        self.current_step = 0
+        self.pending_leave_type = None
+        self.pending_dates = None
+        self.pending_message = None
+
+    def to_json(self):
+        """Compact JSON for shared backends"""
+        dates = [d.isoformat() for d in self.pending_dates] if self.pending_dates else None
+        return json.dumps([self.current_flow, self.current_step, self.pending_leave_type, dates, self.pending_message])
+
+    @classmethod
+    def from_json(cls, text):
+        flow, step, leave_type, dates, message = json.loads(text)
+        dates = [date.fromisoformat(d) for d in dates] if dates else None
+        return cls(flow, step, leave_type, dates, message)
+
+    @property
+    def is_idle(self):
+        return self.current_flow is None
+
+
+class ConversationStore:
+    """Per-user conversation state with idle expiry and a bounded LRU size"""
+
+    def __init__(self, ttl_seconds=None, max_entries=None):
+        self._cache = TTLCache(
+            max_entries=max_entries or Config.CONVERSATION_MAX_ENTRIES,
+            ttl_seconds=ttl_seconds or Config.CONVERSATION_TTL_SECONDS,
+            sliding=True,
+        )
+
+    def get(self, user_id):
+        """State for a user - a fresh idle state if none is stored"""
+        state = self._cache.get(str(user_id))
+        return state if state is not None else ConversationState()
+
+    def put(self, user_id, state):
+        """Store a user's state - idle states are dropped instead of kept"""
+        if state.is_idle:
+            self._cache.pop(str(user_id))
+        else:
+            self._cache.set(str(user_id), state)
+
+    def discard(self, user_id):
+        self._cache.pop(str(user_id))
+
+    def stats(self):
+        """Size and hit/miss/eviction/expiry counters"""
+        return self._cache.stats()
+
+    def __len__(self):
+        return len(self._cache)
+
+
+class SQLiteConversationStore:
+    """Conversation state in a SQLite file shared by every worker process and kept across restarts"""
+
+    PURGE_EVERY = 500  # writes between sweeps of expired rows
+
+    def __init__(self, path=None, ttl_seconds=None):
+        self.path = path or Config.CONVERSATION_DB
+        self.ttl_seconds = ttl_seconds or Config.CONVERSATION_TTL_SECONDS
+        self._local = threading.local()
+        self._writes = 0
+        self.hits = 0
+        self.misses = 0
+        self.expirations = 0
+        self._connect().execute(
+            "CREATE TABLE IF NOT EXISTS conversations ("
+            "user_id TEXT PRIMARY KEY, state TEXT NOT NULL, updated_at REAL NOT NULL)"
+        )
+
+    def _connect(self):
+        """One autocommit connection per thread"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, user_id):
+        """State for a user - a fresh idle state if none is stored or it expired"""
+        row = self._connect().execute(
+            "SELECT state, updated_at FROM conversations WHERE user_id = ?", (str(user_id),)
+        ).fetchone()
+        if row is None:
+            self.misses += 1
+            return ConversationState()
+        if row[1] < time.time() - self.ttl_seconds:
+            self.expirations += 1
+            self.misses += 1
+            self.discard(user_id)
+            return ConversationState()
+        self.hits += 1
+        return ConversationState.from_json(row[0])
+
+    def put(self, user_id, state):
+        """Upsert a user's state - idle states are deleted instead of kept"""
+        if state.is_idle:
+            self.discard(user_id)
+            return
+        self._connect().execute(
+            "INSERT INTO conversations (user_id, state, updated_at) VALUES (?, ?, ?) "
+            "ON CONFLICT(user_id) DO UPDATE SET state = excluded.state, updated_at = excluded.updated_at",
+            (str(user_id), state.to_json(), time.time()),
+        )
+        self._writes += 1
+        if self._writes % self.PURGE_EVERY == 0:
+            self.purge_expired()
+
+    def discard(self, user_id):
+        self._connect().execute("DELETE FROM conversations WHERE user_id = ?", (str(user_id),))
+
+    def purge_expired(self):
+        """Delete rows idle for longer than the TTL - returns how many were removed"""
+        cursor = self._connect().execute(
+            "DELETE FROM conversations WHERE updated_at < ?", (time.time() - self.ttl_seconds,)
+        )
+        self.expirations += cursor.rowcount
+        return cursor.rowcount
+
+    def stats(self):
+        return {
+            'size': len(self),
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': 0,
+            'expirations': self.expirations,
+        }
+
+    def __len__(self):
+        return self._connect().execute("SELECT COUNT(*) FROM conversations").fetchone()[0]
+
+
+def create_conversation_store(backend=None):
+    """Conversation store for Config.CONVERSATION_BACKEND ('memory' or 'sqlite')"""
+    backend = backend or Config.CONVERSATION_BACKEND
+    if backend == 'sqlite':
+        return SQLiteConversationStore()
+    if backend == 'memory':
+        return ConversationStore()
+    raise ValueError(f"Unknown conversation backend: {backend}")
@@ -1,11 +1,43 @@
-import pandas as pd
 import os
+import shutil
+import functools
+import threading
+from contextlib import contextmanager
 from datetime import datetime, timedelta
 from config import Config
+from accrual import AccrualEngine
+from records import LeaveRequest, ChatMessage, Balance, Page
+from work_calendar import get_calendar
+from lazy_imports import lazy_import
+
+np = lazy_import('numpy')
+pd = lazy_import('pandas')
+
+
+def synchronized(method):
+    """Serialize read-modify-write cycles on the workbook"""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self._write_lock:
+            try:
+                return method(self, *args, **kwargs)
+            finally:
+                self._sheet_cache.clear()
+    return wrapper
+
 
 class LeaveDatabase:
+    # Rewrites of these sheets bump leave_data_version()
+    LEAVE_SHEETS = ('Available', 'Hierarchy', 'Used')
+
     def __init__(self, file_path=None):
         self.file_path = file_path or Config.EXCEL_FILE
+        # One lock per workbook - writers to different files never contend
+        self._write_lock = threading.RLock()
+        # sheet_name -> (file signature, DataFrame, {column: {key: row positions}})
+        self._sheet_cache = {}
+        # Bumped by rewrites of the leave sheets - chat-only writes leave it alone
+        self._leave_version = 0
         self._ensure_file_exists()
     
     def _ensure_file_exists(self):
@@ -126,12 +158,19 @@ class LeaveDatabase:
                 ]
             }
             
+            # Admin credentials - a blank PasswordHash means the default password
+            admins_data = {
+                'Admin ID': [5000, 8001, 6099],
+                'PasswordHash': [None, None, None]
+            }
+            
             # Create Excel file with all sheets
             with pd.ExcelWriter(self.file_path, engine='openpyxl') as writer:
                 pd.DataFrame(available_data).to_excel(writer, sheet_name='Available', index=False)
                 pd.DataFrame(used_data).to_excel(writer, sheet_name='Used', index=False)
                 pd.DataFrame(hierarchy_data).to_excel(writer, sheet_name='Hierarchy', index=False)
                 pd.DataFrame(chat_data).to_excel(writer, sheet_name='ChatHistory', index=False)
+                pd.DataFrame(admins_data).to_excel(writer, sheet_name='Admins', index=False)
             
             print("✅ Excel file created successfully with current sample data!")
             
@@ -141,29 +180,21 @@ class LeaveDatabase:
             traceback.print_exc()
     
     def get_user_balance(self, user_id):
-        """Get leave balance for a user - REMOVED ELIGIBILITY CHECK"""
+        """Get leave balance for a user with minimum-service eligibility"""
         try:
             df = pd.read_excel(self.file_path, sheet_name='Available')
             user_data = df[df['UserId'] == int(user_id)]
             
             if not user_data.empty:
-                el = user_data['EL'].iloc[0]
-                sl = user_data['SL'].iloc[0]
-                cl = user_data['CL'].iloc[0]
-                tl = user_data['TL'].iloc[0]
-                
-                return {
-                    'EL': int(el) if not pd.isna(el) else 0,
-                    'SL': int(sl) if not pd.isna(sl) else 0,
-                    'CL': int(cl) if not pd.isna(cl) else 0,
-                    'TL': int(tl) if not pd.isna(tl) else 0,
-                    'eligible': True  # Always eligible now
-                }
+                row = user_data.iloc[0]
+                eligible = AccrualEngine.is_eligible(row['JoinDate']) if 'JoinDate' in user_data else True
+                return Balance.from_row(row, eligible)
             return None
         except Exception as e:
             print(f"Error reading balance for user {user_id}: {e}")
             return None
 
+    @synchronized
     def update_user_balance(self, user_id, leave_type, days):
         """Update user's leave balance"""
         try:
@@ -179,7 +210,7 @@ class LeaveDatabase:
                     # Update total leaves (sum of EL + SL + CL)
                     df.at[idx, 'TL'] = df.at[idx, 'EL'] + df.at[idx, 'SL'] + df.at[idx, 'CL']
                     
-                    with pd.ExcelWriter(self.file_path, engine='openpyxl', mode='a', if_sheet_exists='replace') as writer:
+                    with self.sheet_writer() as writer:
                         df.to_excel(writer, sheet_name='Available', index=False)
                     return True
             return False
@@ -187,6 +218,7 @@ class LeaveDatabase:
             print(f"Error updating balance: {e}")
             return False
 
+    @synchronized
     def add_leave_request(self, user_id, leave_date, leave_type, reason, duration="Full Day"):
         """Add a new leave request - WITH FILE LOCK HANDLING"""
         try:
@@ -232,7 +264,7 @@ class LeaveDatabase:
             max_retries = 3
             for attempt in range(max_retries):
                 try:
-                    with pd.ExcelWriter(self.file_path, engine='openpyxl', mode='a', if_sheet_exists='replace') as writer:
+                    with self.sheet_writer() as writer:
                         df_hierarchy.to_excel(writer, sheet_name='Hierarchy', index=False)
                     print("✅ Excel file updated successfully")
                     return True
@@ -254,62 +286,99 @@ class LeaveDatabase:
             traceback.print_exc()
             return False
 
-    def get_user_leave_requests(self, user_id):
-        """Get all leave requests for a user"""
+    @contextmanager
+    def sheet_writer(self, leave_data=True):
+        """Replace sheets in a copy of the workbook, then swap it in - readers never see a half-written file
+
+        Pass leave_data=False for writes that only touch ChatHistory.
+        """
+        base, ext = os.path.splitext(self.file_path)
+        tmp_path = f"{base}.{os.getpid()}-{threading.get_ident()}.tmp{ext}"
+        shutil.copyfile(self.file_path, tmp_path)
         try:
-            df = pd.read_excel(self.file_path, sheet_name='Hierarchy')
-            user_requests = df[df['UserId'] == int(user_id)]
-            return user_requests.to_dict('records')
+            with pd.ExcelWriter(tmp_path, engine='openpyxl', mode='a', if_sheet_exists='replace') as writer:
+                yield writer
+            os.replace(tmp_path, self.file_path)
+            if leave_data:
+                self._leave_version += 1
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def _load_sheet(self, sheet_name):
+        """Read a sheet through a cache that is invalidated when the file changes"""
+        stat = os.stat(self.file_path)
+        signature = (stat.st_mtime_ns, stat.st_size)
+
+        cached = self._sheet_cache.get(sheet_name)
+        if cached and cached[0] == signature:
+            return cached[1], cached[2]
+
+        df = pd.read_excel(self.file_path, sheet_name=sheet_name)
+        entry = (signature, df, {})
+        self._sheet_cache[sheet_name] = entry
+        return df, entry[2]
+
+    def _positions(self, sheet_name, column, key):
+        """Row positions for `column == key`, in file order, from a per-column index"""
+        df, indexes = self._load_sheet(sheet_name)
+        if column not in indexes:
+            keys = pd.to_numeric(df[column], errors='coerce')
+            indexes[column] = {int(k): np.asarray(v) for k, v in keys.groupby(keys).indices.items()}
+        return df, indexes[column].get(int(key), np.empty(0, dtype=int))
+
+    def _page_positions(self, positions, limit, cursor, newest_first):
+        """Apply sort order and a cursor window to index positions"""
+        if newest_first:
+            positions = positions[::-1]
+        start, stop, next_cursor = Page.window(len(positions), limit, cursor)
+        return positions[start:stop], next_cursor
+
+    def get_user_leave_requests(self, user_id, limit=None, offset=0, newest_first=True):
+        """Get leave requests for a user, newest first - only the requested window is materialized"""
+        return self.get_user_leave_requests_page(user_id, limit, offset, newest_first).items
+
+    def get_user_leave_requests_page(self, user_id, limit=None, cursor=None, newest_first=True):
+        """Get one page of a user's leave requests, newest first, with the total count"""
+        try:
+            df, positions = self._positions('Hierarchy', 'UserId', user_id)
+            window, next_cursor = self._page_positions(positions, limit, cursor, newest_first)
+            return Page(LeaveRequest.from_frame(df.iloc[window]), len(positions), next_cursor)
         except Exception as e:
             print(f"Error reading leave requests: {e}")
-            return []
+            return Page([], 0, None)
+
+    def get_pending_requests(self, admin_id, limit=None, offset=0, newest_first=False):
+        """Get pending leave requests for an admin"""
+        return self.get_pending_requests_page(admin_id, limit, offset, newest_first).items
 
-    def get_pending_requests(self, admin_id):
-        """Get pending leave requests for an admin - WITH BETTER ERROR HANDLING"""
+    def get_pending_requests_page(self, admin_id, limit=None, cursor=None, newest_first=False):
+        """Get one page of an admin's pending requests with the total count"""
         try:
             print(f"🔍 Getting pending requests for admin: {admin_id} (type: {type(admin_id)})")
             
-            df = pd.read_excel(self.file_path, sheet_name='Hierarchy')
-            
-            if df.empty:
-                print("❌ Hierarchy sheet is empty")
-                return []
-            
             # Ensure admin_id is integer for comparison
             try:
                 admin_id_int = int(admin_id)
             except ValueError:
                 print(f"❌ Invalid admin ID format: {admin_id}")
-                return []
-            
-            # Convert Admin ID column to int for proper comparison
-            df['Admin ID'] = df['Admin ID'].astype(int)
+                return Page([], 0, None)
             
-            pending = df[(df['Admin ID'] == admin_id_int) & (df['Status'] == 'Pending')]
+            df, positions = self._positions('Hierarchy', 'Admin ID', admin_id_int)
+            positions = positions[df['Status'].values[positions] == 'Pending']
             
-            print(f"✅ Found {len(pending)} pending requests for admin {admin_id_int}")
+            print(f"✅ Found {len(positions)} pending requests for admin {admin_id_int}")
             
-            # Convert to list of dictionaries with proper data types
-            result = []
-            for _, row in pending.iterrows():
-                result.append({
-                    'UserId': int(row['UserId']),
-                    'Leave_Date': str(row['Leave_Date']),
-                    'LeaveType': str(row['LeaveType']),
-                    'Reason': str(row['Reason']),
-                    'AppliedDate': str(row['AppliedDate']),
-                    'Duration': str(row['Duration']),
-                    'Admin ID': int(row['Admin ID'])
-                })
-            
-            return result
+            window, next_cursor = self._page_positions(positions, limit, cursor, newest_first)
+            return Page(LeaveRequest.from_frame(df.iloc[window]), len(positions), next_cursor)
             
         except Exception as e:
             print(f"❌ Error in get_pending_requests: {e}")
             import traceback
             traceback.print_exc()
-            return []
+            return Page([], 0, None)
 
+    @synchronized
     def update_leave_status(self, user_id, leave_date, status):
         """Update leave request status - FIXED VERSION"""
         try:
@@ -348,12 +417,12 @@ class LeaveDatabase:
                     df_used = pd.concat([df_used, pd.DataFrame([new_used])], ignore_index=True)
                     
                     # Save both sheets
-                    with pd.ExcelWriter(self.file_path, engine='openpyxl', mode='a', if_sheet_exists='replace') as writer:
+                    with self.sheet_writer() as writer:
                         df.to_excel(writer, sheet_name='Hierarchy', index=False)
                         df_used.to_excel(writer, sheet_name='Used', index=False)
                 else:
                     # Just update the status for rejected leaves
-                    with pd.ExcelWriter(self.file_path, engine='openpyxl', mode='a', if_sheet_exists='replace') as writer:
+                    with self.sheet_writer() as writer:
                         df.to_excel(writer, sheet_name='Hierarchy', index=False)
                 
                 print(f"✅ DB: Successfully updated status to {status}")
@@ -381,11 +450,11 @@ class LeaveDatabase:
             approved_count = 0
             
             for request in pending_requests:
-                print(f"🔍 Approving: User {request['UserId']} on {request['Leave_Date']}")
+                print(f"🔍 Approving: User {request.user_id} on {request.leave_date}")
                 
                 success = self.update_leave_status(
-                    request['UserId'], 
-                    request['Leave_Date'], 
+                    request.user_id, 
+                    request.leave_date, 
                     'Approved'
                 )
                 
@@ -393,7 +462,7 @@ class LeaveDatabase:
                     approved_count += 1
                     print(f"✅ Approved successfully ({approved_count}/{len(pending_requests)})")
                 else:
-                    print(f"❌ Failed to approve User {request['UserId']}")
+                    print(f"❌ Failed to approve User {request.user_id}")
             
             print(f"✅ FINAL: Approved {approved_count}/{len(pending_requests)}")
             return approved_count, len(pending_requests)
@@ -402,74 +471,112 @@ class LeaveDatabase:
             print(f"❌ Error in approve_all_pending: {e}")
             return 0, 0
 
-    def check_date_overlap(self, user_id, leave_date):
-        """Check if leave date overlaps with existing leaves"""
+    def get_user_leave_dates(self, user_id):
+        """Dates a user already has leave on - pending/approved requests plus used leave; None on error"""
         try:
-            df_hierarchy = pd.read_excel(self.file_path, sheet_name='Hierarchy')
-            df_used = pd.read_excel(self.file_path, sheet_name='Used')
-            
-            leave_date_dt = pd.to_datetime(leave_date).date()
-            
-            # Check in hierarchy (approved and pending)
-            user_leaves = df_hierarchy[df_hierarchy['UserId'] == int(user_id)]
-            for _, leave in user_leaves.iterrows():
-                existing_date = pd.to_datetime(leave['Leave_Date']).date()
-                if existing_date == leave_date_dt and leave['Status'] != 'Rejected':
-                    return True
+            df_hierarchy, positions = self._positions('Hierarchy', 'UserId', user_id)
+            requests = df_hierarchy.iloc[positions]
+            requests = requests[requests['Status'] != 'Rejected']
             
-            # Check in used leaves
-            user_used = df_used[df_used['UserId'] == int(user_id)]
-            for _, used in user_used.iterrows():
-                existing_date = pd.to_datetime(used['Leave_Date']).date()
-                if existing_date == leave_date_dt:
-                    return True
+            df_used, used_positions = self._positions('Used', 'UserId', user_id)
+            used = df_used.iloc[used_positions]
             
-            return False
+            dates = pd.concat([requests['Leave_Date'], used['Leave_Date']])
+            return set(pd.to_datetime(dates, errors='coerce').dropna().dt.date)
+        except Exception as e:
+            print(f"Error reading leave dates for user {user_id}: {e}")
+            return None
+
+    def check_date_overlap(self, user_id, leave_date):
+        """Check if leave date overlaps with existing leaves"""
+        try:
+            leave_dates = self.get_user_leave_dates(user_id)
+            if leave_dates is None:
+                return True
+            return pd.to_datetime(leave_date).date() in leave_dates
         except Exception as e:
             print(f"Error checking date overlap: {e}")
             return True
         
+    @staticmethod
+    def _turn_rows(user_id, user_message, reply, timestamp=None):
+        """(user_id, role, message, timestamp) rows for one chat turn"""
+        if timestamp is None:
+            timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        rows = [(user_id, 'user', user_message, timestamp)]
+        if reply is not None:
+            rows.append((user_id, 'assistant', reply, timestamp))
+        return rows
+
+    def _append_chat_rows(self, rows):
+        """Append (user_id, role, message, timestamp) rows to ChatHistory in one sheet rewrite"""
+        # Create ChatHistory sheet if it doesn't exist
+        try:
+            df_chat = pd.read_excel(self.file_path, sheet_name='ChatHistory')
+        except:
+            # Create new ChatHistory sheet
+            df_chat = pd.DataFrame(columns=['UserID', 'Role', 'Message', 'Timestamp'])
+        
+        new_messages = [{
+            'UserID': int(user_id),
+            'Role': role,  # 'user' or 'assistant'
+            'Message': message,
+            'Timestamp': timestamp
+        } for user_id, role, message, timestamp in rows]
+        
+        df_chat = pd.concat([df_chat, pd.DataFrame(new_messages)], ignore_index=True)
+        
+        # Update Excel file
+        with self.sheet_writer(leave_data=False) as writer:
+            df_chat.to_excel(writer, sheet_name='ChatHistory', index=False)
+
+    @synchronized
     def save_chat_message(self, user_id, role, message, timestamp=None):
         """Save a chat message to the database"""
         try:
-            # Create ChatHistory sheet if it doesn't exist
-            try:
-                df_chat = pd.read_excel(self.file_path, sheet_name='ChatHistory')
-            except:
-                # Create new ChatHistory sheet
-                df_chat = pd.DataFrame(columns=['UserID', 'Role', 'Message', 'Timestamp'])
-            
             if timestamp is None:
                 timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-            
-            new_message = {
-                'UserID': int(user_id),
-                'Role': role,  # 'user' or 'assistant'
-                'Message': message,
-                'Timestamp': timestamp
-            }
-            
-            df_chat = pd.concat([df_chat, pd.DataFrame([new_message])], ignore_index=True)
-            
-            # Update Excel file
-            with pd.ExcelWriter(self.file_path, engine='openpyxl', mode='a', if_sheet_exists='replace') as writer:
-                df_chat.to_excel(writer, sheet_name='ChatHistory', index=False)
-            
+            self._append_chat_rows([(user_id, role, message, timestamp)])
             return True
         except Exception as e:
             print(f"Error saving chat message: {e}")
             return False
 
-    def get_chat_history(self, user_id, limit=50):
-        """Get chat history for a user - PROPER GRADIO FORMAT"""
+    @synchronized
+    def save_chat_turn(self, user_id, user_message, reply, timestamp=None):
+        """Save a user message and its reply in one write - reply=None saves the user message alone"""
+        try:
+            self._append_chat_rows(self._turn_rows(user_id, user_message, reply, timestamp))
+            return True
+        except Exception as e:
+            print(f"Error saving chat turn: {e}")
+            return False
+
+    @synchronized
+    def save_chat_turns(self, turns):
+        """Save a batch of (user_id, user_message, reply, timestamp) turns in one write"""
+        try:
+            rows = []
+            for user_id, user_message, reply, timestamp in turns:
+                rows.extend(self._turn_rows(user_id, user_message, reply, timestamp))
+            if rows:
+                self._append_chat_rows(rows)
+            return True
+        except Exception as e:
+            print(f"Error saving chat turns: {e}")
+            return False
+
+    def get_chat_history(self, user_id, limit=50, offset=0):
+        """Get the latest chat messages for a user, oldest first - skips `offset` newest messages"""
         try:
-            df_chat = pd.read_excel(self.file_path, sheet_name='ChatHistory')
             # Filter by user ID to ensure privacy
-            user_chats = df_chat[df_chat['UserID'] == int(user_id)]
-            user_chats = user_chats.sort_values('Timestamp').tail(limit)
+            df_chat, positions = self._positions('ChatHistory', 'UserID', user_id)
             
-            # Convert to list of dictionaries
-            records = user_chats.to_dict('records')
+            # Rows are appended in time order - only the requested window is sorted
+            window, _ = self._page_positions(positions, limit, offset, newest_first=True)
+            user_chats = df_chat.iloc[window[::-1]].sort_values('Timestamp', kind='stable')
+            
+            records = ChatMessage.from_frame(user_chats)
             
             print(f"✅ Database: Found {len(records)} chat records for user {user_id}")
             return records
@@ -478,6 +585,7 @@ class LeaveDatabase:
             print(f"❌ Database error getting chat history: {e}")
             return []
 
+    @synchronized
     def clear_chat_history(self, user_id):
         """Clear chat history for a user - PRIVATE CLEAR"""
         try:
@@ -485,7 +593,7 @@ class LeaveDatabase:
             # Only remove messages for this specific user
             df_chat = df_chat[df_chat['UserID'] != int(user_id)]
             
-            with pd.ExcelWriter(self.file_path, engine='openpyxl', mode='a', if_sheet_exists='replace') as writer:
+            with self.sheet_writer(leave_data=False) as writer:
                 df_chat.to_excel(writer, sheet_name='ChatHistory', index=False)
             
             return True
@@ -493,19 +601,123 @@ class LeaveDatabase:
             print(f"Error clearing chat history: {e}")
             return False
         
+    @synchronized
+    def add_employees(self, employees):
+        """Append new employees to the Available sheet - existing UserIds are skipped"""
+        try:
+            df = pd.read_excel(self.file_path, sheet_name='Available')
+            existing = set(pd.to_numeric(df['UserId'], errors='coerce').dropna().astype(int))
+
+            new_rows = []
+            for employee in employees:
+                user_id = int(employee['UserId'])
+                if user_id in existing:
+                    print(f"⚠️ User {user_id} already exists - skipped")
+                    continue
+                row = {
+                    'UserId': user_id,
+                    'EL': int(employee.get('EL', 0)),
+                    'SL': int(employee.get('SL', 0)),
+                    'CL': int(employee.get('CL', 0)),
+                    'Admin ID': int(employee['Admin ID']),
+                    'JoinDate': employee.get('JoinDate', datetime.now().strftime('%Y-%m-%d')),
+                }
+                row['TL'] = row['EL'] + row['SL'] + row['CL']
+                if employee.get('PasswordHash'):
+                    row['PasswordHash'] = employee['PasswordHash']
+                new_rows.append(row)
+                existing.add(user_id)
+
+            if not new_rows:
+                return []
+
+            df = pd.concat([df, pd.DataFrame(new_rows)], ignore_index=True)
+            with self.sheet_writer() as writer:
+                df.to_excel(writer, sheet_name='Available', index=False)
+            print(f"✅ Imported {len(new_rows)} employees")
+            return new_rows
+        except Exception as e:
+            print(f"❌ Error importing employees: {e}")
+            return []
+
+    @synchronized
+    def add_admins(self, admins):
+        """Add admin credential rows, or replace the PasswordHash of existing ones - returns the rows written"""
+        try:
+            try:
+                df = pd.read_excel(self.file_path, sheet_name='Admins')
+            except ValueError:
+                df = pd.DataFrame(columns=['Admin ID', 'PasswordHash'])
+            if 'PasswordHash' not in df.columns:
+                df['PasswordHash'] = None
+            df['PasswordHash'] = df['PasswordHash'].astype(object)
+            admin_ids = pd.to_numeric(df['Admin ID'], errors='coerce')
+
+            written, new_rows = [], []
+            for admin in admins:
+                row = {'Admin ID': int(admin['Admin ID']), 'PasswordHash': admin.get('PasswordHash') or None}
+                existing = admin_ids == row['Admin ID']
+                if existing.any():
+                    if row['PasswordHash']:
+                        df.loc[existing, 'PasswordHash'] = row['PasswordHash']
+                        written.append(row)
+                    continue
+                new_rows.append(row)
+                written.append(row)
+
+            if not written:
+                return []
+
+            if new_rows:
+                df = pd.concat([df, pd.DataFrame(new_rows)], ignore_index=True)
+            with self.sheet_writer(leave_data=False) as writer:
+                df.to_excel(writer, sheet_name='Admins', index=False)
+            print(f"✅ Saved {len(written)} admin credential rows")
+            return written
+        except Exception as e:
+            print(f"❌ Error saving admins: {e}")
+            return []
+
+    @synchronized
+    def update_sheet(self, sheet_name, update):
+        """Read-modify-write one sheet under the workbook lock
+
+        `update(df)` returns the new DataFrame, or None to leave the sheet
+        alone. Returns True if the sheet was rewritten - errors propagate.
+        """
+        df = pd.read_excel(self.file_path, sheet_name=sheet_name)
+        updated = update(df)
+        if updated is None:
+            return False
+        with self.sheet_writer(leave_data=sheet_name in self.LEAVE_SHEETS) as writer:
+            updated.to_excel(writer, sheet_name=sheet_name, index=False)
+        return True
+
+    def read_sheet(self, sheet_name, columns=None):
+        """Read a sheet as a DataFrame - optionally only the named columns"""
+        usecols = (lambda column: column in columns) if columns else None
+        return pd.read_excel(self.file_path, sheet_name=sheet_name, usecols=usecols)
+
+    def leave_data_version(self):
+        """Changes whenever this process rewrites Available, Hierarchy or Used"""
+        return self._leave_version
+
+    def data_version(self):
+        """Signature that changes whenever the workbook is rewritten"""
+        stat = os.stat(self.file_path)
+        return (stat.st_mtime_ns, stat.st_size)
+
     def is_weekend(self, date):
         """Check if date is weekend (Saturday or Sunday)"""
         return date.weekday() >= 5  # 5=Saturday, 6=Sunday
 
     def is_public_holiday(self, date):
         """Check if date is a public holiday"""
-        from config import Config
-        date_str = date.strftime('%Y-%m-%d')
-        return date_str in Config.PUBLIC_HOLIDAYS
+        return get_calendar().is_holiday(date)
 
     def is_valid_working_day(self, date):
         """Check if date is a valid working day (not weekend or holiday)"""
-        return not (self.is_weekend(date) or self.is_public_holiday(date))
+        return get_calendar().is_working_day(date)
     
     def is_valid_sl_date(self, date):
         """Check if date is valid for Sick Leave (today or past dates, max 15 days before)"""
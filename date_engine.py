@@ -0,0 +1,174 @@
+import re
+import functools
+from collections import namedtuple
+from datetime import date
+from config import Config
+from work_calendar import get_calendar
+import date_grammar
+import date_service
+from message_guard import call_with_budget, BudgetExceeded
+
+
+# strptime formats for the dateparser fallback - DD-MM first, then MM-DD
+DATE_FORMATS = (
+    '%d-%m-%Y', '%d/%m/%Y', '%d-%b-%Y', '%d %b %Y', '%Y-%m-%d',
+    '%d-%m', '%d/%m', '%d-%b', '%d %b', '%b %d', '%d%b',
+    '%m-%d-%Y', '%m/%d/%Y', '%m-%d', '%m/%d',
+)
+
+_HALF_DAY = re.compile(r'\b(?:half[\s-]?day|(?:first|1st|second|2nd)\s+half|forenoon|morning|afternoon)\b')
+_SEPARATOR = re.compile(r'\s(?:to|till|til|until|through|thru)\s')
+# Words around a date in a leave request - whole words only, so 'hello' keeps its 'el'
+_FILLER = re.compile(r'\b(?:i|want|need|would|like|to|apply|applying|for|take|taking|leave|leaves|off|on'
+                     r'|sl|el|cl|sick|earned|casual|medical|a|an|the|please|pls|may|can|could|me|my)\b')
+_DAY_COUNT = re.compile(r'\b\d+\s+days?\b')
+# Worth handing to dateparser only if a number or a whole day/month name is left -
+# 'this month' or 'next week' name no particular day
+_DATE_HINT = re.compile(rf'\d|\b(?:{date_grammar.MONTH_NAMES}|{date_grammar.WEEKDAY_NAMES})\b')
+
+
+class DateRange(namedtuple('DateRange', ['start', 'end', 'start_half', 'end_half'], defaults=(False, False))):
+    """Inclusive leave range - a half flag marks the start/end day as a half day"""
+    __slots__ = ()
+
+    def days(self):
+        """Dates covered - a multi-day range skips weekends and public holidays"""
+        if self.start == self.end:
+            return [self.start]
+        return get_calendar().working_days_in_range(self.start, self.end)
+
+    @property
+    def duration(self):
+        """Leave days, counting each half-day end as 0.5"""
+        if self.start == self.end:
+            return 0.5 if self.start_half or self.end_half else 1.0
+        return len(self.days()) - 0.5 * (self.start_half + self.end_half)
+
+
+def normalize(message):
+    """Lower-case and collapse whitespace - the cache key"""
+    return ' '.join(str(message or '').lower().split())
+
+
+def _half_flags(text):
+    """(start_half, end_half) from 'half day', 'first half', 'afternoon', ... on either side of 'to'"""
+    markers = [m.start() for m in _HALF_DAY.finditer(text)]
+    if not markers:
+        return False, False
+    separator = _SEPARATOR.search(text)
+    if separator is None:
+        return True, True
+    return (any(pos < separator.start() for pos in markers),
+            any(pos > separator.start() for pos in markers))
+
+
+def _clean(text):
+    """What is left of a message once the request words and day counts are gone"""
+    text = _DAY_COUNT.sub(' ', text)
+    text = _FILLER.sub(' ', text)
+    text = ' '.join(re.sub(r'[^\w\s/-]', ' ', text).split())
+    # A leading 'from' opens a range; 'a week from now' keeps its own
+    return text[5:] if text.startswith('from ') else text
+
+
+def _parse(text, reference):
+    """dateparser within the message's time budget - raises BudgetExceeded when it runs over
+
+    Text longer than a date expression is never handed off, so no guard
+    worker is tied up by dateparser chewing on a pasted paragraph.
+    """
+    if len(text) > Config.DATEPARSER_MAX_LENGTH or len(text.split()) > Config.DATEPARSER_MAX_WORDS:
+        return None
+    return call_with_budget(date_service.parse_date, text, reference, DATE_FORMATS)
+
+
+def _fallback(text, reference):
+    """Slow path for shapes the grammar does not know - explicit formats, then dateparser"""
+    parts = _SEPARATOR.split(text, maxsplit=1)
+    if len(parts) == 2:
+        start_text, end_text = _clean(parts[0]), _clean(parts[1])
+        if _DATE_HINT.search(start_text) and _DATE_HINT.search(end_text):
+            start = _parse(start_text, reference)
+            end = _parse(end_text, reference)
+            if start and end and start <= end:
+                return start, end
+
+    remainder = _clean(text)
+    if not _DATE_HINT.search(remainder):
+        return None
+    day = _parse(remainder, reference)
+    return (day, day) if day else None
+
+
+@functools.lru_cache(maxsize=Config.DATE_CACHE_SIZE)
+def _extract_cached(text, reference):
+    start_half, end_half = _half_flags(text)
+    # 'second half' would otherwise read as the 2nd of the month
+    dates_text = _HALF_DAY.sub(' ', text) if start_half or end_half else text
+
+    match = date_grammar.extract(dates_text, reference)
+    if match and match.is_range:
+        return (DateRange(match.start, match.end, start_half, end_half),)
+    if match:
+        if len(match.dates) > 1:
+            return tuple(DateRange(day, day) for day in match.dates)
+        return (DateRange(match.start, match.start, start_half, end_half),)
+
+    found = _fallback(dates_text, reference)
+    if found is None:
+        return ()
+    return (DateRange(found[0], found[1], start_half, end_half),)
+
+
+def extract(message, reference=None):
+    """Date ranges named in a message, relative to `reference` (default today) - () if none
+
+    Grammar first, dateparser only for what it does not recognize; results
+    are memoized per (message, reference). A message whose dateparser call
+    runs past its time budget gets () and is not cached.
+    """
+    text = normalize(message)
+    if not text:
+        return ()
+    try:
+        return _extract_cached(text, reference or date.today())
+    except BudgetExceeded:
+        return ()
+
+
+@functools.lru_cache(maxsize=Config.DATE_CACHE_SIZE)
+def _leave_dates_cached(text, reference):
+    days = set()
+    for date_range in _extract_cached(text, reference):
+        days.update(date_range.days())
+    return tuple(sorted(days))
+
+
+def leave_dates(message, reference=None):
+    """Dates to book for a message - ranges expanded to working days, sorted, no duplicates"""
+    text = normalize(message)
+    if not text:
+        return []
+    try:
+        return list(_leave_dates_cached(text, reference or date.today()))
+    except BudgetExceeded:
+        return []
+
+
+def cache_stats():
+    """Hit/miss counters for the message cache"""
+    info = _extract_cached.cache_info()
+    lookups = info.hits + info.misses
+    return {
+        'hits': info.hits,
+        'misses': info.misses,
+        'size': info.currsize,
+        'hit_rate': info.hits / lookups if lookups else 0.0,
+    }
+
+
+def clear_cache():
+    """Forget memoized messages and parsed expressions"""
+    _extract_cached.cache_clear()
+    _leave_dates_cached.cache_clear()
+    date_service.clear_cache()
@@ -0,0 +1,231 @@
+import re
+import threading
+from collections import namedtuple, Counter
+from datetime import date, timedelta
+from work_calendar import get_calendar
+
+
+MONTHS = {
+    'jan': 1, 'feb': 2, 'mar': 3, 'apr': 4, 'may': 5, 'jun': 6,
+    'jul': 7, 'aug': 8, 'sep': 9, 'oct': 10, 'nov': 11, 'dec': 12,
+}
+WEEKDAYS = {
+    'mon': 0, 'tue': 1, 'wed': 2, 'thu': 3, 'fri': 4, 'sat': 5, 'sun': 6,
+}
+RELATIVE_DAYS = {
+    'today': 0, 'tomorrow': 1, 'yesterday': -1,
+    'day after tomorrow': 2, 'day before yesterday': -2,
+}
+# Chat spellings of the relative words
+_SPELLINGS = re.compile(r'\b(?:(?P<tomorrow>tom+or+ow|tmrw|tmr|2mor+ow)|(?P<today>tdy)|(?P<yesterday>yday))\b')
+
+# Full and abbreviated names only - 'wedding', 'satisfied', 'month' and 'marriage' are not dates
+MONTH_NAMES = (r'(?:jan(?:uary)?|feb(?:ruary)?|mar(?:ch)?|apr(?:il)?|may|june?|july?|aug(?:ust)?'
+               r'|sep(?:t(?:ember)?)?|oct(?:ober)?|nov(?:ember)?|dec(?:ember)?)')
+WEEKDAY_NAMES = (r'(?:mon(?:day)?|tue(?:s(?:day)?)?|wed(?:nesday)?|thu(?:r(?:s(?:day)?)?)?|fri(?:day)?'
+                 r'|sat(?:urday)?|sun(?:day)?)')
+_MONTH = rf'{MONTH_NAMES}(?![a-z])\.?'
+_WEEKDAY = rf'{WEEKDAY_NAMES}(?![a-z])'
+_ORDINAL = r'(?:st|nd|rd|th)?'
+_TOMORROW = r'(?:tomorrow|tom+or+ow|tmrw|tmr|2mor+ow)'
+
+# One alternation, scanned once left to right - the first alternative that matches wins
+_TOKEN = re.compile(rf'''
+    (?P<iso>\b(?P<iso_y>\d{{4}})[-/.](?P<iso_m>\d{{1,2}})[-/.](?P<iso_d>\d{{1,2}})\b)
+  | (?P<dayrange>\b(?P<dr_a>\d{{1,2}}){_ORDINAL}\s*[-–]\s*(?P<dr_b>\d{{1,2}}){_ORDINAL}[\s-]*(?:of\s+)?(?P<dr_m>{_MONTH})(?:[\s,-]*(?P<dr_y>\d{{4}}))?(?![a-z]))
+  | (?P<num>\b(?P<num_d>\d{{1,2}})[-/.](?P<num_m>\d{{1,2}})(?:[-/.](?P<num_y>\d{{4}}|\d{{2}}))?\b)
+  | (?P<daymon>\b(?P<dm_d>\d{{1,2}}){_ORDINAL}[\s-]*(?:of\s+)?(?P<dm_m>{_MONTH})(?:[\s,-]*(?P<dm_y>\d{{4}}))?(?![a-z]))
+  | (?P<monrange>\b(?P<mr_m>{_MONTH})[\s-]*(?P<mr_a>\d{{1,2}}){_ORDINAL}\s*[-–]\s*(?P<mr_b>\d{{1,2}}){_ORDINAL}\b(?:,?\s*(?P<mr_y>\d{{4}})\b)?)
+  | (?P<mondate>\b(?P<md_m>{_MONTH})[\s-]*(?P<md_d>\d{{1,2}}){_ORDINAL}\b(?:,?\s*(?P<md_y>\d{{4}})\b)?)
+  | (?P<rel>\b(?:day\s+after\s+{_TOMORROW}|day\s+before\s+yesterday|today|tdy|{_TOMORROW}|yesterday|yday)\b)
+  | (?P<offset>\b(?:in\s+(?P<off_in>\d{{1,3}})\s+days?|(?P<off_n>\d{{1,3}})\s+days?\s+(?P<off_dir>from\s+now|later|hence|ago))\b)
+  | (?P<weekday>\b(?:(?P<wd_mod>next|last|this|coming)\s+)?(?P<wd_day>{_WEEKDAY})\b)
+  | (?P<day>\b(?P<day_d>\d{{1,2}}){_ORDINAL}\b)
+  | (?P<sep>\b(?:to|till|til|until|through|thru)\b|\s[-–]\s|(?<=[a-z])[-–](?=\d))
+''', re.IGNORECASE | re.VERBOSE)
+
+
+def _relative_offset(phrase):
+    """Days from the reference for 'today', 'tmrw', 'day after tomorrow', ..."""
+    phrase = ' '.join(phrase.lower().split())
+    phrase = _SPELLINGS.sub(lambda m: m.lastgroup, phrase)
+    return RELATIVE_DAYS[phrase]
+
+
+class GrammarMatch(namedtuple('GrammarMatch', ['dates', 'is_range'])):
+    """Dates recognized by the grammar - for a range, `dates` is (start, end)"""
+    __slots__ = ()
+
+    @property
+    def start(self):
+        return self.dates[0]
+
+    @property
+    def end(self):
+        return self.dates[-1]
+
+    def expand(self):
+        """Concrete leave dates - ranges become their working days"""
+        if self.is_range:
+            return get_calendar().working_days_in_range(self.start, self.end)
+        return list(self.dates)
+
+
+_stats = Counter()
+_stats_lock = threading.Lock()
+
+
+def _count(outcome):
+    with _stats_lock:
+        _stats[outcome] += 1
+
+
+def stats():
+    """How often the grammar recognized an input versus handing it on"""
+    with _stats_lock:
+        hits, misses = _stats['hits'], _stats['misses']
+    total = hits + misses
+    return {'hits': hits, 'misses': misses, 'hit_rate': hits / total if total else 0.0}
+
+
+def reset_stats():
+    with _stats_lock:
+        _stats.clear()
+
+
+def _make_date(year, month, day):
+    try:
+        return date(year, month, day)
+    except ValueError:
+        return None
+
+
+def _year(text, reference):
+    if not text:
+        return reference.year
+    year = int(text)
+    return year + 2000 if year < 100 else year
+
+
+def _weekday(modifier, day_name, reference):
+    """Resolve '[next|last|this] <weekday>' relative to the reference date"""
+    target = WEEKDAYS[day_name[:3].lower()]
+    offset = (target - reference.weekday()) % 7
+    modifier = (modifier or '').lower()
+    if modifier == 'last':
+        return reference - timedelta(days=(7 - offset) % 7 or 7)
+    if modifier == 'this':
+        return reference + timedelta(days=offset)
+    # Bare weekday, 'next' and 'coming' mean the upcoming one
+    return reference + timedelta(days=offset or 7)
+
+
+def _token_value(kind, groups, reference):
+    """Turn one token into ('date', date), ('range', (start, end)), ('day', int) or ('sep', None)"""
+    if kind == 'iso':
+        return 'date', _make_date(int(groups['iso_y']), int(groups['iso_m']), int(groups['iso_d']))
+    if kind == 'num':
+        day, month = int(groups['num_d']), int(groups['num_m'])
+        year = _year(groups['num_y'], reference)
+        # DD-MM first, MM-DD when the month would be out of range
+        return 'date', _make_date(year, month, day) or _make_date(year, day, month)
+    if kind in ('dayrange', 'monrange'):
+        prefix = 'dr' if kind == 'dayrange' else 'mr'
+        month = MONTHS[groups[f'{prefix}_m'][:3].lower()]
+        year = _year(groups[f'{prefix}_y'], reference)
+        start = _make_date(year, month, int(groups[f'{prefix}_a']))
+        end = _make_date(year, month, int(groups[f'{prefix}_b']))
+        return 'range', (start, end) if start and end and start <= end else None
+    if kind == 'daymon':
+        month = MONTHS[groups['dm_m'][:3].lower()]
+        return 'date', _make_date(_year(groups['dm_y'], reference), month, int(groups['dm_d']))
+    if kind == 'mondate':
+        month = MONTHS[groups['md_m'][:3].lower()]
+        return 'date', _make_date(_year(groups['md_y'], reference), month, int(groups['md_d']))
+    if kind == 'rel':
+        return 'date', reference + timedelta(days=_relative_offset(groups['rel']))
+    if kind == 'offset':
+        if groups['off_in']:
+            return 'date', reference + timedelta(days=int(groups['off_in']))
+        days = int(groups['off_n'])
+        return 'date', reference + timedelta(days=-days if groups['off_dir'].lower() == 'ago' else days)
+    if kind == 'weekday':
+        return 'date', _weekday(groups['wd_mod'], groups['wd_day'], reference)
+    if kind == 'day':
+        return 'day', int(groups['day_d'])
+    return 'sep', None
+
+
+def _rollover(kind, groups):
+    """How a date token moves forward when it ends a range that would run backwards"""
+    if kind == 'weekday':
+        return 'week'
+    if (kind == 'num' and not groups['num_y']) or (kind == 'daymon' and not groups['dm_y']) \
+            or (kind == 'mondate' and not groups['md_y']):
+        return 'year'
+    return None
+
+
+def tokenize(message, reference=None):
+    """Single left-to-right scan into (kind, value, rollover) tokens"""
+    reference = reference or date.today()
+    tokens = []
+    for match in _TOKEN.finditer(message or ''):
+        # Each outer alternative closes after its inner groups, so lastgroup names it
+        token_kind, groups = match.lastgroup, match.groupdict()
+        kind, value = _token_value(token_kind, groups, reference)
+        if kind in ('date', 'range') and value is None:
+            continue  # e.g. 31-02 - not a real date
+        tokens.append((kind, value, _rollover(token_kind, groups)))
+    return tokens
+
+
+def _roll_forward(value, rollover):
+    if rollover == 'week':
+        return value + timedelta(days=7)
+    if rollover == 'year':
+        return _make_date(value.year + 1, value.month, value.day)
+    return None
+
+
+def extract(message, reference=None):
+    """Recognize the common date shapes in a message - None means 'not ours, try dateparser'
+
+    Shapes: DD-MM[-YYYY], YYYY-MM-DD, 25sep / 25 Sep 2025 / Sep 25,
+    today/tomorrow/yesterday (and tmrw-style spellings), in N days /
+    N days ago, [next|last|this] <weekday>, and '<date> to <date>'
+    (also '1 to 5 oct', 'Oct 20-22', '20-22 Oct').
+    """
+    reference = reference or date.today()
+    tokens = tokenize(message, reference)
+
+    dates = []
+    for i, (kind, value, _) in enumerate(tokens):
+        if kind == 'range':
+            _count('hits')
+            return GrammarMatch(value, True)
+        # X to Y
+        if kind in ('date', 'day') and i + 2 < len(tokens) \
+                and tokens[i + 1][0] == 'sep' and tokens[i + 2][0] == 'date':
+            _, end, rollover = tokens[i + 2]
+            start = value if kind == 'date' else _make_date(end.year, end.month, value)
+            if kind == 'date' and end < start:
+                # 'friday to monday', '28 dec to 2 jan' - the end is in the next week/year
+                end = _roll_forward(end, rollover) or end
+            if start and start <= end:
+                _count('hits')
+                return GrammarMatch((start, end), True)
+        if kind == 'date':
+            dates.append(value)
+
+    if dates:
+        _count('hits')
+        return GrammarMatch(tuple(sorted(set(dates))), False)
+    _count('misses')
+    return None
+
+
+def parse_expression(expression, reference=None):
+    """A single date for a short expression, or None"""
+    match = extract(expression, reference)
+    return match.start if match else None
@@ -0,0 +1,63 @@
+import functools
+from datetime import datetime, date
+from config import Config
+import date_grammar
+
+
+def normalize_expression(expression):
+    """Lower-case and collapse whitespace so equivalent inputs share a cache entry"""
+    return ' '.join(str(expression).lower().split())
+
+
+@functools.lru_cache(maxsize=Config.DATE_CACHE_SIZE)
+def _parse_cached(expression, reference, formats):
+    """Uncached parse - fast-path grammar, explicit formats, then dateparser relative to `reference`"""
+    parsed = date_grammar.parse_expression(expression, reference)
+    if parsed:
+        return parsed
+
+    for fmt in formats:
+        try:
+            parsed = datetime.strptime(expression, fmt)
+        except ValueError:
+            continue
+        # Formats without a year parse as 1900 - use the reference year
+        if parsed.year == 1900:
+            parsed = parsed.replace(year=reference.year)
+        return parsed.date()
+
+    # Imported on first use - it is the slowest module to load
+    import dateparser
+    try:
+        parsed = dateparser.parse(expression, settings={'RELATIVE_BASE': datetime.combine(reference, datetime.min.time())})
+    except Exception:
+        return None
+    return parsed.date() if parsed else None
+
+
+def parse_date(expression, reference=None, formats=()):
+    """Parse a date expression through the shared LRU cache
+
+    The cache key includes the reference date, so 'tomorrow' resolves
+    correctly after midnight.
+    """
+    if not expression or not str(expression).strip():
+        return None
+    reference = reference or date.today()
+    return _parse_cached(normalize_expression(expression), reference, tuple(formats))
+
+
+def cache_stats():
+    """Hit/miss counters for the date cache"""
+    info = _parse_cached.cache_info()
+    lookups = info.hits + info.misses
+    return {
+        'hits': info.hits,
+        'misses': info.misses,
+        'size': info.currsize,
+        'hit_rate': info.hits / lookups if lookups else 0.0,
+    }
+
+
+def clear_cache():
+    _parse_cached.cache_clear()
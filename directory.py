@@ -0,0 +1,171 @@
+import hashlib
+import hmac
+import secrets
+import threading
+import time
+from config import Config
+from ttl_cache import TTLCache
+from lazy_imports import lazy_import
+
+pd = lazy_import('pandas')
+
+
+def hash_password(password, salt=None, iterations=None):
+    """Salted PBKDF2-SHA256 hash encoded as 'pbkdf2_sha256$iterations$salt$hash'"""
+    salt = salt or secrets.token_hex(16)
+    iterations = iterations or Config.PASSWORD_HASH_ITERATIONS
+    digest = hashlib.pbkdf2_hmac('sha256', password.encode('utf-8'), salt.encode('utf-8'), iterations)
+    return f"pbkdf2_sha256${iterations}${salt}${digest.hex()}"
+
+
+def verify_password(password, encoded):
+    """Constant-time check of a password against an encoded hash"""
+    try:
+        algorithm, iterations, salt, expected = encoded.split('$')
+    except (AttributeError, ValueError):
+        return False
+    if algorithm != 'pbkdf2_sha256':
+        return False
+    candidate = hash_password(password, salt, int(iterations))
+    return hmac.compare_digest(candidate.rsplit('$', 1)[1], expected)
+
+
+def _hashes(df):
+    """PasswordHash column as Python values - None where blank or missing"""
+    if 'PasswordHash' not in df.columns:
+        return [None] * len(df)
+    return df['PasswordHash'].astype(object).where(df['PasswordHash'].notna(), None)
+
+
+class UserDirectory:
+    """Hash index of employees (Available sheet) and admin credentials (Admins sheet)"""
+
+    COLUMNS = ['UserId', 'Admin ID', 'PasswordHash']
+    ADMIN_COLUMNS = ['Admin ID', 'PasswordHash']
+
+    def __init__(self, database, default_password=None):
+        self.db = database
+        self._lock = threading.Lock()
+        self._employees = {}  # UserId -> (Admin ID, password hash or None)
+        self._admins = {}     # Admin ID -> password hash or None
+        self._version = None
+        self._last_miss_reload = float('-inf')
+        # IDs that were not found - not looked up again until the entry expires
+        self._unknown = TTLCache(Config.DIRECTORY_NEGATIVE_CACHE_SIZE, Config.DIRECTORY_RELOAD_INTERVAL_SECONDS)
+        # Users without a PasswordHash column value fall back to the default password
+        self._default_hash = hash_password(default_password or Config.DEFAULT_PASSWORD)
+        self.refresh()
+
+    def _read_admins(self):
+        """Admins sheet - empty for workbooks from before admins had credential rows"""
+        try:
+            return self.db.read_sheet('Admins', self.ADMIN_COLUMNS)
+        except ValueError:
+            print("⚠️ No Admins sheet - no admin can log in until `python migrate_admins.py` adds it")
+            return pd.DataFrame(columns=self.ADMIN_COLUMNS)
+
+    def refresh(self, force=False):
+        """Rebuild the index if the workbook changed since the last load"""
+        version = self.db.data_version()
+        if not force and version == self._version:
+            return False
+
+        df = self.db.read_sheet('Available', self.COLUMNS)
+        user_ids = pd.to_numeric(df['UserId'], errors='coerce')
+        admin_ids = pd.to_numeric(df['Admin ID'], errors='coerce')
+        employees = {}
+        for user_id, admin_id, password_hash in zip(user_ids, admin_ids, _hashes(df)):
+            if pd.isna(user_id) or pd.isna(admin_id):
+                continue
+            employees[int(user_id)] = (int(admin_id), password_hash or None)
+
+        # Only IDs with their own row can log in as admin - not every value of the Admin ID column
+        df = self._read_admins()
+        admins = {int(admin_id): password_hash or None
+                  for admin_id, password_hash in zip(pd.to_numeric(df['Admin ID'], errors='coerce'), _hashes(df))
+                  if not pd.isna(admin_id)}
+
+        with self._lock:
+            self._employees = employees
+            self._admins = admins
+            self._version = self.db.data_version()
+        self._unknown.clear()
+        print(f"✅ User directory loaded: {len(employees)} employees, {len(admins)} admins")
+        return True
+
+    def upsert(self, rows):
+        """Add or update employees in the index without re-reading the sheet"""
+        with self._lock:
+            for row in rows:
+                self._employees[int(row['UserId'])] = (int(row['Admin ID']), row.get('PasswordHash') or None)
+                self._unknown.pop(int(row['UserId']))
+
+    def import_employees(self, employees):
+        """Write new employees to the workbook and index them incrementally"""
+        added = self.db.add_employees(employees)
+        self.upsert(added)
+        with self._lock:
+            self._version = self.db.data_version()
+        return added
+
+    def add_admins(self, admins):
+        """Give admins a credential row (or a new PasswordHash) and index it"""
+        written = self.db.add_admins(admins)
+        with self._lock:
+            for row in written:
+                self._admins[row['Admin ID']] = row['PasswordHash']
+                self._unknown.pop(row['Admin ID'])
+            self._version = self.db.data_version()
+        return written
+
+    def _lookup(self, user_id):
+        if user_id in self._admins:
+            return 'admin'
+        if user_id in self._employees:
+            return 'employee'
+        return None
+
+    def _miss_reload_allowed(self):
+        """At most one reload per interval for unknown IDs - a spray of bad IDs cannot keep re-reading"""
+        now = time.monotonic()
+        with self._lock:
+            if now - self._last_miss_reload < Config.DIRECTORY_RELOAD_INTERVAL_SECONDS:
+                return False
+            self._last_miss_reload = now
+            return True
+
+    def role(self, user_id):
+        """'admin', 'employee' or None for unknown IDs"""
+        try:
+            user_id = int(user_id)
+        except (TypeError, ValueError):
+            return None
+
+        role = self._lookup(user_id)
+        if role or self._unknown.get(user_id):
+            return role
+        # Unknown ID - pick up rows written since the last load, then look once more
+        if self._miss_reload_allowed() and self.refresh():
+            role = self._lookup(user_id)
+        if role is None:
+            self._unknown.set(user_id, True)
+        return role
+
+    def admin_for(self, user_id):
+        """Admin ID of an employee, or None"""
+        entry = self._employees.get(int(user_id))
+        return entry[0] if entry else None
+
+    def check_password(self, user_id, password):
+        """Verify a password against the user's salted hash - False for IDs with no row"""
+        user_id = int(user_id)
+        if user_id in self._admins:
+            stored = self._admins[user_id]
+        elif user_id in self._employees:
+            stored = self._employees[user_id][1]
+        else:
+            return False
+        return verify_password(password, stored or self._default_hash)
+
+    def __len__(self):
+        return len(self._employees)
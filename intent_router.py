@@ -0,0 +1,108 @@
+import re
+from collections import namedtuple
+
+
+# Phrases per intent - matched on word boundaries, longest phrase wins at each position
+INTENT_PHRASES = {
+    'apply': ['apply', 'applying', 'apply leave', 'can i apply', 'want to apply', 'need leave', 'application',
+              'request', 'want', 'need', 'would like'],
+    'balance': ['balance', 'remaining', 'available', 'how many', 'leave left', 'left'],
+    'status': ['status', 'application status', 'my applications', 'pending', 'approved', 'my leaves'],
+    'policy': ['policy', 'policies', 'rule', 'rules', 'regulation', 'how to', 'how to apply', 'procedure', 'can i',
+               'what is', 'how many', 'entitlement', 'minimum', 'when can i apply', 'date restriction'],
+    'contact': ['contact', 'hr', 'human resources', 'email', 'phone', 'call', 'reach'],
+    'greeting': ['hello', 'hi', 'hey', 'hola', 'greetings'],
+    'help': ['help', 'what can you do', 'options', 'menu'],
+    'clear_chat': ['clear chat', 'clear history', 'reset chat'],
+    'leave': ['leave', 'leaves', 'off', 'day off', 'days off', 'time off', 'holiday', 'holidays', 'vacation'],
+}
+
+# Phrases that fill the leave_type slot
+LEAVE_TYPE_PHRASES = {
+    'EL': ['el', 'earned', 'earned leave', 'vacation'],
+    'SL': ['sl', 'sick', 'sick leave', 'medical', 'fever', 'illness'],
+    'CL': ['cl', 'casual', 'casual leave', 'emergency', 'personal leave'],
+}
+
+# Tie-break order when two intents match the same number of phrases - status and balance
+# come before apply, whose 'want' / 'need' / 'request' also appear in "the status of my request"
+INTENT_PRIORITY = ['clear_chat', 'status', 'balance', 'apply', 'contact', 'policy', 'help', 'greeting', 'leave']
+
+
+class Route(namedtuple('Route', ['intents', 'leave_type', 'matches'])):
+    """Ranked intents, the leave_type slot and the phrases that matched"""
+    __slots__ = ()
+
+    @property
+    def intent(self):
+        """Best-ranked intent, or None"""
+        return self.intents[0] if self.intents else None
+
+    def has(self, *intents):
+        """True if any of the intents matched"""
+        return any(intent in self.intents for intent in intents)
+
+    def first(self, *intents):
+        """Best-ranked of the given intents, or None - handlers dispatch on this, not on has()"""
+        for intent in self.intents:
+            if intent in intents:
+                return intent
+        return None
+
+
+class IntentRouter:
+    """One compiled word-boundary regex over every phrase - each message is scanned once"""
+
+    def __init__(self, intent_phrases=None, leave_type_phrases=None):
+        intent_phrases = intent_phrases or INTENT_PHRASES
+        leave_type_phrases = leave_type_phrases or LEAVE_TYPE_PHRASES
+
+        # phrase -> (intents, leave_type)
+        self._phrases = {}
+        for intent, phrases in intent_phrases.items():
+            for phrase in phrases:
+                intents, leave_type = self._phrases.get(phrase, ((), None))
+                self._phrases[phrase] = (intents + (intent,), leave_type)
+        for leave_type, phrases in leave_type_phrases.items():
+            for phrase in phrases:
+                intents, _ = self._phrases.get(phrase, ((), None))
+                self._phrases[phrase] = (intents, leave_type)
+
+        # A longer phrase swallows the word 'leave' - keep the leave intent it implies
+        for phrase, (intents, leave_type) in self._phrases.items():
+            if phrase != 'leave' and 'leave' in phrase.split() and 'leave' not in intents:
+                self._phrases[phrase] = (intents + ('leave',), leave_type)
+
+        alternatives = sorted(self._phrases, key=len, reverse=True)
+        self._pattern = re.compile(
+            r'\b(?:' + '|'.join(re.escape(p).replace(r'\ ', r'\s+') for p in alternatives) + r')\b',
+            re.IGNORECASE,
+        )
+
+    def route(self, message):
+        """Scan a message once and return its Route"""
+        hits = {}
+        leave_type = None
+        matches = []
+        for match in self._pattern.finditer(message or ''):
+            phrase = ' '.join(match.group(0).lower().split())
+            intents, phrase_leave_type = self._phrases[phrase]
+            matches.append(phrase)
+            for intent in intents:
+                hits[intent] = hits.get(intent, 0) + 1
+            if leave_type is None and phrase_leave_type:
+                leave_type = phrase_leave_type
+
+        ranked = sorted(hits, key=lambda intent: (-hits[intent], INTENT_PRIORITY.index(intent)))
+        return Route(ranked, leave_type, matches)
+
+
+_default_router = None
+
+
+def route_message(message):
+    """Route a message with the shared router"""
+    global _default_router
+    if _default_router is None:
+        _default_router = IntentRouter()
+    return _default_router.route(message)
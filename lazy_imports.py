@@ -0,0 +1,85 @@
+import importlib
+import subprocess
+import sys
+import threading
+import time
+import types
+from config import Config
+
+
+class LazyModule(types.ModuleType):
+    """Module stand-in that performs the real import on first attribute access"""
+
+    def __init__(self, name):
+        super().__init__(name)
+        self.__dict__['_module'] = None
+
+    def _load(self):
+        module = self.__dict__['_module']
+        if module is None:
+            module = importlib.import_module(self.__name__)
+            self.__dict__['_module'] = module
+        return module
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __dir__(self):
+        return dir(self._load())
+
+
+def lazy_import(name):
+    """Return the module if already imported, else a LazyModule proxy for it"""
+    return sys.modules.get(name) or LazyModule(name)
+
+
+def warm_up(modules=None):
+    """Import deferred modules and prime first-call caches - returns {step: seconds}"""
+    timings = {}
+    for name in modules or Config.WARM_UP_MODULES:
+        start = time.perf_counter()
+        importlib.import_module(name)
+        timings[name] = time.perf_counter() - start
+
+    # dateparser loads its language data on the first parse, not on import
+    start = time.perf_counter()
+    from date_service import parse_date
+    parse_date("in two weeks")
+    timings['dateparser first parse'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    from work_calendar import get_calendar
+    get_calendar()
+    timings['working-day calendar'] = time.perf_counter() - start
+    return timings
+
+
+def warm_up_in_background(modules=None):
+    """Warm up on a daemon thread so the server can start accepting requests first"""
+    def run():
+        timings = warm_up(modules)
+        print(f"🔥 Warm-up finished in {sum(timings.values()):.2f}s")
+
+    thread = threading.Thread(target=run, name="warm-up", daemon=True)
+    thread.start()
+    return thread
+
+
+def measure_import_time(statement):
+    """Seconds a fresh interpreter spends on an import statement"""
+    code = (
+        "import time; start = time.perf_counter(); "
+        f"{statement}; "
+        "print(time.perf_counter() - start)"
+    )
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True,
+                            cwd=Config.BASE_DIR, check=True)
+    return float(result.stdout.strip().splitlines()[-1])
+
+
+if __name__ == "__main__":
+    budget = Config.IMPORT_TIME_BUDGET_SECONDS
+    print(f"⏱️ Import-time budget: {budget:.2f}s")
+    for statement in Config.IMPORT_BUDGET_STATEMENTS:
+        seconds = measure_import_time(statement)
+        print(f"  {'✅' if seconds <= budget else '❌'} {statement}: {seconds:.3f}s")
@@ -0,0 +1,264 @@
+import os
+import io
+import sys
+import json
+import time
+import random
+import shutil
+import argparse
+import tempfile
+import threading
+import contextlib
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from config import Config
+from lazy_imports import lazy_import
+
+pd = lazy_import('pandas')
+
+# Used when no ChatHistory transcripts are supplied - each virtual user replays one script
+SYNTHETIC_SCRIPTS = [
+    ["hello", "what is my leave balance", "show my application status"],
+    ["I want to apply leave", "EL", "next monday to next wednesday", "check my balance"],
+    ["apply leave", "CL", "tomorrow"],
+    ["what are the leave policies", "help"],
+]
+
+LOADTEST_USER_BASE = 900000
+PERCENTILES = (50, 90, 95, 99)
+
+
+class TimedLock:
+    """Wraps the workbook lock and records how long each acquire waited"""
+
+    def __init__(self, lock):
+        self._lock = lock
+        self._waits_lock = threading.Lock()
+        self.waits = []
+
+    def acquire(self, *args, **kwargs):
+        started = time.perf_counter()
+        acquired = self._lock.acquire(*args, **kwargs)
+        waited = time.perf_counter() - started
+        with self._waits_lock:
+            self.waits.append(waited)
+        return acquired
+
+    def release(self):
+        self._lock.release()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+
+def load_transcripts(file_path):
+    """User messages from a ChatHistory sheet, one list per UserID in timestamp order"""
+    df = pd.read_excel(file_path, sheet_name='ChatHistory')
+    df = df[df['Role'] == 'user'].sort_values('Timestamp', kind='stable')
+    transcripts = [group['Message'].astype(str).tolist() for _, group in df.groupby('UserID', sort=False)]
+    return [messages for messages in transcripts if messages]
+
+
+def summarize(samples):
+    """Count, mean, percentiles and max of a list of seconds - in milliseconds"""
+    if not samples:
+        return {'count': 0}
+    values = np.asarray(samples) * 1000.0
+    summary = {'count': int(len(values)), 'mean_ms': round(float(values.mean()), 2)}
+    for p in PERCENTILES:
+        summary[f'p{p}_ms'] = round(float(np.percentile(values, p)), 2)
+    summary['max_ms'] = round(float(values.max()), 2)
+    return summary
+
+
+class LoadTest:
+    """Replays chat transcripts against EnhancedLeaveChatbot on a temp copy of the workbook"""
+
+    def __init__(self, users=200, concurrency=50, rate=20.0, transcripts=None, think_time=0.0,
+                 workbook=None, persistence=None, seed=0, conversation_backend=None):
+        self.users = users
+        self.concurrency = concurrency
+        self.rate = rate
+        self.transcripts = transcripts or SYNTHETIC_SCRIPTS
+        self.think_time = think_time
+        self.workbook = workbook or Config.EXCEL_FILE
+        self.persistence = persistence or Config.CHAT_PERSISTENCE
+        self.conversation_backend = conversation_backend or Config.CONVERSATION_BACKEND
+        self.seed = seed
+
+        self._lock = threading.Lock()
+        self.latencies = []
+        self.errors = []
+
+    def _setup(self, work_dir):
+        """Temp workbook, one load-test employee per virtual user, and the chatbot - all inside work_dir"""
+        from database import LeaveDatabase
+        from chatbot_enhanced import EnhancedLeaveChatbot
+        from conversation_store import create_conversation_store, SQLiteConversationStore
+
+        file_path = os.path.join(work_dir, 'Leave_Data.xlsx')
+        shutil.copyfile(self.workbook, file_path)
+        db = LeaveDatabase(file_path)
+
+        admin_id = int(db.read_sheet('Available', ['Admin ID'])['Admin ID'].iloc[0])
+        db.add_employees([{
+            'UserId': LOADTEST_USER_BASE + i, 'EL': 30, 'SL': 15, 'CL': 10,
+            'Admin ID': admin_id, 'JoinDate': '2020-01-01',
+        } for i in range(self.users)])
+
+        db._write_lock = TimedLock(db._write_lock)
+        if self.conversation_backend == 'sqlite':
+            conversations = SQLiteConversationStore(os.path.join(work_dir, 'conversations.db'))
+        else:
+            conversations = create_conversation_store(self.conversation_backend)
+        return db, EnhancedLeaveChatbot(db, conversations=conversations, persistence=self.persistence)
+
+    def _replay(self, bot, user_id, messages):
+        for message in messages:
+            started = time.perf_counter()
+            try:
+                bot.process_message(str(user_id), message)
+                error = None
+            except Exception as e:
+                error = f"{type(e).__name__}: {e}"
+            elapsed = time.perf_counter() - started
+            with self._lock:
+                self.latencies.append(elapsed)
+                if error:
+                    self.errors.append({'user_id': user_id, 'message': message, 'error': error})
+            if self.think_time:
+                time.sleep(self.think_time)
+
+    def run(self, verbose=False):
+        """Run the replay and return the report dict"""
+        work_dir = tempfile.mkdtemp(prefix='loadtest-')
+        output = contextlib.nullcontext() if verbose else contextlib.redirect_stdout(io.StringIO())
+        bot = None
+        try:
+            with output:
+                db, bot = self._setup(work_dir)
+                arrivals = random.Random(self.seed)
+
+                started = time.perf_counter()
+                with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix='loadtest') as pool:
+                    for i in range(self.users):
+                        messages = self.transcripts[i % len(self.transcripts)]
+                        pool.submit(self._replay, bot, LOADTEST_USER_BASE + i, messages)
+                        if self.rate:
+                            # Poisson arrivals at `rate` users per second
+                            time.sleep(arrivals.expovariate(self.rate))
+                replay_seconds = time.perf_counter() - started
+
+                # Writes still queued by the chat writer are part of the storage cost
+                drain_started = time.perf_counter()
+                bot.chat_log.flush()
+                drain_seconds = time.perf_counter() - drain_started
+                chat_writer = bot.chat_log.stats()
+        finally:
+            # Writer and prefetch threads must be done with the workbook before it is removed
+            if bot is not None:
+                with output:
+                    bot.close()
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+        turns = len(self.latencies)
+        return {
+            'run_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+            'config': {
+                'users': self.users,
+                'concurrency': self.concurrency,
+                'arrival_rate': self.rate,
+                'think_time': self.think_time,
+                'transcripts': len(self.transcripts),
+                'persistence': self.persistence,
+                'conversation_backend': self.conversation_backend,
+                'seed': self.seed,
+            },
+            'turns': turns,
+            'errors': len(self.errors),
+            'error_samples': self.errors[:10],
+            'replay_seconds': round(replay_seconds, 3),
+            'drain_seconds': round(drain_seconds, 3),
+            'throughput_turns_per_s': round(turns / replay_seconds, 2) if replay_seconds else 0.0,
+            'latency': summarize(self.latencies),
+            'lock_wait': summarize(db._write_lock.waits),
+            'chat_writer': chat_writer,
+        }
+
+
+def compare(report, baseline):
+    """Lines showing how a run moved against a baseline report"""
+    lines = []
+    metrics = [
+        ('throughput_turns_per_s', lambda r: r.get('throughput_turns_per_s')),
+        ('latency p50_ms', lambda r: r.get('latency', {}).get('p50_ms')),
+        ('latency p95_ms', lambda r: r.get('latency', {}).get('p95_ms')),
+        ('latency p99_ms', lambda r: r.get('latency', {}).get('p99_ms')),
+        ('lock_wait p95_ms', lambda r: r.get('lock_wait', {}).get('p95_ms')),
+        ('errors', lambda r: r.get('errors')),
+    ]
+    for name, value in metrics:
+        new, old = value(report), value(baseline)
+        if new is None or old is None:
+            continue
+        change = f" ({(new - old) / old * 100:+.1f}%)" if old else ""
+        lines.append(f"  {name}: {old} -> {new}{change}")
+    if report.get('config') != baseline.get('config'):
+        lines.append("  ⚠️ Run configuration differs from the baseline")
+    return lines
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replay chat transcripts against the chatbot and report latency")
+    parser.add_argument('--users', type=int, default=200, help="virtual users (one transcript each)")
+    parser.add_argument('--concurrency', type=int, default=50, help="users replaying at the same time")
+    parser.add_argument('--rate', type=float, default=20.0, help="new users per second (0 = all at once)")
+    parser.add_argument('--think-time', type=float, default=0.0, help="seconds between a user's messages")
+    parser.add_argument('--transcripts', help="workbook whose ChatHistory sheet supplies the transcripts")
+    parser.add_argument('--workbook', help="workbook copied as the test database (default: Config.EXCEL_FILE)")
+    parser.add_argument('--persistence', choices=['async', 'sync'], help="chat persistence mode")
+    parser.add_argument('--conversations', choices=['memory', 'sqlite'],
+                        help="conversation backend - a sqlite store is created inside the temp directory")
+    parser.add_argument('--seed', type=int, default=0, help="arrival-time seed, for comparable runs")
+    parser.add_argument('--report', help="where to write the JSON report")
+    parser.add_argument('--baseline', help="earlier JSON report to compare against")
+    parser.add_argument('--verbose', action='store_true', help="keep the chatbot's own log output")
+    args = parser.parse_args(argv)
+
+    transcripts = load_transcripts(args.transcripts) if args.transcripts else None
+    test = LoadTest(args.users, args.concurrency, args.rate, transcripts, args.think_time,
+                    args.workbook, args.persistence, args.seed, args.conversations)
+    print(f"🚦 Replaying {args.users} users at concurrency {args.concurrency}...")
+    report = test.run(verbose=args.verbose)
+
+    latency, lock_wait = report['latency'], report['lock_wait']
+    print(f"✅ {report['turns']} turns in {report['replay_seconds']}s "
+          f"({report['throughput_turns_per_s']} turns/s), {report['errors']} errors")
+    print(f"⏱️ Latency p50 {latency.get('p50_ms')}ms, p95 {latency.get('p95_ms')}ms, "
+          f"p99 {latency.get('p99_ms')}ms, max {latency.get('max_ms')}ms")
+    print(f"🔒 Lock wait p95 {lock_wait.get('p95_ms')}ms, max {lock_wait.get('max_ms')}ms "
+          f"over {lock_wait['count']} acquisitions; drain {report['drain_seconds']}s")
+
+    report_path = args.report or os.path.join(
+        Config.BASE_DIR, 'loadtest_reports', f"loadtest-{datetime.now().strftime('%Y%m%d-%H%M%S')}.json")
+    os.makedirs(os.path.dirname(report_path) or '.', exist_ok=True)
+    with open(report_path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"💾 Report written to {report_path}")
+
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        print(f"📊 Compared with {args.baseline}:")
+        for line in compare(report, baseline):
+            print(line)
+    return report
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,180 @@
+import re
+import threading
+import time
+import unicodedata
+from collections import namedtuple, Counter
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+from contextlib import contextmanager
+from config import Config
+
+# Control and zero-width characters - replaced before anything else looks at the text
+_INVISIBLE = re.compile(r'[\x00-\x08\x0b-\x1f\x7f-\x9f\u200b-\u200f\u202a-\u202e\u2060-\u206f\ufeff]')
+
+
+class BudgetExceeded(Exception):
+    """The message ran out of its processing time"""
+
+
+class GuardedMessage(namedtuple('GuardedMessage', ['text', 'words', 'truncated', 'original_length'])):
+    """A chat message after normalization - bounded length, bounded words"""
+    __slots__ = ()
+
+    def __str__(self):
+        return self.text
+
+
+def prepare(message, max_length=None, max_word_length=None):
+    """Normalize and bound a raw chat message before any pattern sees it
+
+    NFKC folds look-alike characters, control and zero-width characters
+    become spaces, words longer than `max_word_length` are cut, and the
+    text stops at `max_length` characters on a word boundary.
+    """
+    max_length = max_length or Config.MAX_MESSAGE_LENGTH
+    max_word_length = max_word_length or Config.MAX_WORD_LENGTH
+
+    raw = str(message or '')
+    # Cut before normalizing - NFKC can only grow a string a few times over
+    text = unicodedata.normalize('NFKC', raw[:max_length * 2])
+    text = _INVISIBLE.sub(' ', text)
+
+    words = []
+    length = 0
+    truncated = len(raw) > max_length * 2
+    for word in text.split():
+        if len(word) > max_word_length:
+            word = word[:max_word_length]
+            truncated = True
+        if length + len(word) > max_length:
+            truncated = True
+            break
+        words.append(word)
+        length += len(word) + 1
+
+    return GuardedMessage(' '.join(words), tuple(words), truncated, len(raw))
+
+
+class Budget:
+    """Wall-clock deadline for processing one message - `clock` is injectable for tests"""
+
+    def __init__(self, seconds=None, clock=None):
+        self.seconds = Config.MESSAGE_TIME_BUDGET_SECONDS if seconds is None else seconds
+        self._clock = clock or time.perf_counter
+        self.deadline = self._clock() + self.seconds
+
+    def remaining(self):
+        return max(0.0, self.deadline - self._clock())
+
+    @property
+    def expired(self):
+        return self.remaining() <= 0
+
+
+_local = threading.local()
+_stats = Counter()
+_stats_lock = threading.Lock()
+_executor = None
+_in_flight = 0
+_executor_lock = threading.Lock()
+
+
+def _count(outcome):
+    with _stats_lock:
+        _stats[outcome] += 1
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=Config.GUARD_WORKERS, thread_name_prefix='guard')
+        return _executor
+
+
+def _take_worker():
+    """Claim a guard worker if one is free - never queue behind a busy pool"""
+    global _in_flight
+    with _executor_lock:
+        if _in_flight >= Config.GUARD_WORKERS:
+            return False
+        _in_flight += 1
+        return True
+
+
+def _free_worker(_future=None):
+    global _in_flight
+    with _executor_lock:
+        _in_flight -= 1
+
+
+def in_flight():
+    """Guard workers still running a call, including calls their callers gave up on"""
+    with _executor_lock:
+        return _in_flight
+
+
+@contextmanager
+def message_budget(seconds=None, clock=None):
+    """Give the calls made in this block one shared deadline - not for use across a yield"""
+    previous = getattr(_local, 'budget', None)
+    _local.budget = budget = Budget(seconds, clock)
+    try:
+        yield budget
+    finally:
+        _local.budget = previous
+
+
+def current_budget():
+    """The deadline of the message this thread is processing, or None"""
+    return getattr(_local, 'budget', None)
+
+
+def call_with_budget(func, *args, **kwargs):
+    """Run a slow call (e.g. dateparser) within the current message's remaining time
+
+    The call runs on a guard thread so the chat worker can walk away from
+    it; BudgetExceeded means the caller should degrade, not fail. With no
+    budget active the call simply runs inline.
+
+    A call that runs over keeps its guard thread until it returns - Python
+    threads cannot be stopped - so callers must bound the work they hand
+    off. While every guard thread is busy, new calls fail at once instead
+    of queueing behind them.
+    """
+    budget = current_budget()
+    if budget is None:
+        return func(*args, **kwargs)
+    name = getattr(func, '__name__', repr(func))
+    if budget.expired:
+        _count('skipped')
+        raise BudgetExceeded(f"no time left for {name}")
+
+    if not _take_worker():
+        _count('busy')
+        raise BudgetExceeded(f"no guard worker free for {name}")
+    try:
+        future = _get_executor().submit(func, *args, **kwargs)
+    except BaseException:
+        _free_worker()
+        raise
+    # The worker is freed when the call really ends, not when this caller gives up on it
+    future.add_done_callback(_free_worker)
+    try:
+        result = future.result(timeout=budget.remaining())
+    except TimeoutError:
+        _count('timeouts')
+        print(f"⏱️ {name} ran past the {budget.seconds}s message budget")
+        raise BudgetExceeded(f"{name} timed out")
+    _count('completed')
+    return result
+
+
+def stats():
+    """Slow calls completed, timed out, skipped because the budget was spent, or refused while the pool was full"""
+    with _stats_lock:
+        return {outcome: _stats[outcome] for outcome in ('completed', 'timeouts', 'skipped', 'busy')}
+
+
+def reset_stats():
+    with _stats_lock:
+        _stats.clear()
@@ -0,0 +1,44 @@
+import sys
+import argparse
+from database import LeaveDatabase
+from directory import hash_password
+from lazy_imports import lazy_import
+
+pd = lazy_import('pandas')
+
+
+def create_admins_sheet(db, password=None):
+    """One-off migration: give every admin named in the Available sheet a row in a new Admins sheet
+
+    Workbooks from before admins had credential rows have no Admins sheet,
+    and no admin can log in until it exists. Without `password` the rows
+    have no PasswordHash and use Config.DEFAULT_PASSWORD. Returns the rows
+    written, or [] if the sheet already exists.
+    """
+    try:
+        db.read_sheet('Admins', ['Admin ID'])
+        print("✅ Admins sheet already exists - nothing to migrate")
+        return []
+    except ValueError:
+        pass
+
+    df = db.read_sheet('Available', ['Admin ID'])
+    admin_ids = pd.to_numeric(df['Admin ID'], errors='coerce').dropna().astype(int).unique()
+    password_hash = hash_password(password) if password else None
+    written = db.add_admins([{'Admin ID': int(admin_id), 'PasswordHash': password_hash} for admin_id in admin_ids])
+    print(f"✅ Created credential rows for {len(written)} admins")
+    if not password_hash:
+        print("⚠️ The new admin rows have no PasswordHash - they log in with the default password until one is set")
+    return written
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Add the Admins credential sheet to an older workbook")
+    parser.add_argument('--workbook', help="workbook to migrate (default: Config.EXCEL_FILE)")
+    parser.add_argument('--password', help="initial password hashed into every new admin row")
+    args = parser.parse_args(argv)
+    return create_admins_sheet(LeaveDatabase(args.workbook), args.password)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,106 @@
+import os
+import sys
+import json
+import hashlib
+import argparse
+from datetime import datetime
+from config import Config
+
+
+def file_hash(path, chunk_size=1 << 16):
+    """SHA-256 of a file's content"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def load(digest, parser_version, cache_file=None):
+    """Cached extraction for a PDF hash and parser version, or None if missing or out of date"""
+    cache_file = cache_file or Config.POLICY_CACHE_FILE
+    try:
+        with open(cache_file, 'r', encoding='utf-8') as f:
+            entry = json.load(f)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as e:
+        print(f"⚠️ Ignoring unreadable policy cache {cache_file}: {e}")
+        return None
+
+    if entry.get('pdf_sha256') != digest or entry.get('parser_version') != parser_version:
+        return None
+    return entry
+
+
+def save(digest, parser_version, pages, rules, contact_info, cache_file=None):
+    """Write the extraction next to its key - replaced atomically so readers never see half a file"""
+    cache_file = cache_file or Config.POLICY_CACHE_FILE
+    entry = {
+        'pdf_sha256': digest,
+        'parser_version': parser_version,
+        'created_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        'pages': pages,
+        'rules': rules,
+        'contact_info': contact_info,
+    }
+    tmp_path = f"{cache_file}.{os.getpid()}.tmp"
+    try:
+        os.makedirs(os.path.dirname(cache_file) or '.', exist_ok=True)
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(entry, f, indent=2)
+        os.replace(tmp_path, cache_file)
+        print(f"💾 Policy cache written to {cache_file}")
+        return True
+    except OSError as e:
+        # A read-only deployment still works - it just parses the PDF on every start
+        print(f"⚠️ Could not write policy cache {cache_file}: {e}")
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        return False
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build or check the parsed policy cache for the leave policy PDF")
+    parser.add_argument('command', choices=['build', 'status'])
+    parser.add_argument('--pdf', help="policy PDF (default: Config.PDF_FILE)")
+    parser.add_argument('--cache', help="cache file (default: Config.POLICY_CACHE_FILE)")
+    parser.add_argument('--force', action='store_true', help="re-parse even if the cache is current")
+    args = parser.parse_args(argv)
+
+    if args.pdf:
+        Config.PDF_FILE = args.pdf
+    if args.cache:
+        Config.POLICY_CACHE_FILE = args.cache
+
+    from rag_system import LeavePolicyRAG
+
+    if not os.path.exists(Config.PDF_FILE):
+        print(f"❌ Policy PDF not found: {Config.PDF_FILE}")
+        return 1
+    digest = file_hash(Config.PDF_FILE)
+    entry = load(digest, LeavePolicyRAG.PARSER_VERSION)
+
+    if args.command == 'status':
+        if entry:
+            print(f"✅ Cache is current for {Config.PDF_FILE} (built {entry['created_at']}, "
+                  f"{len(entry['pages'])} pages)")
+            return 0
+        print(f"⚠️ Cache is missing or stale for {Config.PDF_FILE}")
+        return 1
+
+    if entry and not args.force:
+        print(f"✅ Cache is already current for {Config.PDF_FILE}")
+        return 0
+    if entry and os.path.exists(Config.POLICY_CACHE_FILE):
+        os.remove(Config.POLICY_CACHE_FILE)
+    rag = LeavePolicyRAG(None)
+    if not load(digest, LeavePolicyRAG.PARSER_VERSION):
+        print("❌ Policy cache was not written")
+        return 1
+    print(f"✅ Policy cache built: {len(rag.policy_pages)} pages, parser version {LeavePolicyRAG.PARSER_VERSION}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,152 @@
+import re
+import math
+import heapq
+import time
+from collections import namedtuple, Counter
+from config import Config
+
+_WORD = re.compile(r'[a-z0-9]+')
+# PDF bullet glyphs - each bullet starts a new sentence
+_BULLET = re.compile(r'[\x7f■•●]')
+_HEADING = re.compile(r'^\s*(\d{1,2})\.\s+([A-Z][^.]{0,60})$')
+_SENTENCE_END = re.compile(r'(?<=[.!?])\s+(?=[A-Z0-9])')
+_STOPWORDS = frozenset((
+    'a', 'an', 'and', 'are', 'as', 'at', 'be', 'by', 'can', 'do', 'does', 'for', 'from', 'how', 'i',
+    'if', 'in', 'is', 'it', 'its', 'me', 'my', 'of', 'on', 'or', 'the', 'this', 'to', 'what', 'when',
+    'which', 'who', 'will', 'with', 'you', 'your', 'about', 'any', 'all', 'there', 'their', 'tell',
+))
+# Hits scoring below this share of the best one only matched a common word like 'leave'
+_RELATIVE_CUTOFF = 0.25
+
+
+class Passage(namedtuple('Passage', ['page', 'section', 'text', 'source'])):
+    """A few sentences of the policy document with where they came from"""
+    __slots__ = ()
+
+    @property
+    def citation(self):
+        return f"{self.source} p.{self.page}"
+
+
+class SearchHit(namedtuple('SearchHit', ['passage', 'score'])):
+    __slots__ = ()
+
+
+def tokenize(text):
+    """Lower-case index terms - stopwords dropped, plural 's' folded ('leaves' matches 'leave')"""
+    terms = []
+    for word in _WORD.findall(text.lower()):
+        if word in _STOPWORDS:
+            continue
+        if len(word) > 3 and word.endswith('s') and not word.endswith('ss'):
+            word = word[:-1]
+        terms.append(word)
+    return terms
+
+
+def _sections(page_text):
+    """(heading, body) pairs of a page - text before the first numbered heading has heading ''"""
+    heading, lines = '', []
+    for line in page_text.splitlines():
+        match = _HEADING.match(line)
+        if match:
+            if lines:
+                yield heading, ' '.join(lines)
+            heading, lines = f"{match.group(1)}. {match.group(2).strip()}", []
+        else:
+            lines.append(line)
+    if lines:
+        yield heading, ' '.join(lines)
+
+
+def chunk_pages(pages, max_words=None, source=None):
+    """Split page texts into passages of whole sentences, never across a section or page"""
+    max_words = max_words or Config.POLICY_PASSAGE_WORDS
+    source = source or 'rules.pdf'
+    passages = []
+    for page_num, page_text in enumerate(pages, 1):
+        for heading, body in _sections(page_text or ''):
+            sentences = []
+            for part in _BULLET.split(body):
+                sentences.extend(s for s in _SENTENCE_END.split(' '.join(part.split())) if s)
+
+            chunk, words = [], 0
+            for sentence in sentences:
+                length = len(sentence.split())
+                if chunk and words + length > max_words:
+                    passages.append(Passage(page_num, heading, ' '.join(chunk), source))
+                    chunk, words = [], 0
+                chunk.append(sentence)
+                words += length
+            if chunk:
+                passages.append(Passage(page_num, heading, ' '.join(chunk), source))
+    return passages
+
+
+class PolicyIndex:
+    """BM25 inverted index over policy passages, built once at load time
+
+    Each posting stores the finished BM25 weight of its term in that
+    passage, so a query is only dictionary lookups and additions over the
+    postings of its own terms.
+    """
+
+    def __init__(self, passages, k1=1.5, b=0.75):
+        self.passages = list(passages)
+        self._postings = {}
+
+        doc_terms = [Counter(tokenize(f"{p.section} {p.text}")) for p in self.passages]
+        lengths = [sum(terms.values()) for terms in doc_terms]
+        avg_length = sum(lengths) / len(lengths) if lengths else 0.0
+
+        doc_freq = Counter()
+        for terms in doc_terms:
+            doc_freq.update(terms.keys())
+
+        count = len(self.passages)
+        for doc_id, terms in enumerate(doc_terms):
+            norm = k1 * (1 - b + b * lengths[doc_id] / avg_length) if avg_length else k1
+            for term, tf in terms.items():
+                idf = math.log(1 + (count - doc_freq[term] + 0.5) / (doc_freq[term] + 0.5))
+                self._postings.setdefault(term, []).append((doc_id, idf * tf * (k1 + 1) / (tf + norm)))
+
+    @classmethod
+    def from_pages(cls, pages, max_words=None, source=None):
+        return cls(chunk_pages(pages, max_words, source))
+
+    def __len__(self):
+        return len(self.passages)
+
+    def search(self, query, k=None):
+        """Top-k passages for a question, best first - [] when no term matches"""
+        k = k or Config.POLICY_SEARCH_TOP_K
+        scores = {}
+        for term in set(tokenize(query)):
+            for doc_id, weight in self._postings.get(term, ()):
+                scores[doc_id] = scores.get(doc_id, 0.0) + weight
+        best = heapq.nlargest(k, scores.items(), key=lambda item: item[1])
+        return [SearchHit(self.passages[doc_id], score) for doc_id, score in best
+                if score >= best[0][1] * _RELATIVE_CUTOFF]
+
+
+BENCH_QUESTIONS = (
+    "how many days of casual leave per year",
+    "is maternity leave paid",
+    "medical certificate for sick leave",
+    "compensatory off for weekend work",
+)
+
+
+def benchmark(index, questions=BENCH_QUESTIONS, repeat=1000):
+    """Mean microseconds per search, each question searched `repeat` times"""
+    started = time.perf_counter()
+    for _ in range(repeat):
+        for question in questions:
+            index.search(question)
+    return (time.perf_counter() - started) / (repeat * len(questions)) * 1e6
+
+
+if __name__ == "__main__":
+    from rag_system import LeavePolicyRAG
+    index = LeavePolicyRAG(None).policy_index
+    print(f"⏱️ {benchmark(index):.1f} µs per search over {len(index)} passages")
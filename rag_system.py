@@ -1,20 +1,31 @@
 import os
-import pandas as pd
-from datetime import datetime, timedelta
-import dateparser
-import PyPDF2
+from datetime import datetime
 import re
 from config import Config
+from intent_router import route_message
+import date_engine
+from chat_writer import get_chat_writer
+from turn_context import TurnContext
+from message_guard import prepare, message_budget
+import policy_cache
+import policy_search
 
 class LeavePolicyRAG:
+    # Bump whenever extraction or _parse_policy_text changes - older cache files are rebuilt
+    PARSER_VERSION = 2
+    
     def __init__(self, database):
         self.db = database
-        self.policy_knowledge = self._load_policy_from_pdf()
+        # Defaults first - parsing the PDF overrides what it finds
         self.contact_info = self._load_contact_info()
-        print("✅ Policy system initialized with PDF rules")
+        self.policy_pages = []
+        self.policy_knowledge = self._load_policy_from_pdf()
+        self.policy_index = policy_search.PolicyIndex.from_pages(
+            self.policy_pages, source=os.path.basename(Config.PDF_FILE))
+        print(f"✅ Policy system initialized with PDF rules ({len(self.policy_index)} passages indexed)")
     
     def _load_policy_from_pdf(self):
-        """Load policy rules from PDF file"""
+        """Load policy rules from the parse cache, or from the PDF file when it changed"""
         try:
             pdf_path = Config.PDF_FILE
             print(f"📖 Attempting to load PDF from: {pdf_path}")
@@ -23,7 +34,16 @@ class LeavePolicyRAG:
                 print(f"⚠️ PDF file not found: {pdf_path}. Using default rules.")
                 return self._get_default_rules()
             
-            policy_text = self._extract_text_from_pdf(pdf_path)
+            digest = policy_cache.file_hash(pdf_path)
+            cached = policy_cache.load(digest, self.PARSER_VERSION)
+            if cached:
+                self.policy_pages = cached['pages']
+                self.contact_info.update(cached['contact_info'])
+                print(f"⚡ Policy rules loaded from cache ({len(self.policy_pages)} pages, no PDF parsing)")
+                return cached['rules']
+            
+            self.policy_pages = self._extract_pages_from_pdf(pdf_path)
+            policy_text = self._join_pages(self.policy_pages)
             print(f"📄 Extracted {len(policy_text)} characters from PDF")
             
             if not policy_text or len(policy_text.strip()) < 50:
@@ -31,6 +51,7 @@ class LeavePolicyRAG:
                 return self._get_default_rules()
             
             structured_rules = self._parse_policy_text(policy_text)
+            policy_cache.save(digest, self.PARSER_VERSION, self.policy_pages, structured_rules, self.contact_info)
             
             print(f"✅ Successfully loaded policy rules from PDF")
             print(f"   - EL Rules: {len(structured_rules['EL'])} parameters")
@@ -45,25 +66,30 @@ class LeavePolicyRAG:
             traceback.print_exc()
             return self._get_default_rules()
     
-    def _extract_text_from_pdf(self, pdf_path):
-        """Extract text from PDF file with better error handling"""
-        text = ""
+    def _extract_pages_from_pdf(self, pdf_path):
+        """Text of each PDF page - '' for pages that cannot be read"""
+        pages = []
         try:
+            import PyPDF2  # deferred - only needed when the policy PDF is parsed
             with open(pdf_path, 'rb') as file:
                 pdf_reader = PyPDF2.PdfReader(file)
                 print(f"📑 PDF has {len(pdf_reader.pages)} pages")
                 
                 for page_num, page in enumerate(pdf_reader.pages):
-                    page_text = page.extract_text()
-                    if page_text:
-                        text += f"Page {page_num + 1}: {page_text}\n\n"
-                    else:
+                    page_text = page.extract_text() or ""
+                    if not page_text:
                         print(f"⚠️ Page {page_num + 1} appears to be empty or unreadable")
+                    pages.append(page_text)
                 
-            return text
+            return pages
         except Exception as e:
             print(f"❌ Error reading PDF file: {e}")
-            return ""
+            return []
+    
+    @staticmethod
+    def _join_pages(pages):
+        """One text with 'Page N:' markers, the form _parse_policy_text reads"""
+        return "".join(f"Page {page_num}: {text}\n\n" for page_num, text in enumerate(pages, 1) if text)
     
     def _parse_policy_text(self, policy_text):
         """Parse PDF text into structured policy rules with improved parsing"""
@@ -75,32 +101,38 @@ class LeavePolicyRAG:
         
         print("🔍 Parsing PDF content for policy rules...")
         
+        # PDF lines break mid-phrase ('Casual\nLeave') - match on collapsed whitespace
+        policy_text = ' '.join(policy_text.split())
         # Convert to lowercase for easier matching but keep original for display
         text_lower = policy_text.lower()
         
-        # Enhanced pattern matching for leave rules
+        # Enhanced pattern matching for leave rules - every gap is bounded and stays inside
+        # one sentence, so a long or odd document cannot make the scans backtrack for long
         leave_patterns = {
             'EL': {
                 'keywords': ['earned leave', 'el', 'annual leave', 'vacation leave'],
-                'max_days': [r'earned leave.*?(\d+).*?days', r'el.*?(\d+).*?days', r'annual leave.*?(\d+)'],
-                'notice': [r'notice.*?(\d+).*?days', r'advance.*?(\d+).*?days'],
-                'carry_over': [r'carry over.*?(yes|no|allowed|not allowed)'],
-                'purpose': [r'earned leave.*?for.*?([^.]*?\.)'],
-                'min_days': [r'minimum.*?(\d+).*?days', r'at least.*?(\d+).*?days']
+                'max_days': [r'earned leave[^.]{0,80}?(\d+)[^.]{0,40}?days', r'\bel\b[^.]{0,80}?(\d+)[^.]{0,40}?days',
+                             r'annual leave[^.]{0,80}?(\d+)'],
+                'notice': [r'notice[^.]{0,80}?(\d+)[^.]{0,40}?days', r'advance[^.]{0,80}?(\d+)[^.]{0,40}?days'],
+                'carry_over': [r'carry over[^.]{0,80}?(yes|no|allowed|not allowed)'],
+                'purpose': [r'earned leave[^.]{0,80}?\bfor\b([^.]{0,200}\.)'],
+                'min_days': [r'minimum[^.]{0,80}?(\d+)[^.]{0,40}?days', r'at least[^.]{0,80}?(\d+)[^.]{0,40}?days']
             },
             'SL': {
                 'keywords': ['sick leave', 'sl', 'medical leave'],
-                'max_days': [r'sick leave.*?(\d+).*?days', r'sl.*?(\d+).*?days', r'medical leave.*?(\d+)'],
-                'notice': [r'sick leave.*?notice.*?(\d+)', r'immediate.*?sick'],
-                'medical_certificate': [r'medical certificate.*?(required|not required)'],
-                'purpose': [r'sick leave.*?for.*?([^.]*?\.)']
+                'max_days': [r'sick leave[^.]{0,80}?(\d+)[^.]{0,40}?days', r'\bsl\b[^.]{0,80}?(\d+)[^.]{0,40}?days',
+                             r'medical leave[^.]{0,80}?(\d+)'],
+                'notice': [r'sick leave[^.]{0,80}?notice[^.]{0,80}?(\d+)', r'immediate[^.]{0,80}?sick'],
+                'medical_certificate': [r'medical certificate[^.]{0,80}?(required|not required)'],
+                'purpose': [r'sick leave[^.]{0,80}?\bfor\b([^.]{0,200}\.)']
             },
             'CL': {
                 'keywords': ['casual leave', 'cl', 'emergency leave'],
-                'max_days': [r'casual leave.*?(\d+).*?days', r'cl.*?(\d+).*?days'],
-                'notice': [r'casual leave.*?notice.*?(\d+)'],
-                'max_consecutive': [r'maximum.*?(\d+).*?consecutive', r'not more than.*?(\d+).*?days'],
-                'purpose': [r'casual leave.*?for.*?([^.]*?\.)']
+                'max_days': [r'casual leave[^.]{0,80}?(\d+)[^.]{0,40}?days', r'\bcl\b[^.]{0,80}?(\d+)[^.]{0,40}?days'],
+                'notice': [r'casual leave[^.]{0,80}?notice[^.]{0,80}?(\d+)'],
+                'max_consecutive': [r'maximum[^.]{0,80}?(\d+)[^.]{0,40}?consecutive',
+                                    r'not more than[^.]{0,80}?(\d+)[^.]{0,40}?days'],
+                'purpose': [r'casual leave[^.]{0,80}?\bfor\b([^.]{0,200}\.)']
             }
         }
         
@@ -169,9 +201,9 @@ class LeavePolicyRAG:
         
         # Extract contact information if present
         contact_patterns = {
-            'hr_email': [r'hr.*?@.*?\.com', r'email.*?@.*?\.com', r'contact.*?@.*?\.com'],
-            'hr_phone': [r'phone.*?(\d{10})', r'contact.*?(\d{10})', r'\b\d{10}\b'],
-            'hr_name': [r'hr manager.*?([a-zA-Z ]+)', r'human resources.*?([a-zA-Z ]+)']
+            'hr_email': [r'[\w.+-]{1,64}@[\w-]{1,63}(?:\.[\w-]{1,63}){0,3}\.com\b'],
+            'hr_phone': [r'phone[^\n]{0,40}?(\d{10})', r'contact[^\n]{0,40}?(\d{10})', r'\b\d{10}\b'],
+            'hr_name': [r'hr manager[\s:-]{0,5}([a-zA-Z ]{1,60})', r'human resources[\s:-]{0,5}([a-zA-Z ]{1,60})']
         }
         
         for contact_type, patterns in contact_patterns.items():
@@ -280,49 +312,80 @@ class LeavePolicyRAG:
         
         return validation_errors
     
+    def search_policy(self, question, k=None):
+        """Top-k policy passages for a question, best first"""
+        return self.policy_index.search(question, k)
+    
     def query_policy(self, question):
-        """Answer policy questions using PDF-based knowledge"""
+        """Answer a policy question from the top-k PDF passages, with their page numbers
+
+        The rule summary for the leave type or topic asked about follows the
+        passages; with no matching passage it answers alone. Sources cite
+        the quoted pages, and rules.pdf only when a summary is included.
+        """
         question_lower = question.lower()
+        hits = self.search_policy(question_lower)
+        summary = self._policy_summary(question_lower)
+        
+        if not hits:
+            return summary or self._handle_general_query(question), ["rules.pdf"]
+        
+        answer = self._format_passages_response(hits)
+        sources = list(dict.fromkeys(hit.passage.citation for hit in hits))
+        if summary:
+            answer = f"{answer}\n\n{summary}"
+            sources.append("rules.pdf")
+        return answer, sources
+    
+    def _policy_summary(self, question_lower):
+        """Rule summary for the topic of a question, or None"""
+        route = route_message(question_lower)
         
         # Contact information queries
-        if any(word in question_lower for word in ['contact', 'hr', 'human resources', 'email', 'phone', 'call', 'reach']):
-            return self._format_contact_response(), ["rules.pdf"]
+        if route.has('contact'):
+            return self._format_contact_response()
         
         # Date restriction queries
         if any(word in question_lower for word in ['when can i apply', 'date restriction', 'time limit', 'advance notice']):
-            return self._format_date_restrictions_response(), ["rules.pdf"]
+            return self._format_date_restrictions_response()
         
         # EL (Earned Leave) queries
-        if any(word in question_lower for word in ['el', 'earned leave', 'earned', 'vacation']):
-            rules = self.policy_knowledge["EL"]
-            answer = self._format_el_response(rules)
+        if route.leave_type == 'EL':
+            return self._format_el_response(self.policy_knowledge["EL"])
         
         # SL (Sick Leave) queries
-        elif any(word in question_lower for word in ['sl', 'sick leave', 'sick', 'medical', 'illness']):
-            rules = self.policy_knowledge["SL"]
-            answer = self._format_sl_response(rules)
+        if route.leave_type == 'SL':
+            return self._format_sl_response(self.policy_knowledge["SL"])
         
         # CL (Casual Leave) queries
-        elif any(word in question_lower for word in ['cl', 'casual leave', 'casual', 'emergency', 'personal leave']):
-            rules = self.policy_knowledge["CL"]
-            answer = self._format_cl_response(rules)
+        if route.leave_type == 'CL':
+            return self._format_cl_response(self.policy_knowledge["CL"])
         
         # General policy queries
-        elif any(word in question_lower for word in ['policy', 'rule', 'how to apply', 'procedure']):
-            answer = self._format_general_response()
+        if any(word in question_lower for word in ['policy', 'rule', 'how to apply', 'procedure']):
+            return self._format_general_response()
         
         # Specific number queries
-        elif any(word in question_lower for word in ['how many', 'entitlement', 'days']):
-            answer = self._handle_entitlement_query(question_lower)
+        if any(word in question_lower for word in ['how many', 'entitlement', 'days']):
+            return self._handle_entitlement_query(question_lower)
         
         # Minimum days queries
-        elif any(word in question_lower for word in ['minimum', 'min days', 'at least']):
-            answer = self._handle_minimum_days_query(question_lower)
-        
-        else:
-            answer = self._handle_general_query(question)
+        if any(word in question_lower for word in ['minimum', 'min days', 'at least']):
+            return self._handle_minimum_days_query(question_lower)
         
-        return answer, ["rules.pdf"]
+        return None
+    
+    def _format_passages_response(self, hits):
+        """Quote the retrieved policy passages with their page numbers"""
+        lines = ["📄 **From the company leave policy:**", ""]
+        for hit in hits:
+            passage = hit.passage
+            title = f"{passage.section} " if passage.section else ""
+            lines.append(f"**{title}(page {passage.page})**")
+            lines.append(f"> {passage.text}")
+            lines.append("")
+        lines.append(f"📞 *For clarification, contact HR: {self.contact_info['hr_email']}*")
+        return "\n".join(lines)
     
     def _format_date_restrictions_response(self):
         """Format date restrictions response"""
@@ -566,54 +629,69 @@ class LeaveAgent:
     def __init__(self, database, rag_system):
         self.db = database
         self.rag = rag_system
+        self.chat_log = get_chat_writer(database)
     
     def process_message(self, user_id, message):
         """Process user message with PDF-based policy responses"""
-        # Save user message to database
-        self.db.save_chat_message(user_id, 'user', message)
+        message = prepare(message).text
+        try:
+            with message_budget():
+                answer = self._answer(user_id, message)
+        except Exception:
+            # No reply - still keep the user's message
+            self.chat_log.save_turn(user_id, message, None)
+            raise
         
-        message_lower = message.lower()
+        # Save user message and assistant response - the answer does not wait for the write
+        self.chat_log.save_turn(user_id, message, answer)
+        
+        return answer
+    
+    def _answer(self, user_id, message):
+        """Route a message to the matching handler"""
+        # The best-ranked intent wins - "status of my request" is a status query, not an application
+        intent = route_message(message).first(
+            'policy', 'contact', 'balance', 'apply', 'leave', 'status', 'greeting', 'help', 'clear_chat')
+        # User data read during this turn is loaded once and shared by every step
+        turn = TurnContext(self.db, user_id, self.chat_log)
         
         # Handle policy queries (including contact info)
-        if any(word in message_lower for word in ['policy', 'rule', 'how many', 'entitlement', 'can i', 'what is', 'how to', 'contact', 'hr', 'email', 'phone', 'minimum', 'when can i apply', 'date restriction']):
+        if intent in ('policy', 'contact'):
             answer, sources = self.rag.query_policy(message)
         
         # Handle balance inquiries
-        elif any(word in message_lower for word in ['balance', 'remaining', 'left', 'available']):
-            answer = self._get_balance_response(user_id)
+        elif intent == 'balance':
+            answer = self._get_balance_response(turn)
         
         # Handle leave applications
-        elif any(word in message_lower for word in ['apply', 'leave', 'vacation', 'off', 'holiday']):
-            answer = self._handle_leave_application(user_id, message)
+        elif intent in ('apply', 'leave'):
+            answer = self._handle_leave_application(turn, message)
         
         # Handle status inquiries
-        elif any(word in message_lower for word in ['status', 'pending', 'approved', 'my leaves']):
-            answer = self._get_status_response(user_id)
+        elif intent == 'status':
+            answer = self._get_status_response(turn)
         
         # Greeting
-        elif any(word in message_lower for word in ['hi', 'hello', 'hey']):
-            answer = self._get_greeting_response(user_id)
+        elif intent == 'greeting':
+            answer = self._get_greeting_response(turn)
         
         # Help
-        elif any(word in message_lower for word in ['help', 'what can you do']):
+        elif intent == 'help':
             answer = self._get_help_response()
         
         # Clear chat history
-        elif any(word in message_lower for word in ['clear chat', 'clear history', 'reset chat']):
+        elif intent == 'clear_chat':
             answer = self._clear_chat_history(user_id)
         
         else:
             # Use policy system for general queries
             answer, sources = self.rag.query_policy(message)
         
-        # Save assistant response to database
-        self.db.save_chat_message(user_id, 'assistant', answer)
-        
         return answer
     
     def get_chat_history(self, user_id):
         """Get formatted chat history for display"""
-        chat_records = self.db.get_chat_history(user_id)
+        chat_records = self.chat_log.get_chat_history(user_id)
         
         if not chat_records:
             return []
@@ -623,17 +701,17 @@ class LeaveAgent:
         current_user_msg = None
         
         for record in chat_records:
-            if record['Role'] == 'user':
-                current_user_msg = record['Message']
-            elif record['Role'] == 'assistant' and current_user_msg is not None:
-                gradio_history.append([current_user_msg, record['Message']])
+            if record.role == 'user':
+                current_user_msg = record.message
+            elif record.role == 'assistant' and current_user_msg is not None:
+                gradio_history.append([current_user_msg, record.message])
                 current_user_msg = None
         
         return gradio_history
     
     def _clear_chat_history(self, user_id):
         """Clear chat history for user"""
-        success = self.db.clear_chat_history(user_id)
+        success = self.chat_log.clear_chat_history(user_id)
         if success:
             return "🗑️ **Chat history cleared!**\n\nYour conversation history has been reset. Start a new conversation!"
         else:
@@ -648,13 +726,7 @@ class LeaveAgent:
         print(f"🔍 Processing leave request: '{message_lower}'")
         
         # Determine leave type
-        leave_type = None
-        if any(word in message_lower for word in ['el', 'earned leave', 'earned', 'vacation']):
-            leave_type = 'EL'
-        elif any(word in message_lower for word in ['sl', 'sick leave', 'sick', 'medical', 'fever', 'illness']):
-            leave_type = 'SL'
-        elif any(word in message_lower for word in ['cl', 'casual leave', 'casual', 'emergency', 'personal leave']):
-            leave_type = 'CL'
+        leave_type = route_message(message_lower).leave_type
         
         print(f"📋 Detected leave type: {leave_type}")
         
@@ -669,255 +741,16 @@ class LeaveAgent:
         
         return leave_type, leave_dates, duration_days, reason
 
-    def _extract_dates_from_message(self, message):
+    def _extract_dates_from_message(self, message, today=None):
         """Extract dates from natural language message"""
-        today = datetime.now().date()
-        leave_dates = []
-        
-        # Clean the message for date parsing - be more aggressive
-        clean_message = message
-        
-        # Remove common application phrases
-        remove_phrases = [
-            'i want to apply', 'apply for', 'i need', 'want to take', 'take', 
-            'leave', 'sl', 'el', 'cl', 'sick', 'earned', 'casual', 'medical',
-            'apply', 'for'
-        ]
-        
-        for phrase in remove_phrases:
-            # Replace with space to avoid joining words
-            clean_message = clean_message.replace(phrase, ' ')
-        
-        # Clean up multiple spaces
-        clean_message = ' '.join(clean_message.split())
-        clean_message = clean_message.strip()
-        
-        print(f"🔍 Cleaned message for date parsing: '{clean_message}'")
-        
-        # Check for date range first (most specific pattern)
-        date_range = self._parse_date_range(clean_message)
-        if date_range:
-            leave_dates = date_range
-            print(f"✅ Date range pattern → {len(leave_dates)} days: {leave_dates[0]} to {leave_dates[-1]}")
-            return leave_dates
-        
-        # Strategy 1: Handle specific patterns
-        
-        # "before monday" pattern
-        if 'before' in clean_message:
-            parts = clean_message.split('before')
-            if len(parts) > 1:
-                day_str = parts[1].strip()
-                target_date = self._parse_relative_day(day_str)
-                if target_date:
-                    leave_date = target_date - timedelta(days=1)
-                    leave_dates = [leave_date]
-                    print(f"✅ 'Before' pattern: {day_str} → {leave_date}")
-                    return leave_dates
-        
-        # "last monday" pattern
-        if 'last' in clean_message:
-            day_str = clean_message.replace('last', '').strip()
-            leave_date = self._parse_relative_day(day_str, past=True)
-            if leave_date:
-                leave_dates = [leave_date]
-                print(f"✅ 'Last' pattern: {day_str} → {leave_date}")
-                return leave_dates
-        
-        # "yesterday" pattern
-        if 'yesterday' in clean_message:
-            leave_dates = [today - timedelta(days=1)]
-            print(f"✅ 'Yesterday' pattern → {leave_dates[0]}")
-            return leave_dates
-        
-        # "today" pattern
-        if 'today' in clean_message:
-            leave_dates = [today]
-            print(f"✅ 'Today' pattern → {leave_dates[0]}")
-            return leave_dates
-        
-        # "tomorrow" pattern
-        if 'tomorrow' in clean_message:
-            leave_dates = [today + timedelta(days=1)]
-            print(f"✅ 'Tomorrow' pattern → {leave_dates[0]}")
-            return leave_dates
-        
-        # Single date pattern
-        single_date = self._parse_single_date(clean_message)
-        if single_date:
-            leave_dates = [single_date]
-            print(f"✅ Single date pattern → {leave_dates[0]}")
-            return leave_dates
-        
-        # Day of week pattern
-        day_date = self._parse_day_of_week(clean_message)
-        if day_date:
-            leave_dates = [day_date]
-            print(f"✅ Day of week pattern → {leave_dates[0]}")
-            return leave_dates
+        today = today or datetime.now().date()
         
-        # Final attempt: Try parsing the original message directly
-        print("🔍 Final attempt: parsing original message directly")
-        single_date_final = self._parse_single_date(message)
-        if single_date_final:
-            leave_dates = [single_date_final]
-            print(f"✅ Final single date attempt → {leave_dates[0]}")
-            return leave_dates
-        
-        print("❌ No dates could be parsed from the message")
-        return []
-
-    def _parse_relative_day(self, day_str, past=False):
-        """Parse relative day patterns like 'monday', 'tuesday' etc."""
-        today = datetime.now().date()
-        
-        days_map = {
-            'monday': 0, 'tuesday': 1, 'wednesday': 2, 'thursday': 3,
-            'friday': 4, 'saturday': 5, 'sunday': 6,
-            'mon': 0, 'tue': 1, 'wed': 2, 'thu': 3, 'fri': 4, 'sat': 5, 'sun': 6
-        }
-        
-        for day_name, day_num in days_map.items():
-            if day_name in day_str.lower():
-                # Calculate days to target day
-                days_ahead = (day_num - today.weekday()) % 7
-                
-                if past:
-                    # For "last monday", find the most recent past occurrence
-                    if days_ahead == 0:
-                        days_ahead = 7  # Go back one week
-                    target_date = today - timedelta(days=days_ahead)
-                else:
-                    # For "before monday", find the next occurrence
-                    if days_ahead == 0:
-                        days_ahead = 7  # Go to next week
-                    target_date = today + timedelta(days=days_ahead)
-                
-                return target_date
-        
-        return None
-
-    def _parse_date_range(self, message):
-        """Parse date ranges like '7-10-2025 to 10-10-2025'"""
-        today = datetime.now().date()
-        
-        # Try different separators
-        separators = [' to ', ' till ', ' until ', ' - ', ' through ']
-        for separator in separators:
-            if separator in message:
-                parts = message.split(separator)
-                if len(parts) >= 2:
-                    start_str = parts[0].strip()
-                    end_str = parts[1].strip()
-                    
-                    print(f"🔍 Parsing date range: '{start_str}' {separator} '{end_str}'")
-                    
-                    # Try different date formats - prioritize DD-MM-YYYY format
-                    date_formats = [
-                        '%d-%m-%Y', '%d/%m/%Y', '%d-%m', '%d/%m',  # DD-MM formats first
-                        '%m-%d-%Y', '%m/%d/%Y', '%m-%d', '%m/%d',  # MM-DD formats
-                        '%Y-%m-%d'
-                    ]
-                    
-                    start_date = None
-                    end_date = None
-                    
-                    # First try with explicit formats
-                    for fmt in date_formats:
-                        try:
-                            if not start_date:
-                                start_date = datetime.strptime(start_str, fmt).date()
-                                # If year not specified, use current year
-                                if start_date.year == 1900:
-                                    start_date = start_date.replace(year=today.year)
-                            if not end_date:
-                                end_date = datetime.strptime(end_str, fmt).date()
-                                if end_date.year == 1900:
-                                    end_date = end_date.replace(year=today.year)
-                        except ValueError:
-                            continue
-                    
-                    # If that fails, try dateparser as fallback
-                    if not start_date:
-                        start_date_parsed = dateparser.parse(start_str)
-                        if start_date_parsed:
-                            start_date = start_date_parsed.date()
-                    
-                    if not end_date:
-                        end_date_parsed = dateparser.parse(end_str)
-                        if end_date_parsed:
-                            end_date = end_date_parsed.date()
-                    
-                    print(f"🔍 Parsed dates - Start: {start_date}, End: {end_date}")
-                    
-                    if start_date and end_date and start_date <= end_date:
-                        # Generate all dates in range
-                        dates = []
-                        current = start_date
-                        while current <= end_date:
-                            dates.append(current)
-                            current += timedelta(days=1)
-                        print(f"✅ Date range successfully parsed: {len(dates)} days")
-                        return dates
-                    else:
-                        print(f"❌ Date range parsing failed - Start: {start_date}, End: {end_date}")
-        
-        return None
-    def _parse_single_date(self, message):
-        """Parse single date patterns"""
-        today = datetime.now().date()
-        
-        # Try specific formats first - prioritize DD-MM-YYYY
-        date_formats = [
-            '%d-%m-%Y', '%d/%m/%Y',  # DD-MM-YYYY formats first
-            '%d-%m', '%d/%m',        # DD-MM formats (current year)
-            '%m-%d-%Y', '%m/%d/%Y',  # MM-DD-YYYY formats
-            '%m-%d', '%m/%d',        # MM-DD formats (current year)
-            '%Y-%m-%d'               # YYYY-MM-DD format
-        ]
-        
-        for fmt in date_formats:
-            try:
-                # Try to find date pattern in the message
-                date_pattern = r'\b\d{1,2}[-/]\d{1,2}[-/]?\d{0,4}\b'
-                matches = re.findall(date_pattern, message)
-                if matches:
-                    date_str = matches[0]
-                    date_obj = datetime.strptime(date_str, fmt).date()
-                    # If year not specified, use current year
-                    if date_obj.year == 1900:
-                        date_obj = date_obj.replace(year=today.year)
-                    print(f"✅ Single date parsed with format {fmt}: {date_str} → {date_obj}")
-                    return date_obj
-            except ValueError:
-                continue
-        
-        # Try dateparser as fallback
-        parsed = dateparser.parse(message)
-        if parsed:
-            print(f"✅ Single date parsed with dateparser: {parsed.date()}")
-            return parsed.date()
-        
-        return None
-
-    def _parse_day_of_week(self, message):
-        """Parse simple day of week"""
-        today = datetime.now().date()
-        
-        days_map = {
-            'monday': 0, 'tuesday': 1, 'wednesday': 2, 'thursday': 3,
-            'friday': 4, 'saturday': 5, 'sunday': 6,
-            'mon': 0, 'tue': 1, 'wed': 2, 'thu': 3, 'fri': 4, 'sat': 5, 'sun': 6
-        }
-        
-        for day_name, day_num in days_map.items():
-            if day_name in message.lower():
-                days_ahead = (day_num - today.weekday()) % 7
-                if days_ahead == 0:
-                    days_ahead = 7  # Next week
-                return today + timedelta(days=days_ahead)
-        
-        return None
+        leave_dates = date_engine.leave_dates(message, today)
+        if leave_dates:
+            print(f"✅ Dates → {len(leave_dates)} days: {leave_dates[0]} to {leave_dates[-1]}")
+        else:
+            print("❌ No dates could be parsed from the message")
+        return leave_dates
 
     def _extract_reason_from_message(self, message):
         """Extract reason from the message"""
@@ -938,10 +771,10 @@ class LeaveAgent:
         else:
             return "Personal"
 
-    def _handle_leave_application(self, user_id, message):
+    def _handle_leave_application(self, turn, message):
         """Handle leave application process with all validations"""
         # Parse the leave request
-        leave_type, leave_dates, duration_days, reason = self._parse_leave_request(message, user_id)
+        leave_type, leave_dates, duration_days, reason = self._parse_leave_request(message, turn.user_id)
         
         # Check if we have enough information
         if not leave_type:
@@ -1004,24 +837,24 @@ I couldn't figure out which date(s) you want to apply leave for.
 📞 *For EL policy exceptions, contact HR: hr@company.com*"""
         
         # Check balance
-        balance = self.db.get_user_balance(user_id)
-        if not balance or balance[leave_type] < duration_days:
+        balance = turn.balance
+        if not balance or balance.days(leave_type) < duration_days:
             return f"""❌ **Insufficient {leave_type} Balance**
 
 You don't have enough {leave_type} days available.
 Your request: {duration_days} day{'s' if duration_days > 1 else ''}
-Your current balance: {balance[leave_type] if balance else 0} {leave_type} days
+Your current balance: {balance.days(leave_type) if balance else 0} {leave_type} days
 
 📊 **Your Current Balance:**
-• EL: {balance['EL'] if balance else 0} days
-• SL: {balance['SL'] if balance else 0} days  
-• CL: {balance['CL'] if balance else 0} days
+• EL: {balance.el if balance else 0} days
+• SL: {balance.sl if balance else 0} days  
+• CL: {balance.cl if balance else 0} days
 
 📞 *Contact HR for balance-related queries: hr@company.com*"""
         
         # Check date overlap for all dates
         for leave_date in leave_dates:
-            if self.db.check_date_overlap(user_id, leave_date.strftime('%Y-%m-%d 00:00:00')):
+            if turn.has_leave_on(leave_date):
                 return f"""❌ **Date Conflict**
 
 You already have a leave application or approved leave for {leave_date.strftime('%Y-%m-%d')}.
@@ -1036,7 +869,7 @@ Please choose different dates or check your existing applications.
         
         for leave_date in leave_dates:
             success = self.db.add_leave_request(
-                user_id=user_id,
+                user_id=turn.user_id,
                 leave_date=leave_date.strftime('%Y-%m-%d 00:00:00'),
                 leave_type=leave_type,
                 reason=reason,
@@ -1044,6 +877,7 @@ Please choose different dates or check your existing applications.
             )
             
             if success:
+                turn.record_leave(leave_date)
                 successful_applications += 1
                 application_details.append(leave_date.strftime('%Y-%m-%d'))
             else:
@@ -1067,12 +901,12 @@ Please try again or contact support.
 • **Date:** {date_range} ({successful_applications} day{'s' if successful_applications > 1 else ''})
 • **Reason:** {reason}
 • **Status:** ⏳ Pending Approval
-• **Balance After Approval:** {balance[leave_type] - successful_applications} {leave_type} days
+• **Balance After Approval:** {balance.days(leave_type) - successful_applications} {leave_type} days
 
 📊 **Your Current Balance (Before Approval):**
-• EL: {balance['EL']} days
-• SL: {balance['SL']} days  
-• CL: {balance['CL']} days
+• EL: {balance.el} days
+• SL: {balance.sl} days  
+• CL: {balance.cl} days
 
 ⏳ **Next Steps:**
 - Your manager will review and approve your request
@@ -1087,33 +921,33 @@ There was an error submitting your leave application. Please try again or contac
 
 📞 **HR Support:** hr@company.com | +1-555-0123"""
     
-    def _get_balance_response(self, user_id):
+    def _get_balance_response(self, turn):
         """Get balance response"""
-        balance = self.db.get_user_balance(user_id)
+        balance = turn.balance
         if balance:
             return f"""📊 **Your Leave Balance:**
 
-• 🏖️ EL (Earned Leave): {balance['EL']} days (min 3 days, ±30 days)
-• 🤒 SL (Sick Leave): {balance['SL']} days (past dates only)  
-• 🎯 CL (Casual Leave): {balance['CL']} days (±30 days, max 2 days)
-• 📈 Total Leaves: {balance['TL']} days
+• 🏖️ EL (Earned Leave): {balance.el} days (min 3 days, ±30 days)
+• 🤒 SL (Sick Leave): {balance.sl} days (past dates only)  
+• 🎯 CL (Casual Leave): {balance.cl} days (±30 days, max 2 days)
+• 📈 Total Leaves: {balance.tl} days
 
 💡 *Date restrictions apply to all leave types*
 
 📞 *For balance disputes, contact HR at hr@company.com*"""
         return "❌ Unable to fetch your leave balance. Please make sure you're logged in correctly.\n\n📞 Contact HR for assistance: hr@company.com"
     
-    def _get_status_response(self, user_id):
+    def _get_status_response(self, turn):
         """Get leave status response"""
-        requests = self.db.get_user_leave_requests(user_id)
+        requests = turn.recent_requests(limit=5)
         if requests:
             response = "📋 **Your Leave Applications:**\n\n"
-            for req in reversed(requests[-5:]):
-                status_icon = "✅" if req['Status'] == 'Approved' else "❌" if req['Status'] == 'Rejected' else "⏳"
-                date_str = req['Leave_Date'].split()[0] if ' ' in str(req['Leave_Date']) else str(req['Leave_Date'])
-                response += f"{status_icon} **{date_str}** - {req['LeaveType']} - **{req['Status']}**\n"
-                if req['Status'] == 'Pending':
-                    response += f"   📝 Reason: {req['Reason']}\n"
+            for req in requests:
+                status_icon = "✅" if req.status == 'Approved' else "❌" if req.status == 'Rejected' else "⏳"
+                date_str = req.leave_day
+                response += f"{status_icon} **{date_str}** - {req.leave_type} - **{req.status}**\n"
+                if req.status == 'Pending':
+                    response += f"   📝 Reason: {req.reason}\n"
                 response += "\n"
             
             response += "📞 *For status inquiries, contact your manager or HR at hr@company.com*"
@@ -1121,14 +955,14 @@ There was an error submitting your leave application. Please try again or contac
         else:
             return "📋 **No leave applications found.**\n\nYou haven't applied for any leaves yet.\n\n📞 *Contact HR for leave policy information: hr@company.com*"
     
-    def _get_greeting_response(self, user_id):
+    def _get_greeting_response(self, turn):
         """Get greeting response"""
-        balance = self.db.get_user_balance(user_id)
+        balance = turn.balance
         if balance:
             return f"""👋 **Hello! I'm your AI Leave Management Assistant**
 
 📊 **Your Current Balance:**
-• EL: {balance['EL']} days (min 3 days) • SL: {balance['SL']} days • CL: {balance['CL']} days
+• EL: {balance.el} days (min 3 days) • SL: {balance.sl} days • CL: {balance.cl} days
 
 I can help you with information from the company leave policy about:
 • 🤔 Leave policy questions (from official PDF)
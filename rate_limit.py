@@ -0,0 +1,68 @@
+import time
+import threading
+from contextlib import contextmanager
+from config import Config
+from ttl_cache import TTLCache
+
+
+class RateLimiter:
+    """Token bucket per key - `burst` requests at once, refilled at `per_minute`"""
+
+    def __init__(self, burst, per_minute, max_keys=10000):
+        self.burst = burst
+        self.rate = per_minute / 60.0
+        # An idle bucket is full again after burst/rate seconds, so it can simply expire
+        self._buckets = TTLCache(max_entries=max_keys, ttl_seconds=burst / self.rate)
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, name):
+        """Build a limiter from Config.RATE_LIMITS[name]"""
+        burst, per_minute = Config.RATE_LIMITS[name]
+        return cls(burst, per_minute)
+
+    def _refill(self, key, now):
+        tokens, last = self._buckets.get(key, (self.burst, now))
+        return min(self.burst, tokens + (now - last) * self.rate)
+
+    def allow(self, key, cost=1):
+        """Take `cost` tokens from the key's bucket - False if it is empty"""
+        now = time.monotonic()
+        with self._lock:
+            tokens = self._refill(key, now)
+            allowed = tokens >= cost
+            if allowed:
+                tokens -= cost
+            self._buckets.set(key, (tokens, now))
+            return allowed
+
+    def retry_after(self, key, cost=1):
+        """Seconds until `cost` tokens are available again"""
+        with self._lock:
+            tokens = self._refill(key, time.monotonic())
+        return max(0.0, (cost - tokens) / self.rate)
+
+
+class WriteGate:
+    """Global cap on in-flight workbook writers - excess callers get turned away fast"""
+
+    def __init__(self, max_pending=None, wait_seconds=None):
+        self.max_pending = max_pending or Config.MAX_PENDING_WRITES
+        self.wait_seconds = Config.WRITE_WAIT_SECONDS if wait_seconds is None else wait_seconds
+        self._slots = threading.BoundedSemaphore(self.max_pending)
+        self._lock = threading.Lock()
+        self.rejected = 0
+
+    @contextmanager
+    def admit(self):
+        """Yield True while holding a write slot, False if the queue stayed full"""
+        acquired = self._slots.acquire(timeout=self.wait_seconds)
+        if not acquired:
+            # Many handler threads are turned away at once - count every one of them
+            with self._lock:
+                self.rejected += 1
+        try:
+            yield acquired
+        finally:
+            if acquired:
+                self._slots.release()
@@ -0,0 +1,96 @@
+from collections import namedtuple
+from lazy_imports import lazy_import
+
+pd = lazy_import('pandas')
+
+
+def _int_column(df, column):
+    """Integer column as a plain list"""
+    return df[column].astype(int).tolist()
+
+
+def _str_column(df, column):
+    """String column as a plain list - missing values become ''"""
+    if column not in df.columns:
+        return [''] * len(df)
+    return df[column].fillna('').astype(str).tolist()
+
+
+class LeaveRequest(namedtuple('LeaveRequest', [
+        'user_id', 'leave_date', 'status', 'leave_type', 'reason', 'applied_date', 'duration', 'admin_id'])):
+    """One row of the Hierarchy sheet"""
+    __slots__ = ()
+
+    @property
+    def leave_day(self):
+        """Leave date without the time part"""
+        return self.leave_date.split()[0] if self.leave_date else ''
+
+    @property
+    def applied_day(self):
+        """Applied date without the time part"""
+        return self.applied_date.split()[0] if self.applied_date else ''
+
+    @classmethod
+    def from_frame(cls, df):
+        """Build records straight from the Hierarchy column arrays"""
+        if df.empty:
+            return []
+        columns = (
+            _int_column(df, 'UserId'),
+            _str_column(df, 'Leave_Date'),
+            _str_column(df, 'Status'),
+            _str_column(df, 'LeaveType'),
+            _str_column(df, 'Reason'),
+            _str_column(df, 'AppliedDate'),
+            _str_column(df, 'Duration'),
+            _int_column(df, 'Admin ID'),
+        )
+        return list(map(cls._make, zip(*columns)))
+
+
+class ChatMessage(namedtuple('ChatMessage', ['user_id', 'role', 'message', 'timestamp'])):
+    """One row of the ChatHistory sheet"""
+    __slots__ = ()
+
+    @classmethod
+    def from_frame(cls, df):
+        """Build records straight from the ChatHistory column arrays"""
+        if df.empty:
+            return []
+        columns = (
+            _int_column(df, 'UserID'),
+            _str_column(df, 'Role'),
+            _str_column(df, 'Message'),
+            _str_column(df, 'Timestamp'),
+        )
+        return list(map(cls._make, zip(*columns)))
+
+
+class Balance(namedtuple('Balance', ['el', 'sl', 'cl', 'tl', 'eligible'])):
+    """Leave balance for one employee"""
+    __slots__ = ()
+
+    def days(self, leave_type):
+        """Balance for a leave type code (EL/SL/CL/TL)"""
+        return getattr(self, leave_type.lower())
+
+    @classmethod
+    def from_row(cls, row, eligible=True):
+        """Build a balance from one Available row"""
+        def as_int(value):
+            return int(value) if not pd.isna(value) else 0
+        return cls(as_int(row['EL']), as_int(row['SL']), as_int(row['CL']), as_int(row['TL']), eligible)
+
+
+class Page(namedtuple('Page', ['items', 'total', 'next_cursor'])):
+    """One window of a query result - `next_cursor` is None on the last page"""
+    __slots__ = ()
+
+    @staticmethod
+    def window(total, limit, cursor):
+        """Resolve a cursor into (start, stop, next_cursor)"""
+        start = max(int(cursor or 0), 0)
+        stop = total if limit is None else min(start + int(limit), total)
+        next_cursor = str(stop) if stop < total else None
+        return start, stop, next_cursor
@@ -0,0 +1,44 @@
+import secrets
+import time
+from collections import namedtuple
+from config import Config
+from ttl_cache import TTLCache
+
+
+class Session(namedtuple('Session', ['user_id', 'role', 'created_at'])):
+    """One authenticated browser session"""
+    __slots__ = ()
+
+
+class SessionStore:
+    """Opaque-token session store with sliding TTL expiry and LRU eviction"""
+
+    def __init__(self, ttl_seconds=None, max_entries=None):
+        self._cache = TTLCache(
+            max_entries=max_entries or Config.SESSION_MAX_ENTRIES,
+            ttl_seconds=ttl_seconds or Config.SESSION_TTL_SECONDS,
+            sliding=True,
+        )
+
+    def create(self, user_id, role):
+        """Start a session and return its token"""
+        token = secrets.token_urlsafe(32)
+        self._cache.set(token, Session(str(user_id), role, time.time()))
+        return token
+
+    def get(self, token):
+        """Resolve a token into its Session - None if unknown or expired"""
+        if not token:
+            return None
+        return self._cache.get(token)
+
+    def end(self, token):
+        """Invalidate a token"""
+        if token:
+            self._cache.pop(token)
+
+    def stats(self):
+        return self._cache.stats()
+
+    def __len__(self):
+        return len(self._cache)
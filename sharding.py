@@ -0,0 +1,333 @@
+import os
+import glob
+import json
+import tempfile
+import threading
+from config import Config
+from database import LeaveDatabase
+from records import Page
+from lazy_imports import lazy_import
+
+pd = lazy_import('pandas')
+
+
+class ShardedLeaveDatabase:
+    """LeaveDatabase facade that splits employees into one workbook per shard"""
+
+    INDEX_FILE = 'shard_index.json'
+    USER_SHEETS = {'Available': 'UserId', 'Used': 'UserId', 'Hierarchy': 'UserId', 'ChatHistory': 'UserID'}
+    # Employees with a blank shard column, and rows of IDs that are not employees (admins' chat)
+    DEFAULT_SHARD = 'default'
+
+    def __init__(self, shard_dir=None, shard_by=None, source_file=None):
+        self.shard_dir = shard_dir or Config.SHARD_DIR
+        self.shard_by = shard_by or Config.SHARD_BY or 'Admin ID'
+        self.index_path = os.path.join(self.shard_dir, self.INDEX_FILE)
+        self._index_lock = threading.Lock()
+        self._shards = {}
+        self._user_routes = {}
+        self._admin_routes = {}
+
+        os.makedirs(self.shard_dir, exist_ok=True)
+        source_file = source_file or Config.EXCEL_FILE
+        if not os.path.exists(self.index_path):
+            self.split_workbook(source_file)
+        self._load_index()
+        if not os.path.exists(self._shard_path(self.DEFAULT_SHARD)):
+            self._create_default_shard(source_file)
+
+    # ------------------------------------------------------------------
+    # Routing index
+    # ------------------------------------------------------------------
+
+    @classmethod
+    def _shard_key(cls, value):
+        """Shard name for a shard-column value - blank or NaN goes to the default shard"""
+        if pd.isna(value) or str(value).strip() == '':
+            return cls.DEFAULT_SHARD
+        if isinstance(value, float) and value.is_integer():
+            value = int(value)
+        return str(value)
+
+    def _shard_path(self, shard_key):
+        """Workbook path for a shard"""
+        safe_key = str(shard_key).replace(os.sep, '_').replace(' ', '_')
+        return os.path.join(self.shard_dir, f"shard_{safe_key}.xlsx")
+
+    def _load_index(self):
+        """Load the UserId -> shard routing index"""
+        with open(self.index_path, 'r', encoding='utf-8') as f:
+            index = json.load(f)
+
+        self.shard_by = index.get('shard_by', self.shard_by)
+        self._user_routes = {int(uid): key for uid, key in index['users'].items()}
+        self._admin_routes = {int(aid): list(keys) for aid, keys in index['admins'].items()}
+        print(f"✅ Shard index loaded: {len(self._user_routes)} users across {len(set(self._user_routes.values()))} shards")
+
+    def _save_index(self):
+        """Persist the routing index atomically - the caller holds _index_lock"""
+        index = {
+            'shard_by': self.shard_by,
+            'users': {str(uid): key for uid, key in self._user_routes.items()},
+            'admins': {str(aid): list(keys) for aid, keys in self._admin_routes.items()},
+        }
+        # A unique temp file - concurrent saves from other processes never write over each other
+        fd, tmp_path = tempfile.mkstemp(prefix=self.INDEX_FILE + '.', suffix='.tmp', dir=self.shard_dir)
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(index, f)
+            os.replace(tmp_path, self.index_path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def split_workbook(self, source_file):
+        """Split a single workbook into per-shard workbooks and build the routing index"""
+        print(f"🔀 Splitting {source_file} into shards by '{self.shard_by}'")
+        sheets = pd.read_excel(source_file, sheet_name=None)
+        available = sheets['Available']
+
+        if self.shard_by not in available.columns:
+            raise ValueError(f"Shard column '{self.shard_by}' not found in Available sheet")
+
+        user_routes = {}
+        admin_routes = {}
+
+        # groupby() would silently drop employees whose shard column is blank - route them explicitly
+        shard_keys = available[self.shard_by].map(self._shard_key)
+        unassigned = int((shard_keys == self.DEFAULT_SHARD).sum())
+        if unassigned:
+            print(f"⚠️ {unassigned} employees have no {self.shard_by} - placed in the '{self.DEFAULT_SHARD}' shard")
+
+        user_ids = pd.to_numeric(available['UserId'], errors='coerce')
+        admin_ids = pd.to_numeric(available['Admin ID'], errors='coerce')
+        for user_id, admin_id, shard_key in zip(user_ids, admin_ids, shard_keys):
+            if pd.isna(user_id):
+                continue
+            user_routes[int(user_id)] = shard_key
+            if not pd.isna(admin_id):
+                keys = admin_routes.setdefault(int(admin_id), [])
+                if shard_key not in keys:
+                    keys.append(shard_key)
+
+        # Every row follows its user; rows of unknown IDs (e.g. admins' chat) go to the default shard
+        row_keys = {
+            sheet_name: pd.to_numeric(sheets[sheet_name][user_column], errors='coerce')
+                          .map(user_routes).fillna(self.DEFAULT_SHARD)
+            for sheet_name, user_column in self.USER_SHEETS.items() if sheet_name in sheets
+        }
+        for shard_key in set(user_routes.values()) | {self.DEFAULT_SHARD}:
+            with pd.ExcelWriter(self._shard_path(shard_key), engine='openpyxl') as writer:
+                for sheet_name, keys in row_keys.items():
+                    df = sheets[sheet_name]
+                    df[keys == shard_key].to_excel(writer, sheet_name=sheet_name, index=False)
+                if shard_key == self.DEFAULT_SHARD:
+                    # Sheets not keyed by employee (e.g. Admins) live in the default shard only
+                    for sheet_name, df in sheets.items():
+                        if sheet_name not in row_keys:
+                            df.to_excel(writer, sheet_name=sheet_name, index=False)
+
+        with self._index_lock:
+            self._user_routes = user_routes
+            self._admin_routes = admin_routes
+            self._save_index()
+        print(f"✅ Created {len(self.all_shard_keys())} shards in {self.shard_dir}")
+
+    def _create_default_shard(self, source_file):
+        """Empty default shard for an index split before it existed - same sheets as the others
+
+        The sheets are copied from any existing shard, or from the source
+        workbook the shards were split from when there is none (an index
+        with no users).
+        """
+        shards = sorted(glob.glob(os.path.join(self.shard_dir, 'shard_*.xlsx')))
+        template = shards[0] if shards else source_file
+        with pd.ExcelWriter(self._shard_path(self.DEFAULT_SHARD), engine='openpyxl') as writer:
+            for sheet_name, df in pd.read_excel(template, sheet_name=None).items():
+                df.head(0).to_excel(writer, sheet_name=sheet_name, index=False)
+        print(f"✅ Created the '{self.DEFAULT_SHARD}' shard in {self.shard_dir}")
+
+    def shard(self, shard_key):
+        """Get (and lazily open) the database for a shard"""
+        shard_key = str(shard_key)
+        with self._index_lock:
+            if shard_key not in self._shards:
+                self._shards[shard_key] = LeaveDatabase(self._shard_path(shard_key))
+            return self._shards[shard_key]
+
+    def shard_for_user(self, user_id):
+        """Route a user to their shard - None for unknown users"""
+        try:
+            shard_key = self._user_routes.get(int(user_id))
+        except (TypeError, ValueError):
+            return None
+        return self.shard(shard_key) if shard_key is not None else None
+
+    def chat_shard(self, user_id):
+        """Shard holding a user's chat - admins and unknown IDs use the default shard"""
+        return self.shard_for_user(user_id) or self.shard(self.DEFAULT_SHARD)
+
+    def shards_for_admin(self, admin_id):
+        """All shards holding employees that report to an admin"""
+        try:
+            admin_id = int(admin_id)
+        except (TypeError, ValueError):
+            return []
+        with self._index_lock:
+            keys = list(self._admin_routes.get(admin_id, []))
+        return [self.shard(key) for key in keys]
+
+    def all_shard_keys(self):
+        with self._index_lock:
+            return sorted(set(self._user_routes.values()) | {self.DEFAULT_SHARD})
+
+    def all_shards(self):
+        """Every shard database"""
+        return [self.shard(key) for key in self.all_shard_keys()]
+
+    # ------------------------------------------------------------------
+    # LeaveDatabase API
+    # ------------------------------------------------------------------
+
+    def get_user_balance(self, user_id):
+        shard = self.shard_for_user(user_id)
+        return shard.get_user_balance(user_id) if shard else None
+
+    def update_user_balance(self, user_id, leave_type, days):
+        shard = self.shard_for_user(user_id)
+        return shard.update_user_balance(user_id, leave_type, days) if shard else False
+
+    def add_leave_request(self, user_id, leave_date, leave_type, reason, duration="Full Day"):
+        shard = self.shard_for_user(user_id)
+        if not shard:
+            print(f"❌ User {user_id} not found in shard index")
+            return False
+        return shard.add_leave_request(user_id, leave_date, leave_type, reason, duration)
+
+    def get_user_leave_requests(self, user_id, limit=None, offset=0, newest_first=True):
+        shard = self.shard_for_user(user_id)
+        return shard.get_user_leave_requests(user_id, limit, offset, newest_first) if shard else []
+
+    def get_user_leave_requests_page(self, user_id, limit=None, cursor=None, newest_first=True):
+        shard = self.shard_for_user(user_id)
+        return shard.get_user_leave_requests_page(user_id, limit, cursor, newest_first) if shard else Page([], 0, None)
+
+    def get_pending_requests(self, admin_id, limit=None, offset=0, newest_first=False):
+        return self.get_pending_requests_page(admin_id, limit, offset, newest_first).items
+
+    def get_pending_requests_page(self, admin_id, limit=None, cursor=None, newest_first=False):
+        shards = self.shards_for_admin(admin_id)
+        if len(shards) == 1:
+            return shards[0].get_pending_requests_page(admin_id, limit, cursor, newest_first)
+
+        # Admin spans several shards - merge the (small) pending lists, then page
+        requests = []
+        for shard in shards:
+            requests.extend(shard.get_pending_requests(admin_id))
+        requests.sort(key=lambda req: req.applied_date, reverse=newest_first)
+        start, stop, next_cursor = Page.window(len(requests), limit, cursor)
+        return Page(requests[start:stop], len(requests), next_cursor)
+
+    def update_leave_status(self, user_id, leave_date, status):
+        shard = self.shard_for_user(user_id)
+        return shard.update_leave_status(user_id, leave_date, status) if shard else False
+
+    def approve_all_pending(self, admin_id):
+        approved_count, total_count = 0, 0
+        for shard in self.shards_for_admin(admin_id):
+            approved, total = shard.approve_all_pending(admin_id)
+            approved_count += approved
+            total_count += total
+        return approved_count, total_count
+
+    def get_user_leave_dates(self, user_id):
+        shard = self.shard_for_user(user_id)
+        return shard.get_user_leave_dates(user_id) if shard else None
+
+    def check_date_overlap(self, user_id, leave_date):
+        shard = self.shard_for_user(user_id)
+        return shard.check_date_overlap(user_id, leave_date) if shard else True
+
+    def save_chat_message(self, user_id, role, message, timestamp=None):
+        return self.chat_shard(user_id).save_chat_message(user_id, role, message, timestamp)
+
+    def save_chat_turn(self, user_id, user_message, reply, timestamp=None):
+        return self.chat_shard(user_id).save_chat_turn(user_id, user_message, reply, timestamp)
+
+    def save_chat_turns(self, turns):
+        """Split a batch of turns by shard - one write per shard"""
+        by_shard = {}
+        for turn in turns:
+            shard = self.chat_shard(turn[0])
+            by_shard.setdefault(id(shard), (shard, []))[1].append(turn)
+        results = [shard.save_chat_turns(batch) for shard, batch in by_shard.values()]
+        return all(results)
+
+    def get_chat_history(self, user_id, limit=50, offset=0):
+        return self.chat_shard(user_id).get_chat_history(user_id, limit, offset)
+
+    def clear_chat_history(self, user_id):
+        return self.chat_shard(user_id).clear_chat_history(user_id)
+
+    def add_employees(self, employees):
+        """Import employees into the shard chosen by their shard column"""
+        by_shard = {}
+        for employee in employees:
+            shard_key = self._shard_key(employee.get(self.shard_by))
+            if not os.path.exists(self._shard_path(shard_key)):
+                print(f"❌ No shard for {self.shard_by}={shard_key} - user {employee.get('UserId')} skipped")
+                continue
+            by_shard.setdefault(shard_key, []).append(employee)
+
+        added = []
+        for shard_key, rows in by_shard.items():
+            stored = self.shard(shard_key).add_employees(rows)
+            # Routes change and are saved under the lock every reader of the index takes
+            with self._index_lock:
+                for row in stored:
+                    self._user_routes[row['UserId']] = shard_key
+                    keys = self._admin_routes.setdefault(row['Admin ID'], [])
+                    if shard_key not in keys:
+                        keys.append(shard_key)
+                if stored:
+                    self._save_index()
+            added.extend(stored)
+        return added
+
+    def add_admins(self, admins):
+        return self.shard(self.DEFAULT_SHARD).add_admins(admins)
+
+    def update_sheet(self, sheet_name, update):
+        """Apply a read-modify-write to the sheet in every shard - each shard locks and writes on its own"""
+        if sheet_name not in self.USER_SHEETS:
+            return self.shard(self.DEFAULT_SHARD).update_sheet(sheet_name, update)
+        results = [shard.update_sheet(sheet_name, update) for shard in self.all_shards()]
+        return any(results)
+
+    def read_sheet(self, sheet_name, columns=None):
+        """Read a sheet across every shard - sheets not keyed by employee from the default shard"""
+        if sheet_name not in self.USER_SHEETS:
+            return self.shard(self.DEFAULT_SHARD).read_sheet(sheet_name, columns)
+        frames = [shard.read_sheet(sheet_name, columns) for shard in self.all_shards()]
+        return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+
+    def leave_data_version(self):
+        return tuple(shard.leave_data_version() for shard in self.all_shards())
+
+    def data_version(self):
+        """Combined signature of every shard workbook"""
+        return tuple(shard.data_version() for shard in self.all_shards())
+
+    # Calendar checks are the same for every shard
+    def is_weekend(self, date):
+        return self.shard(self.DEFAULT_SHARD).is_weekend(date)
+
+    def is_public_holiday(self, date):
+        return self.shard(self.DEFAULT_SHARD).is_public_holiday(date)
+
+    def is_valid_working_day(self, date):
+        return self.shard(self.DEFAULT_SHARD).is_valid_working_day(date)
+
+    def is_valid_sl_date(self, date):
+        return self.shard(self.DEFAULT_SHARD).is_valid_sl_date(date)
@@ -0,0 +1,100 @@
+import pandas as pd
+import sys
+import os
+import tempfile
+from datetime import date
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from accrual import AccrualEngine
+from database import LeaveDatabase
+
+
+def _temp_database():
+    """Create a throwaway workbook with the sample data"""
+    tmp_dir = tempfile.mkdtemp()
+    return LeaveDatabase(os.path.join(tmp_dir, 'Leave_Data.xlsx'))
+
+
+def test_service_months():
+    """Completed months only count once the anniversary day is reached"""
+    months = AccrualEngine.service_months(['2024-01-15', '2024-01-15', '2024-03-31'], date(2024, 4, 14))
+    assert list(months) == [2, 2, 0]
+    assert AccrualEngine.service_months(['2024-01-15'], date(2024, 4, 15))[0] == 3
+
+
+def test_entitlements_pro_rated():
+    """Entitlements are pro-rated from JoinDate and zero during the service period"""
+    roster = pd.DataFrame({'UserId': [1, 2], 'JoinDate': ['2023-01-01', '2024-05-01']})
+    engine = AccrualEngine(database=None)
+    result = engine.entitlements(date(2024, 1, 1), date(2025, 1, 1), roster=roster)
+
+    assert list(result['EL']) == [20, 13]
+    assert list(result['Eligible']) == [True, True]
+
+
+def test_monthly_accrual_is_idempotent():
+    """Running twice in the same month credits once; missed months are caught up"""
+    db = _temp_database()
+    engine = AccrualEngine(db)
+
+    engine.run_monthly_accrual(as_of=date(2030, 1, 10))
+    first = pd.read_excel(db.file_path, sheet_name='Available')
+    engine.run_monthly_accrual(as_of=date(2030, 1, 25))
+    second = pd.read_excel(db.file_path, sheet_name='Available')
+    assert list(first['EL']) == list(second['EL'])
+
+    engine.run_monthly_accrual(as_of=date(2030, 4, 2))
+    third = pd.read_excel(db.file_path, sheet_name='Available')
+    assert (third['EL'] >= second['EL']).all()
+    assert (third['TL'] == third['EL'] + third['SL'] + third['CL']).all()
+    assert set(third['AccruedThrough'].astype(str)) == {'2030-04-01'}
+
+
+def test_accrual_goes_through_the_database():
+    """The rewrite bumps the leave version readers key on, and a re-run in the same month writes nothing"""
+    db = _temp_database()
+    engine = AccrualEngine(db)
+    version = db.leave_data_version()
+
+    engine.run_monthly_accrual(as_of=date(2030, 1, 10))
+    assert db.leave_data_version() == version + 1
+    assert db.get_user_balance(1001).el == int(db.read_sheet('Available').set_index('UserId').at[1001, 'EL'])
+
+    engine.run_monthly_accrual(as_of=date(2030, 1, 25))
+    assert db.leave_data_version() == version + 1
+
+
+def test_accrual_on_sharded_storage():
+    """Every shard is credited through its own locked update"""
+    from sharding import ShardedLeaveDatabase
+    work_dir = tempfile.mkdtemp()
+    source = LeaveDatabase(os.path.join(work_dir, 'Leave_Data.xlsx')).file_path
+    db = ShardedLeaveDatabase(os.path.join(work_dir, 'shards'), 'Admin ID', source)
+
+    AccrualEngine(db).run_monthly_accrual(as_of=date(2030, 4, 2))
+    available = db.read_sheet('Available')
+    assert len(available) == len(pd.read_excel(source, sheet_name='Available'))
+    assert set(available['AccruedThrough'].astype(str)) == {'2030-04-01'}
+
+
+def test_accrual_failure_is_raised():
+    """A failed run surfaces to the caller instead of reporting zero credits"""
+    class BrokenDatabase:
+        def update_sheet(self, sheet_name, update):
+            raise OSError("workbook locked")
+
+    try:
+        AccrualEngine(BrokenDatabase()).run_monthly_accrual(as_of=date(2030, 1, 10))
+        assert False, "expected OSError"
+    except OSError:
+        pass
+
+
+if __name__ == "__main__":
+    test_service_months()
+    test_entitlements_pro_rated()
+    test_monthly_accrual_is_idempotent()
+    test_accrual_goes_through_the_database()
+    test_accrual_on_sharded_storage()
+    test_accrual_failure_is_raised()
+    print("✅ Accrual tests passed")
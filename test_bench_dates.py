@@ -0,0 +1,81 @@
+import sys
+import os
+from datetime import date
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from bench_dates import Case, EXTRACTORS, build_corpus, score, _as_dates
+import bench_baseline
+import date_engine
+
+
+def test_corpus_is_labeled_against_the_reference():
+    """A few thousand phrasings, each with the dates it means on the reference day"""
+    reference = date(2025, 10, 15)  # Wednesday
+    corpus = build_corpus(reference)
+    assert len(corpus) > 2000
+    assert corpus == build_corpus(reference)
+    assert Case("next monday", (date(2025, 10, 20),), "weekday") in corpus
+    assert Case("CL tomorrow please", (date(2025, 10, 16),), "relative") in corpus
+    assert Case("hello", (), "negative") in corpus
+    assert Case("my cousin wedding", (), "prefix/no date") in corpus
+    assert Case("CL 24-10-2025 for my cousin wedding", (date(2025, 10, 24),), "prefix/with date") in corpus
+    assert {case.category.split('/')[0] for case in corpus} == \
+        {'single', 'relative', 'weekday', 'range', 'fuzzy', 'negative', 'prefix'}
+
+
+# Phrasings an extractor got wrong once, with what they mean on 2025-10-15 (a Wednesday)
+REGRESSION_CASES = [
+    ("my cousin wedding", ()),                                     # 'wed' is not Wednesday
+    ("monitor repair", ()),                                        # 'mon' is not Monday
+    ("I am not satisfied", ()),
+    ("this month", ()),
+    ("hello", ()),
+    ("CL tomorrow for my cousin wedding", (date(2025, 10, 16),)),
+    ("CL 24-10-2025 for monitor repair", (date(2025, 10, 24),)),
+    ("next monday", (date(2025, 10, 20),)),
+    ("last friday", (date(2025, 10, 10),)),
+    ("apply EL 02-12-2025 to 04-12-2025", (date(2025, 12, 2), date(2025, 12, 3), date(2025, 12, 4))),
+    ("Dec 2-4", (date(2025, 12, 2), date(2025, 12, 3), date(2025, 12, 4))),
+    ("Nov 4-6", (date(2025, 11, 4), date(2025, 11, 6))),                   # 2025-11-05 is a holiday
+    ("need sick leave tmrw", (date(2025, 10, 16),)),
+    ("in 5 days", (date(2025, 10, 20),)),
+]
+
+
+def test_engine_regression_cases():
+    """The shared engine gets every labeled regression case right"""
+    reference = date(2025, 10, 15)
+    for text, expected in REGRESSION_CASES:
+        assert _as_dates(date_engine.leave_dates(text, reference)) == expected, text
+
+
+def test_baseline_is_the_old_behavior():
+    """The frozen pre-engine extractors still make the mistakes the engine fixed"""
+    reference = date(2025, 10, 15)
+    assert {'old_enhanced', 'old_rag_agent', 'old_simple'} <= set(EXTRACTORS)
+    assert bench_baseline.simple_agent_dates("my cousin wedding", reference) == [date(2025, 10, 22)]
+    assert bench_baseline.simple_agent_dates("monitor repair", reference) == [date(2025, 10, 20)]
+    assert bench_baseline.enhanced_dates("next monday", reference) == [date(2025, 10, 20)]
+
+
+def test_score_reports_accuracy_and_speed():
+    """Scoring counts exact date-set matches per category and times every call"""
+    reference = date(2025, 10, 15)
+    corpus = build_corpus(reference)
+    result = score(date_engine.leave_dates, corpus, reference)
+    assert result['cases'] == len(corpus)
+    assert set(result['by_category']) == {'single', 'relative', 'weekday', 'range', 'fuzzy', 'negative', 'prefix'}
+    assert result['us_per_call_p50'] > 0 and result['cached_us_per_call'] > 0
+
+    result = score(lambda message, today: [today], corpus, reference)
+    assert result['by_category']['relative'] == 0.25       # only 'today' is right
+    assert result['by_category']['negative'] == 0.0
+    assert 0 < len(result['failure_samples']) <= 3 * len(result['by_shape'])
+
+
+if __name__ == "__main__":
+    test_corpus_is_labeled_against_the_reference()
+    test_engine_regression_cases()
+    test_baseline_is_the_old_behavior()
+    test_score_reports_accuracy_and_speed()
+    print("✅ Date benchmark tests passed")
@@ -0,0 +1,117 @@
+import sys
+import os
+import threading
+import tempfile
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from chat_writer import ChatWriter, SyncChatWriter, get_chat_writer, close_chat_writers
+from database import LeaveDatabase
+
+
+def _temp_database():
+    return LeaveDatabase(os.path.join(tempfile.mkdtemp(), 'Leave_Data.xlsx'))
+
+
+def test_queued_turns_are_visible_and_flushed():
+    """History includes turns still in the queue, and flush writes them exactly once"""
+    db = _temp_database()
+    release = threading.Event()
+    save_turns = db.save_chat_turns
+    batches = []
+
+    def slow_save(turns):
+        release.wait(5)
+        batches.append(len(turns))
+        return save_turns(turns)
+
+    db.save_chat_turns = slow_save
+    writer = ChatWriter(db, max_pending=100, batch_size=50)
+    for i in range(5):
+        assert writer.save_turn('1001', f'message {i}', f'reply {i}')
+
+    # Nothing is written yet - the queued turns still show up in the history
+    history = writer.get_chat_history('1001', limit=4)
+    assert [m.message for m in history] == ['message 3', 'reply 3', 'message 4', 'reply 4']
+    assert writer.stats()['pending'] == 5
+    release.set()
+    assert writer.flush(timeout=10)
+
+    history = writer.get_chat_history('1001', limit=10)
+    messages = [m.message for m in history]
+    assert messages[-2:] == ['message 4', 'reply 4']
+    assert messages.count('message 0') == 1
+    assert sum(batches) == 5 and len(batches) <= 2   # the first turn, then the rest in one batch
+    writer.close()
+
+
+def test_full_queue_and_close_write_inline():
+    """A full queue or a closed writer falls back to a synchronous write"""
+    db = _temp_database()
+    writer = ChatWriter(db, max_pending=1)
+    writer.close()
+    assert writer.save_turn('1001', 'after close', 'reply')
+    assert writer.stats()['sync_fallbacks'] == 1
+    assert [m.message for m in db.get_chat_history('1001')][-2:] == ['after close', 'reply']
+
+    sync_writer = SyncChatWriter(db)
+    assert sync_writer.save_turn('1001', 'sync', None)
+    assert db.get_chat_history('1001')[-1].message == 'sync'
+
+
+def test_failed_batches_are_retried_not_dropped():
+    """A failed write keeps the turns pending and visible, then retries until they are stored"""
+    db = _temp_database()
+    save_turns = db.save_chat_turns
+    failures = [True, True]
+
+    def flaky_save(turns):
+        if failures:
+            failures.pop()
+            return False
+        return save_turns(turns)
+
+    db.save_chat_turns = flaky_save
+    writer = ChatWriter(db, retry_delay=0.01)
+    assert writer.save_turn('1001', 'kept', 'reply')
+    assert writer.flush(timeout=10)
+    assert writer.stats()['failed_writes'] == 2
+    assert [m.message for m in db.get_chat_history('1001')][-2:] == ['kept', 'reply']
+    writer.close()
+
+
+def test_identical_turns_in_the_same_second_are_kept():
+    """Pending turns are never matched against stored ones by value"""
+    db = _temp_database()
+    writer = ChatWriter(db)
+    assert writer.save_turn('1001', 'yes', 'Noted')
+    assert writer.flush(timeout=10)
+    assert writer.save_turn('1001', 'yes', 'Noted')
+
+    messages = [m.message for m in writer.get_chat_history('1001')]
+    assert messages[-4:] == ['yes', 'Noted', 'yes', 'Noted']
+    writer.close()
+
+
+def test_writers_live_on_their_database():
+    """Each database object has its own shared writer until it is closed"""
+    db, other = _temp_database(), _temp_database()
+    writer = get_chat_writer(db, 'async')
+    assert get_chat_writer(db, 'async') is writer
+    assert get_chat_writer(other, 'async') is not writer
+    assert writer.save_turn('1001', 'before close', None)
+
+    close_chat_writers(db)
+    assert writer.closed and not writer._thread.is_alive()
+    assert db.get_chat_history('1001')[-1].message == 'before close'
+    assert get_chat_writer(db, 'async') is not writer
+    close_chat_writers(db)
+    close_chat_writers(other)
+
+
+if __name__ == "__main__":
+    test_queued_turns_are_visible_and_flushed()
+    test_full_queue_and_close_write_inline()
+    test_failed_batches_are_retried_not_dropped()
+    test_identical_turns_in_the_same_second_are_kept()
+    test_writers_live_on_their_database()
+    print("✅ Chat writer tests passed")
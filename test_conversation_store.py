@@ -0,0 +1,132 @@
+import sys
+import os
+import time
+import tempfile
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from datetime import date
+from conversation_store import ConversationStore, ConversationState, SQLiteConversationStore
+from chatbot_enhanced import EnhancedLeaveChatbot
+from database import LeaveDatabase
+
+
+def test_store_is_bounded_and_expires():
+    """Idle states are not stored, the oldest users are evicted and idle entries expire"""
+    store = ConversationStore(ttl_seconds=0.05, max_entries=100)
+    store.put('1', ConversationState())
+    assert len(store) == 0
+
+    for user_id in range(150):
+        store.put(user_id, ConversationState('leave_application', 1))
+    assert len(store) == 100
+    assert store.stats()['evictions'] == 50
+    assert store.get(0).is_idle                     # evicted
+    assert store.get(149).current_step == 1
+
+    time.sleep(0.06)
+    assert store.get(149).is_idle
+    assert store.stats()['expirations'] >= 1
+
+
+def test_flow_state_survives_between_turns():
+    """The leave flow keeps its step in the store and is dropped once finished"""
+    db = LeaveDatabase(os.path.join(tempfile.mkdtemp(), 'Leave_Data.xlsx'))
+    bot = EnhancedLeaveChatbot(db)
+
+    bot.process_message('1001', 'I want to apply leave')
+    assert bot.conversations.get('1001').current_step == 1
+    bot.process_message('1001', 'CL')
+    assert bot.conversations.get('1001').pending_leave_type == 'CL'
+    bot.clear_conversation_context('1001')
+    assert len(bot.conversations) == 0
+
+
+def test_sqlite_store_is_shared_and_durable():
+    """A second store on the same file (another worker, or after a restart) sees the state"""
+    path = os.path.join(tempfile.mkdtemp(), 'conversations.db')
+    first = SQLiteConversationStore(path, ttl_seconds=60)
+    first.put('1001', ConversationState('leave_application', 2, 'EL', [date(2025, 10, 6), date(2025, 10, 7)]))
+    first.put('1002', ConversationState())
+    assert len(first) == 1
+
+    second = SQLiteConversationStore(path, ttl_seconds=60)
+    state = second.get('1001')
+    assert (state.current_step, state.pending_leave_type) == (2, 'EL')
+    assert state.pending_dates == [date(2025, 10, 6), date(2025, 10, 7)]
+
+    second.discard('1001')
+    assert first.get('1001').is_idle
+
+    expiring = SQLiteConversationStore(path, ttl_seconds=0.05)
+    expiring.put('1003', ConversationState('leave_application', 1))
+    time.sleep(0.06)
+    assert expiring.get('1003').is_idle
+    assert expiring.stats()['expirations'] == 1
+
+
+def test_chat_turn_is_one_write():
+    """A turn writes both rows at once, and a failed turn still keeps the user message once"""
+    db = LeaveDatabase(os.path.join(tempfile.mkdtemp(), 'Leave_Data.xlsx'))
+    writes = []
+    append_rows = db._append_chat_rows
+    db._append_chat_rows = lambda *args: writes.append(args) or append_rows(*args)
+    bot = EnhancedLeaveChatbot(db)
+
+    bot.process_message('1001', 'hello')
+    bot.chat_log.flush()
+    assert len(writes) == 1
+    last_turn = db.get_chat_history('1001')[-2:]
+    assert [m.role for m in last_turn] == ['user', 'assistant'] and last_turn[0].message == 'hello'
+
+    def broken_flow(*args):
+        raise RuntimeError('flow failed')
+    bot._handle_conversation_flow = broken_flow
+    bot.process_message('1001', 'what is my balance')
+    bot.chat_log.flush()
+    assert len(writes) == 2
+    assert [m.message for m in db.get_chat_history('1001')][-1] == 'what is my balance'
+
+
+def test_leave_application_streams_progress():
+    """A multi-date application acknowledges first, reports each date, then ends with the summary"""
+    db = LeaveDatabase(os.path.join(tempfile.mkdtemp(), 'Leave_Data.xlsx'))
+    bot = EnhancedLeaveChatbot(db)
+    bot.process_message('1001', 'I want to apply leave')
+    bot.process_message('1001', 'EL')
+
+    updates = list(bot.process_message_stream('1001', '6 oct 2031 to 8 oct 2031'))
+    assert updates[0].startswith('⏳ Processing your EL application for 3 days')
+    assert 'Submitted 08-Oct-2031 (3/3)' in updates[-2]
+    assert updates[-1].startswith('✅ **Application Submitted!**')
+    bot.chat_log.flush()
+    assert db.get_chat_history('1001')[-1].message == updates[-1]
+
+
+def test_disconnected_stream_still_saves_the_turn():
+    """Closing the stream mid-application still files every date and saves the flow state and the turn"""
+    db = LeaveDatabase(os.path.join(tempfile.mkdtemp(), 'Leave_Data.xlsx'))
+    conversations = SQLiteConversationStore(os.path.join(tempfile.mkdtemp(), 'conversations.db'))
+    bot = EnhancedLeaveChatbot(db, conversations=conversations)
+    bot.process_message('1001', 'I want to apply leave')
+    bot.process_message('1001', 'EL')
+
+    stream = bot.process_message_stream('1001', '6 oct 2031 to 8 oct 2031')
+    assert next(stream).startswith('⏳ Processing your EL application for 3 days')
+    stream.close()                      # what Gradio does when the client goes away
+    assert db.get_user_leave_dates(1001) >= {date(2031, 10, 6), date(2031, 10, 7), date(2031, 10, 8)}
+    assert conversations.get('1001').is_idle
+
+    bot.chat_log.flush()
+    history = db.get_chat_history('1001')
+    assert history[-2].message == '6 oct 2031 to 8 oct 2031'
+    assert history[-1].message.startswith('✅ **Application Submitted!**')
+    bot.close()
+
+if __name__ == "__main__":
+    test_store_is_bounded_and_expires()
+    test_flow_state_survives_between_turns()
+    test_sqlite_store_is_shared_and_durable()
+    test_chat_turn_is_one_write()
+    test_leave_application_streams_progress()
+    test_disconnected_stream_still_saves_the_turn()
+    print("✅ Conversation store tests passed")
@@ -0,0 +1,105 @@
+import sys
+import os
+from datetime import date
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+import date_service
+import date_grammar
+import date_engine
+from date_service import parse_date
+
+
+def test_cached_parse_is_keyed_by_reference_date():
+    """Equivalent expressions share an entry; a new day gets a fresh result"""
+    date_service.clear_cache()
+    assert parse_date("Tomorrow", date(2025, 12, 31)) == date(2026, 1, 1)
+    assert parse_date("  tomorrow ", date(2025, 12, 31)) == date(2026, 1, 1)
+    assert parse_date("tomorrow", date(2026, 1, 1)) == date(2026, 1, 2)
+
+    stats = date_service.cache_stats()
+    assert stats['hits'] == 1 and stats['misses'] == 2
+
+
+def test_explicit_formats_use_reference_year():
+    """Formats without a year take the reference year"""
+    formats = ('%d-%m-%Y', '%d-%b', '%d%b')
+    assert parse_date("25sep", date(2025, 1, 10), formats) == date(2025, 9, 25)
+    assert parse_date("25-SEP", date(2024, 1, 10), formats) == date(2024, 9, 25)
+    assert parse_date("07-10-2025", date(2024, 1, 10), formats) == date(2025, 10, 7)
+    assert parse_date("", date(2025, 1, 10), formats) is None
+
+
+def test_grammar_shapes():
+    """The fast path recognizes the common shapes without dateparser"""
+    reference = date(2025, 10, 15)  # Wednesday
+    date_grammar.reset_stats()
+
+    assert date_grammar.extract("apply EL 25-09-2025", reference).dates == (date(2025, 9, 25),)
+    assert date_grammar.extract("25sep", reference).dates == (date(2025, 9, 25),)
+    assert date_grammar.extract("next monday", reference).dates == (date(2025, 10, 20),)
+    assert date_grammar.extract("last friday", reference).dates == (date(2025, 10, 10),)
+    assert date_grammar.extract("today and tomorrow", reference).dates == (reference, date(2025, 10, 16))
+
+    match = date_grammar.extract("1 to 5 dec", reference)
+    assert match.is_range and (match.start, match.end) == (date(2025, 12, 1), date(2025, 12, 5))
+    assert match.expand() == [date(2025, 12, d) for d in (1, 2, 3, 4, 5)]
+
+    match = date_grammar.extract("28 dec to 2 jan", reference)
+    assert (match.start, match.end) == (date(2025, 12, 28), date(2026, 1, 2))
+
+    assert date_grammar.extract("hello there", reference) is None
+    assert date_grammar.extract("may i take 3 days", reference) is None
+    assert date_grammar.stats()['hits'] == 7 and date_grammar.stats()['misses'] == 2
+
+
+def test_grammar_ignores_words_with_day_or_month_prefixes():
+    """Only whole weekday and month names count - 'wedding' is not Wednesday"""
+    reference = date(2025, 10, 15)  # Wednesday
+    for text in ("cousin wedding", "I am not satisfied", "this month", "monitor repair",
+                 "friendly visit", "sunny day", "marriage function", "junket"):
+        assert date_grammar.extract(text, reference) is None, text
+
+    assert date_grammar.extract("I want CL on 24-10-2025 for my cousin wedding", reference).dates == \
+        (date(2025, 10, 24),)
+    assert date_grammar.extract("not satisfied, leave tomorrow", reference).dates == (date(2025, 10, 16),)
+    match = date_grammar.extract("apply EL this month 21-10-2025 to 23-10-2025", reference)
+    assert (match.start, match.end) == (date(2025, 10, 21), date(2025, 10, 23))
+    # Abbreviations still work
+    assert date_grammar.extract("next tues", reference).dates == (date(2025, 10, 21),)
+    assert date_grammar.extract("thurs", reference).dates == (date(2025, 10, 16),)
+    assert date_grammar.extract("5 sept", reference).dates == (date(2025, 9, 5),)
+
+
+def test_engine_ranges():
+    """Normalized ranges with half-day flags, expanded to working days"""
+    reference = date(2025, 10, 15)  # Wednesday
+    date_engine.clear_cache()
+
+    assert date_engine.extract("Apply EL Oct 20-22", reference) == (date_engine.DateRange(
+        date(2025, 10, 20), date(2025, 10, 22)),)
+    assert date_engine.leave_dates("CL tmrw please", reference) == [date(2025, 10, 16)]
+    assert date_engine.leave_dates("sick leave 3 days ago", reference) == [date(2025, 10, 12)]
+    # Rolls into next week, skipping the weekend and the 20 Oct public holiday
+    assert date_engine.leave_dates("friday to tuesday", reference) == [date(2025, 10, 17), date(2025, 10, 21)]
+    assert date_engine.leave_dates("hello", reference) == []
+    assert date_engine.leave_dates("may i take 3 days", reference) == []
+
+    half = date_engine.extract("half day tomorrow", reference)[0]
+    assert (half.start, half.start_half, half.duration) == (date(2025, 10, 16), True, 0.5)
+    span = date_engine.extract("21 oct afternoon to 23 oct", reference)[0]
+    assert (span.start_half, span.end_half, span.duration) == (True, False, 2.5)
+
+    # Dateparser fallback for shapes the grammar does not know
+    assert date_engine.leave_dates("leave on 1 week from now", reference) == [date(2025, 10, 22)]
+
+    date_engine.leave_dates("Apply EL   oct 20-22", reference)
+    assert date_engine.cache_stats()['hits'] >= 1
+
+
+if __name__ == "__main__":
+    test_cached_parse_is_keyed_by_reference_date()
+    test_explicit_formats_use_reference_year()
+    test_grammar_shapes()
+    test_grammar_ignores_words_with_day_or_month_prefixes()
+    test_engine_ranges()
+    print("✅ Date tests passed")
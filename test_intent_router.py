@@ -0,0 +1,44 @@
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from intent_router import route_message
+
+
+def test_word_boundaries():
+    """Short keywords never match inside longer words"""
+    assert route_message("hello").intents == ['greeting']
+    assert route_message("hello").leave_type is None      # 'el' inside 'hello'
+    assert route_message("help").leave_type is None       # 'el' inside 'help'
+    assert route_message("this is it").intents == []      # 'hi' inside 'this'
+
+
+def test_ranked_intents_and_slots():
+    """Longest phrase wins at each position and slots are filled in the same scan"""
+    route = route_message("I want to apply sick leave for tomorrow")
+    assert route.intent == 'apply'
+    assert route.has('leave')
+    assert route.leave_type == 'SL'
+
+    route = route_message("What is my application status?")
+    assert route.intent == 'status'
+    assert not route.has('apply')
+
+    assert route_message("Contact HR").has('contact')
+    assert route_message("clear   chat").intent == 'clear_chat'
+
+
+def test_first_picks_best_ranked_handler():
+    """Handlers dispatch on the best-ranked intent, not the first one they test for"""
+    handlers = ('apply', 'balance', 'status', 'policy', 'greeting', 'help')
+    assert route_message("what is the status of my request").first(*handlers) == 'status'
+    assert route_message("i need my balance").first(*handlers) == 'balance'
+    assert route_message("i need leave on monday").first(*handlers) == 'apply'
+    assert route_message("this is it").first(*handlers) is None
+
+
+if __name__ == "__main__":
+    test_word_boundaries()
+    test_ranked_intents_and_slots()
+    test_first_picks_best_ranked_handler()
+    print("✅ Intent router tests passed")
@@ -0,0 +1,56 @@
+import sys
+import os
+import threading
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from loadtest import LoadTest, load_transcripts, compare
+from config import Config
+
+
+def test_replay_reports_latency_and_lock_wait():
+    """A small offline run replays every turn and leaves the real workbook untouched"""
+    before = os.stat(Config.EXCEL_FILE).st_mtime_ns
+    report = LoadTest(users=4, concurrency=2, rate=0).run()
+
+    assert report['turns'] == 3 + 4 + 3 + 2
+    assert report['errors'] == 0
+    assert report['latency']['count'] == report['turns']
+    assert report['latency']['p50_ms'] <= report['latency']['p99_ms'] <= report['latency']['max_ms']
+    assert report['lock_wait']['count'] > 0
+    assert os.stat(Config.EXCEL_FILE).st_mtime_ns == before
+
+    assert any(line.startswith('  errors: 0 -> 0') for line in compare(report, report))
+
+
+def _mtime(path):
+    return os.stat(path).st_mtime_ns if os.path.exists(path) else None
+
+
+def test_run_stays_inside_its_work_dir():
+    """Persistence mode and conversation store are injected, not set globally, and threads stop before cleanup"""
+    persistence, conversations_db = Config.CHAT_PERSISTENCE, _mtime(Config.CONVERSATION_DB)
+    before = {thread.ident for thread in threading.enumerate()}
+
+    report = LoadTest(users=2, concurrency=2, rate=0, persistence='sync', conversation_backend='sqlite').run()
+    assert report['errors'] == 0 and report['chat_writer']['mode'] == 'sync'
+    assert report['config']['conversation_backend'] == 'sqlite'
+    assert Config.CHAT_PERSISTENCE == persistence
+    assert _mtime(Config.CONVERSATION_DB) == conversations_db
+
+    LoadTest(users=2, concurrency=2, rate=0, persistence='async').run()
+    leftover = [thread.name for thread in threading.enumerate()
+                if thread.ident not in before and thread.name.startswith(('chat-writer', 'prefetch'))]
+    assert leftover == []
+
+
+def test_transcripts_from_chat_history():
+    """Each user's messages become one transcript"""
+    transcripts = load_transcripts(Config.EXCEL_FILE)
+    assert transcripts and all(isinstance(message, str) for messages in transcripts for message in messages)
+
+
+if __name__ == "__main__":
+    test_replay_reports_latency_and_lock_wait()
+    test_run_stays_inside_its_work_dir()
+    test_transcripts_from_chat_history()
+    print("✅ Load test harness tests passed")
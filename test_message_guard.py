@@ -0,0 +1,156 @@
+import sys
+import os
+import time
+import tempfile
+import threading
+from datetime import date
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+import date_engine
+import date_service
+import message_guard
+from config import Config
+from message_guard import prepare, message_budget, call_with_budget, BudgetExceeded
+
+
+def test_prepare_bounds_and_normalizes():
+    """Invisible characters go, look-alikes fold, long words and long messages are cut"""
+    guarded = prepare("  Apply\u200b EL\x00 for  \uff54\uff4f\uff4d\uff4f\uff52\uff52\uff4f\uff57 ")
+    assert guarded.text == "Apply EL for tomorrow" and not guarded.truncated
+
+    guarded = prepare("leave " + "9" * 5000 + " tomorrow " * 500, max_length=100, max_word_length=10)
+    assert guarded.truncated and guarded.original_length > 5000
+    assert len(guarded.text) <= 100 and max(len(word) for word in guarded.words) <= 10
+    assert prepare(None).text == ""
+
+
+class FakeClock:
+    """A clock the test moves by hand"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+    def advance(self, seconds):
+        self.now += seconds
+
+
+def _wait_for_idle_guard():
+    """Abandoned calls free their worker once they return"""
+    for _ in range(500):
+        if message_guard.in_flight() == 0:
+            return
+        time.sleep(0.01)
+    assert False, "guard workers never came free"
+
+
+def test_slow_calls_degrade_within_the_budget():
+    """A slow parser call is abandoned at the deadline; a spent budget skips the call"""
+    message_guard.reset_stats()
+    assert call_with_budget(lambda: 42) == 42                 # no budget - runs inline
+
+    clock = FakeClock()
+    release = threading.Event()
+    with message_budget(0.05, clock=clock) as budget:
+        assert call_with_budget(lambda: 42) == 42
+        try:
+            call_with_budget(release.wait)
+            assert False, "expected BudgetExceeded"
+        except BudgetExceeded:
+            pass
+        clock.advance(0.05)
+        assert budget.expired
+        try:
+            call_with_budget(lambda: 42)
+            assert False, "expected BudgetExceeded"
+        except BudgetExceeded:
+            pass
+    release.set()
+    _wait_for_idle_guard()
+    assert message_guard.stats() == {'completed': 1, 'timeouts': 1, 'skipped': 1, 'busy': 0}
+
+
+def test_full_guard_pool_fails_fast():
+    """Runaway calls that hold every guard worker make new calls degrade at once, not queue"""
+    message_guard.reset_stats()
+    release = threading.Event()
+    for _ in range(Config.GUARD_WORKERS):
+        with message_budget(0.01):
+            try:
+                call_with_budget(release.wait)
+            except BudgetExceeded:
+                pass
+    assert message_guard.in_flight() == Config.GUARD_WORKERS
+
+    # A fresh budget does not help - there is no worker to run the call
+    with message_budget(60):
+        try:
+            call_with_budget(lambda: 42)
+            assert False, "expected BudgetExceeded"
+        except BudgetExceeded:
+            pass
+    assert message_guard.stats()['busy'] == 1
+
+    release.set()
+    _wait_for_idle_guard()
+    with message_budget(60):
+        assert call_with_budget(lambda: 42) == 42
+
+
+def test_dateparser_input_is_bounded():
+    """Over-budget fallbacks give no dates and are not cached; long text never reaches dateparser"""
+    reference = date(2025, 10, 15)
+    date_engine.clear_cache()
+    parse_date = date_service.parse_date
+    release = threading.Event()
+    seen = []
+
+    def slow_parse(text, *args):
+        seen.append(text)
+        release.wait()
+        return parse_date(text, *args)
+
+    date_service.parse_date = slow_parse
+    try:
+        with message_budget(0.01):
+            assert date_engine.leave_dates("leave on 1 week from now", reference) == []
+        release.set()
+        _wait_for_idle_guard()
+
+        seen.clear()
+        date_engine.leave_dates("leave on " + " ".join(["someday"] * 50), reference)
+        assert seen == []
+    finally:
+        date_service.parse_date = parse_date
+    assert date_engine.leave_dates("leave on 1 week from now", reference) == [date(2025, 10, 22)]
+
+
+def test_pathological_message_does_not_stall_the_chatbot():
+    """A huge pasted message is cut down before any parser sees it"""
+    from database import LeaveDatabase
+    from chatbot_enhanced import EnhancedLeaveChatbot
+
+    parse_date = date_service.parse_date
+    seen = []
+    date_service.parse_date = lambda text, *args: seen.append(text) or parse_date(text, *args)
+    try:
+        bot = EnhancedLeaveChatbot(LeaveDatabase(os.path.join(tempfile.mkdtemp(), 'Leave_Data.xlsx')))
+        bot.process_message('1001', 'I want to apply leave')
+        bot.process_message('1001', 'EL')
+        reply = bot.process_message('1001', '1' + 'a-' * 50000 + ' to ' + '1' * 50000)
+        bot.chat_log.flush()
+    finally:
+        date_service.parse_date = parse_date
+    assert isinstance(reply, str) and reply
+    assert all(len(text) <= Config.DATEPARSER_MAX_LENGTH for text in seen)
+
+
+if __name__ == "__main__":
+    test_prepare_bounds_and_normalizes()
+    test_slow_calls_degrade_within_the_budget()
+    test_full_guard_pool_fails_fast()
+    test_dateparser_input_is_bounded()
+    test_pathological_message_does_not_stall_the_chatbot()
+    print("✅ Message guard tests passed")
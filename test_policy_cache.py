@@ -0,0 +1,64 @@
+import sys
+import os
+import shutil
+import tempfile
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from config import Config
+from rag_system import LeavePolicyRAG
+import policy_cache
+
+
+def _temp_policy():
+    """Copy of rules.pdf with its own cache file - restores Config afterwards"""
+    work_dir = tempfile.mkdtemp()
+    pdf_path = os.path.join(work_dir, 'rules.pdf')
+    shutil.copyfile(Config.PDF_FILE, pdf_path)
+    return pdf_path, os.path.join(work_dir, 'policy_cache.json')
+
+
+def test_second_start_skips_pdf_parsing():
+    """The first start parses and caches; later starts load rules, pages and contacts from the cache"""
+    pdf_path, cache_file = _temp_policy()
+    original = Config.PDF_FILE, Config.POLICY_CACHE_FILE
+    Config.PDF_FILE, Config.POLICY_CACHE_FILE = pdf_path, cache_file
+    try:
+        first = LeavePolicyRAG(None)
+        assert os.path.exists(cache_file)
+        assert first.policy_knowledge['CL']['max_per_year'] == 10          # 'Casual\nLeave ... 10 days'
+        assert first.contact_info['hr_email'] != 'hr@company.com'           # parsed from the PDF
+
+        extract = LeavePolicyRAG._extract_pages_from_pdf
+        LeavePolicyRAG._extract_pages_from_pdf = lambda self, path: (_ for _ in ()).throw(AssertionError("parsed"))
+        try:
+            second = LeavePolicyRAG(None)
+        finally:
+            LeavePolicyRAG._extract_pages_from_pdf = extract
+        assert second.policy_knowledge == first.policy_knowledge
+        assert second.policy_pages == first.policy_pages and len(second.policy_pages) == 2
+        assert second.contact_info == first.contact_info
+    finally:
+        Config.PDF_FILE, Config.POLICY_CACHE_FILE = original
+
+
+def test_changed_pdf_or_parser_misses_the_cache():
+    """The key is the PDF content hash plus the parser version"""
+    pdf_path, cache_file = _temp_policy()
+    digest = policy_cache.file_hash(pdf_path)
+    assert policy_cache.save(digest, 1, ['page one'], {'EL': {}}, {}, cache_file)
+    assert policy_cache.load(digest, 1, cache_file)['pages'] == ['page one']
+    assert policy_cache.load(digest, 2, cache_file) is None
+
+    with open(pdf_path, 'ab') as f:
+        f.write(b'\n% edited')
+    assert policy_cache.load(policy_cache.file_hash(pdf_path), 1, cache_file) is None
+
+    with open(cache_file, 'w') as f:
+        f.write('{not json')
+    assert policy_cache.load(digest, 1, cache_file) is None
+
+
+if __name__ == "__main__":
+    test_second_start_skips_pdf_parsing()
+    test_changed_pdf_or_parser_misses_the_cache()
+    print("✅ Policy cache tests passed")
@@ -0,0 +1,77 @@
+import sys
+import os
+import tempfile
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from policy_search import PolicyIndex, chunk_pages, tokenize, benchmark
+
+PAGES = [
+    "Leave Policy Rules\n1. Leave Categories\n\x7f Casual Leave (CL): Employees are entitled to 10 days of Casual\n"
+    "Leave per year. \x7f Sick Leave (SL): A medical certificate must be submitted for sick leave exceeding\n"
+    "2 consecutive days.\n2. Application Process\nPlanned leave must be applied for at least one week in advance.\n",
+    "3. Special Leave Rules\n\x7f Maternity Leave: Eligible employees are entitled to 150 days of paid leave.\n"
+    "\x7f Compensatory Off: The company does not provide compensatory offs for weekend work.\n"
+    "4. Contact Information\nEmail: hr@example.com Phone: 12345\n",
+]
+
+
+def test_chunks_keep_sections_and_pages():
+    """Passages never cross a heading or a page, and carry both"""
+    passages = chunk_pages(PAGES, max_words=12, source='rules.pdf')
+    assert [p.section for p in passages if p.page == 2] == [
+        '3. Special Leave Rules', '3. Special Leave Rules', '4. Contact Information']
+    assert all(len(p.text.split()) <= 16 for p in passages)
+    assert passages[0].section == '' and passages[0].text == 'Leave Policy Rules'
+    assert passages[-1].citation == 'rules.pdf p.2'
+    assert tokenize("What are the Leaves?") == ['leave']
+
+
+def test_search_ranks_matching_passage_first():
+    index = PolicyIndex.from_pages(PAGES, max_words=20)
+    hits = index.search("is maternity leave paid", k=3)
+    assert hits[0].passage.text.startswith('Maternity Leave') and hits[0].passage.page == 2
+    assert [hit.score for hit in hits] == sorted((hit.score for hit in hits), reverse=True)
+    assert index.search("compensatory off on weekends")[0].passage.section == '3. Special Leave Rules'
+    assert index.search("medical certificate")[0].passage.page == 1
+    assert index.search("xyz qqq") == []
+
+    assert benchmark(index, repeat=1) > 0                 # timings come from `python policy_search.py`
+
+
+def _rag():
+    from config import Config
+    from rag_system import LeavePolicyRAG
+    original = Config.POLICY_CACHE_FILE
+    Config.POLICY_CACHE_FILE = os.path.join(tempfile.mkdtemp(), 'policy_cache.json')
+    try:
+        return LeavePolicyRAG(None)
+    finally:
+        Config.POLICY_CACHE_FILE = original
+
+
+def test_query_policy_cites_pages():
+    """Questions are answered from the PDF passages, which the sources cite"""
+    rag = _rag()
+    answer, sources = rag.query_policy("is maternity leave paid")
+    assert 'Maternity Leave' in answer and '(page 2)' in answer
+    assert sources == list(dict.fromkeys(hit.passage.citation for hit in rag.search_policy("is maternity leave paid")))
+
+
+def test_rule_summaries_follow_the_passages():
+    """Leave-type questions quote the passages first; rules.pdf is cited only for the summary"""
+    rag = _rag()
+    answer, sources = rag.query_policy("how many days of casual leave do i get")
+    assert answer.startswith("📄 **From the company leave policy:**") and '(page ' in answer
+    assert answer.index('(page ') < answer.index('Casual Leave (CL)')
+    assert sources[-1] == 'rules.pdf' and all(' p.' in source for source in sources[:-1])
+
+    answer, sources = rag.query_policy("xyz qqq")
+    assert sources == ['rules.pdf'] and '(page ' not in answer
+
+
+if __name__ == "__main__":
+    test_chunks_keep_sections_and_pages()
+    test_search_ranks_matching_passage_first()
+    test_query_policy_cites_pages()
+    test_rule_summaries_follow_the_passages()
+    print("✅ Policy search tests passed")
@@ -0,0 +1,69 @@
+import sys
+import os
+import threading
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from rate_limit import RateLimiter, WriteGate
+
+
+def test_token_bucket_per_user():
+    """Each user gets their own burst; the bucket refills over time"""
+    limiter = RateLimiter(burst=3, per_minute=600)   # 10 tokens per second
+    assert all(limiter.allow("1000") for _ in range(3))
+    assert not limiter.allow("1000")
+    assert limiter.allow("1001")                     # other users are unaffected
+    assert 0 < limiter.retry_after("1000") <= 0.1
+
+    limiter._buckets.set("1000", (0.0, limiter._buckets.get("1000")[1] - 0.5))
+    assert limiter.allow("1000")                     # half a second refilled ~5 tokens
+
+
+def test_write_gate_rejects_when_saturated():
+    """Callers beyond the in-flight cap are turned away instead of queueing"""
+    gate = WriteGate(max_pending=1, wait_seconds=0.01)
+    holding = threading.Event()
+    release = threading.Event()
+
+    def writer():
+        with gate.admit() as admitted:
+            assert admitted
+            holding.set()
+            release.wait(1)
+
+    thread = threading.Thread(target=writer)
+    thread.start()
+    holding.wait(1)
+    with gate.admit() as admitted:
+        assert not admitted
+    release.set()
+    thread.join()
+
+    with gate.admit() as admitted:
+        assert admitted
+    assert gate.rejected == 1
+
+
+def test_write_gate_counts_every_rejection():
+    """Rejections from many threads at once are all counted"""
+    gate = WriteGate(max_pending=1, wait_seconds=0)
+    with gate.admit() as admitted:
+        assert admitted
+
+        def turned_away():
+            for _ in range(500):
+                with gate.admit() as admitted:
+                    assert not admitted
+
+        threads = [threading.Thread(target=turned_away) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    assert gate.rejected == 8 * 500
+
+
+if __name__ == "__main__":
+    test_token_bucket_per_user()
+    test_write_gate_rejects_when_saturated()
+    test_write_gate_counts_every_rejection()
+    print("✅ Rate limit tests passed")
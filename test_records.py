@@ -0,0 +1,86 @@
+import sys
+import os
+import tempfile
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+import pandas as pd
+from database import LeaveDatabase
+from records import LeaveRequest, ChatMessage, Balance, Page
+
+
+def _temp_database():
+    return LeaveDatabase(os.path.join(tempfile.mkdtemp(), 'Leave_Data.xlsx'))
+
+
+def test_page_window():
+    """Cursors are offsets; the last page has no next cursor"""
+    assert Page.window(5, 2, None) == (0, 2, '2')
+    assert Page.window(5, 2, '2') == (2, 4, '4')
+    assert Page.window(5, 2, '4') == (4, 5, None)
+    assert Page.window(4, 2, '2') == (2, 4, None)         # exactly full last page
+    assert Page.window(5, None, None) == (0, 5, None)     # no limit - everything
+    assert Page.window(5, 2, '9') == (9, 5, None)         # past the end - an empty slice
+    assert Page.window(0, 2, None) == (0, 0, None)
+    assert Page.window(5, 2, '-3') == (0, 2, '2')         # negative cursors clamp to the start
+
+
+def test_from_frame_maps_columns():
+    """Records are built from the sheet columns - missing text becomes '', ids become ints"""
+    df = pd.DataFrame({
+        'Admin ID': [5000.0], 'UserId': [1001.0], 'Leave_Date': ['2030-01-07 00:00:00'], 'Status': ['Pending'],
+        'LeaveType': ['EL'], 'Reason': [None], 'AppliedDate': ['2030-01-01 09:30:00'], 'Duration': ['Half Day'],
+    })
+    request, = LeaveRequest.from_frame(df)
+    assert request == LeaveRequest(1001, '2030-01-07 00:00:00', 'Pending', 'EL', '', '2030-01-01 09:30:00',
+                                   'Half Day', 5000)
+    assert request.leave_day == '2030-01-07' and request.applied_day == '2030-01-01'
+    assert LeaveRequest.from_frame(df.iloc[0:0]) == []
+
+    chat = pd.DataFrame({'UserID': [1001], 'Role': ['user'], 'Message': ['hi'], 'Timestamp': ['2030-01-01 09:30:00']})
+    assert ChatMessage.from_frame(chat) == [ChatMessage(1001, 'user', 'hi', '2030-01-01 09:30:00')]
+
+    balance = Balance.from_row(pd.Series({'EL': 12.0, 'SL': float('nan'), 'CL': 3, 'TL': 15}))
+    assert balance == Balance(12, 0, 3, 15, True) and balance.days('EL') == 12
+
+
+def test_user_requests_page_newest_first():
+    """The list and paged queries agree on newest first, and pages cover every request once"""
+    db = _temp_database()
+    for day in ('2030-01-07', '2030-01-08', '2030-01-09', '2030-01-10'):
+        assert db.add_leave_request(1001, f'{day} 00:00:00', 'CL', 'test')
+
+    days = [request.leave_day for request in db.get_user_leave_requests(1001)]
+    assert days[:4] == ['2030-01-10', '2030-01-09', '2030-01-08', '2030-01-07']
+
+    pages, cursor = [], None
+    while True:
+        page = db.get_user_leave_requests_page(1001, limit=2, cursor=cursor)
+        pages.append([request.leave_day for request in page.items])
+        cursor = page.next_cursor
+        if cursor is None:
+            break
+    assert page.total == len(days) == 5
+    assert sum(pages, []) == days
+    assert pages[-1] == days[4:]
+
+
+def test_sheet_cache_invalidated_by_writes():
+    """A write through the database is visible to the next cached read"""
+    db = _temp_database()
+    before = db.get_user_leave_requests_page(1001).total
+    assert db.get_pending_requests_page(5000).total >= 1
+
+    assert db.add_leave_request(1001, '2030-01-07 00:00:00', 'CL', 'test')
+    assert db.get_user_leave_requests_page(1001).total == before + 1
+
+    pending = db.get_pending_requests_page(5000).total
+    assert db.update_leave_status(1001, '2030-01-07 00:00:00', 'Rejected')
+    assert db.get_pending_requests_page(5000).total == pending - 1
+
+
+if __name__ == "__main__":
+    test_page_window()
+    test_from_frame_maps_columns()
+    test_user_requests_page_newest_first()
+    test_sheet_cache_invalidated_by_writes()
+    print("✅ Record and paging tests passed")
@@ -0,0 +1,135 @@
+import sys
+import os
+import time
+import threading
+import tempfile
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from ttl_cache import TTLCache
+from sessions import SessionStore
+from auth import AuthSystem
+from database import LeaveDatabase
+from directory import UserDirectory, hash_password
+
+
+def test_ttl_cache_expiry_and_lru():
+    """Entries expire after the TTL and the least recently used entry is evicted first"""
+    cache = TTLCache(max_entries=2, ttl_seconds=0.05)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    assert cache.get('a') == 1          # 'a' is now most recently used
+    cache.set('c', 3)                   # evicts 'b'
+    assert cache.get('b') is None
+    assert cache.get('a') == 1 and cache.get('c') == 3
+
+    time.sleep(0.06)
+    assert cache.get('a') is None
+    stats = cache.stats()
+    assert stats['evictions'] == 1 and stats['expirations'] == 1
+
+
+def test_concurrent_logins_are_independent():
+    """Each login gets its own token - later logins never overwrite earlier ones"""
+    db = LeaveDatabase(os.path.join(tempfile.mkdtemp(), 'Leave_Data.xlsx'))
+    auth = AuthSystem(db, sessions=SessionStore(ttl_seconds=60, max_entries=500))
+    tokens = {}
+
+    def login(user_id):
+        token, _, _ = auth.login(str(user_id), "leave")
+        tokens[user_id] = token
+
+    threads = [threading.Thread(target=login, args=(uid,)) for uid in list(range(1000, 1011)) + [5000, 8001, 6099]]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(set(tokens.values())) == len(tokens)
+    for user_id, token in tokens.items():
+        current_user, role = auth.get_current_user(token)
+        assert current_user == str(user_id)
+        assert role == ("admin" if user_id >= 5000 else "employee")
+
+    auth.logout(tokens[1000])
+    assert auth.get_current_user(tokens[1000]) == (None, None)
+    assert auth.is_logged_in(tokens[1001])
+    assert auth.login("1000", "wrong")[0] is None
+
+
+def test_directory_roles_and_import():
+    """Roles come from the Available sheet and imports are indexed without a reload"""
+    db = LeaveDatabase(os.path.join(tempfile.mkdtemp(), 'Leave_Data.xlsx'))
+    directory = UserDirectory(db)
+    assert directory.role(1000) == "employee"
+    assert directory.role(5000) == "admin"
+    assert directory.role(4242) is None
+
+    directory.import_employees([{'UserId': 4242, 'Admin ID': 7777, 'PasswordHash': hash_password("s3cret")}])
+    assert directory.role(4242) == "employee"
+    assert directory.check_password(4242, "s3cret")
+    assert not directory.check_password(4242, "leave")
+    assert directory.check_password(1000, "leave")
+
+    # Naming an admin on an employee row does not create an admin login
+    assert directory.role(7777) is None and not directory.check_password(7777, "leave")
+    directory.add_admins([{'Admin ID': 7777, 'PasswordHash': hash_password("b0ss")}])
+    assert directory.role(7777) == "admin" and directory.check_password(7777, "b0ss")
+    assert not directory.check_password(7777, "leave")
+    # Existing admins can replace the default password with their own
+    assert directory.check_password(5000, "leave")
+    directory.add_admins([{'Admin ID': 5000, 'PasswordHash': hash_password("n3w")}])
+    assert directory.check_password(5000, "n3w") and not directory.check_password(5000, "leave")
+
+    # A fresh directory sees the imported row (and its hash) from the workbook
+    reloaded = UserDirectory(db)
+    assert reloaded.role(4242) == "employee" and reloaded.check_password(4242, "s3cret")
+
+    # Rows written by another process are picked up on the next unknown-ID lookup
+    db.add_employees([{'UserId': 4343, 'Admin ID': 7777}])
+    assert reloaded.role(4343) == "employee"
+    assert reloaded.role(7777) == "admin" and reloaded.check_password(5000, "n3w")
+
+
+def test_unknown_ids_do_not_reload_the_directory():
+    """A spray of unknown IDs, with chat writes changing the workbook in between, re-reads it at most once"""
+    db = LeaveDatabase(os.path.join(tempfile.mkdtemp(), 'Leave_Data.xlsx'))
+    directory = UserDirectory(db)
+    reads = []
+    read_sheet = db.read_sheet
+    db.read_sheet = lambda name, columns=None: reads.append(name) or read_sheet(name, columns)
+
+    for user_id in range(90000, 90020):
+        db.save_chat_message(1000, 'user', f"hello {user_id}")
+        assert directory.role(user_id) is None
+        assert directory.role(user_id) is None
+    assert reads.count('Available') <= 1
+
+
+def test_workbook_without_admins_sheet_is_only_migrated_explicitly():
+    """Loading the directory never writes the workbook; the migration adds each admin once"""
+    import pandas as pd
+    from migrate_admins import create_admins_sheet
+    db = LeaveDatabase(os.path.join(tempfile.mkdtemp(), 'Leave_Data.xlsx'))
+    sheets = pd.read_excel(db.file_path, sheet_name=None)
+    with pd.ExcelWriter(db.file_path, engine='openpyxl') as writer:
+        for name, df in sheets.items():
+            if name != 'Admins':
+                df.to_excel(writer, sheet_name=name, index=False)
+
+    directory = UserDirectory(db)
+    assert directory.role(6099) is None and not directory.check_password(6099, "leave")
+    assert 'Admins' not in pd.read_excel(db.file_path, sheet_name=None)
+
+    assert len(create_admins_sheet(db, password="b0ss")) == 3
+    assert create_admins_sheet(db) == []
+    assert sorted(pd.to_numeric(db.read_sheet('Admins')['Admin ID'])) == [5000, 6099, 8001]
+    directory.refresh(force=True)
+    assert directory.role(6099) == "admin" and directory.check_password(6099, "b0ss")
+
+if __name__ == "__main__":
+    test_ttl_cache_expiry_and_lru()
+    test_concurrent_logins_are_independent()
+    test_directory_roles_and_import()
+    test_unknown_ids_do_not_reload_the_directory()
+    test_workbook_without_admins_sheet_is_only_migrated_explicitly()
+    print("✅ Session tests passed")
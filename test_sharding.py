@@ -0,0 +1,110 @@
+import sys
+import os
+import json
+import tempfile
+import threading
+from datetime import date
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+import pandas as pd
+from database import LeaveDatabase
+from sharding import ShardedLeaveDatabase
+
+
+def _sharded_database():
+    """Sample workbook split by a Department column - one employee without a department, one without an admin"""
+    work_dir = tempfile.mkdtemp()
+    source = LeaveDatabase(os.path.join(work_dir, 'Leave_Data.xlsx')).file_path
+    sheets = pd.read_excel(source, sheet_name=None)
+    available = sheets['Available']
+    available['Department'] = ['Ops', 'Sales', None] + ['Ops'] * (len(available) - 3)
+    available.loc[available['UserId'] == 1010, 'Admin ID'] = None
+    with pd.ExcelWriter(source, engine='openpyxl') as writer:
+        for name, df in sheets.items():
+            df.to_excel(writer, sheet_name=name, index=False)
+    return ShardedLeaveDatabase(os.path.join(work_dir, 'shards'), 'Department', source), sheets
+
+
+def test_split_keeps_every_row():
+    """Blank shard values land in the default shard instead of being dropped"""
+    db, sheets = _sharded_database()
+    assert db.all_shard_keys() == ['Ops', 'Sales', 'default']
+    assert db.shard_for_user(1002) is db.shard('default')
+    assert db.get_user_balance(1002) is not None and db.get_user_balance(1010) is not None
+    for sheet_name in ('Available', 'Hierarchy', 'ChatHistory'):
+        assert len(db.read_sheet(sheet_name)) == len(sheets[sheet_name]), sheet_name
+    assert db.shard_for_user(424242) is None and db.get_user_balance(424242) is None
+
+
+def test_admin_queries_span_shards():
+    """Admin 5000's employees sit in three shards - pending requests merge and page across them"""
+    db, _ = _sharded_database()
+    assert len(db.shards_for_admin(5000)) == 3
+    first = db.get_pending_requests_page(5000, limit=2)
+    assert first.total == 3 and len(first.items) == 2 and first.next_cursor is not None
+    second = db.get_pending_requests_page(5000, limit=2, cursor=first.next_cursor)
+    assert len(second.items) == 1 and second.next_cursor is None
+    assert {req.user_id for req in first.items + second.items} == {1000, 1001, 1002}
+
+
+def test_admin_chat_uses_the_default_shard():
+    """Admin IDs have no employee row - their chat still persists"""
+    db, _ = _sharded_database()
+    assert db.save_chat_message(5000, 'user', 'show pending requests')
+    assert db.save_chat_turns([(5000, 'approve all', 'Done', None), (1001, 'hi', 'Hello', None)])
+    assert [m.message for m in db.get_chat_history(5000)] == ['show pending requests', 'approve all', 'Done']
+    assert db.is_weekend(date(2025, 10, 18)) and db.is_public_holiday(date(2025, 10, 20))
+
+
+def test_concurrent_imports_keep_the_index_whole():
+    """Imports into different shards update and save the routing index one at a time"""
+    db, _ = _sharded_database()
+    errors = []
+
+    def import_into(department, first_id):
+        try:
+            for user_id in range(first_id, first_id + 5):
+                db.add_employees([{'UserId': user_id, 'Admin ID': 7000, 'Department': department}])
+                db.all_shard_keys()
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=import_into, args=args) for args in (('Ops', 2000), ('Sales', 3000))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert not errors
+    reopened = ShardedLeaveDatabase(db.shard_dir)
+    assert all(reopened.shard_for_user(uid) is reopened.shard('Ops') for uid in range(2000, 2005))
+    assert all(reopened.shard_for_user(uid) is reopened.shard('Sales') for uid in range(3000, 3005))
+    assert len(reopened.shards_for_admin(7000)) == 2
+    assert not [name for name in os.listdir(db.shard_dir) if name.endswith('.tmp')]
+
+
+def test_index_without_users_gets_a_default_shard():
+    """An index with only admin routes, or no shard files at all, still opens"""
+    db, sheets = _sharded_database()
+    source = os.path.join(os.path.dirname(db.shard_dir), 'Leave_Data.xlsx')
+    with open(db.index_path, 'w', encoding='utf-8') as f:
+        json.dump({'shard_by': 'Department', 'users': {}, 'admins': {'5000': ['Ops']}}, f)
+
+    # First the template is another shard, then - with no shard files left - the source workbook
+    for removed in (['default'], ['default', 'Ops', 'Sales']):
+        for key in removed:
+            os.remove(db._shard_path(key))
+        empty = ShardedLeaveDatabase(db.shard_dir, source_file=source)
+        assert empty.all_shard_keys() == ['default']
+        assert set(pd.read_excel(empty._shard_path('default'), sheet_name=None)) >= {'Available', 'Hierarchy'}
+        available = empty.read_sheet('Available')
+        assert available.empty and list(available.columns) == list(sheets['Available'].columns)
+
+
+if __name__ == "__main__":
+    test_split_keeps_every_row()
+    test_admin_queries_span_shards()
+    test_admin_chat_uses_the_default_shard()
+    test_concurrent_imports_keep_the_index_whole()
+    test_index_without_users_gets_a_default_shard()
+    print("✅ Sharding tests passed")
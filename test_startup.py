@@ -0,0 +1,33 @@
+import sys
+import os
+import subprocess
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from config import Config
+
+HEAVY_MODULES = ('numpy', 'pandas', 'dateparser', 'PyPDF2')
+
+
+def _loaded_after(statement):
+    """Heavy modules present in sys.modules after running `statement` in a fresh interpreter"""
+    code = f"import sys; {statement}; print([m for m in {HEAVY_MODULES!r} if m in sys.modules])"
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True,
+                            cwd=Config.BASE_DIR, check=True)
+    return result.stdout.strip().splitlines()[-1]
+
+
+def test_heavy_modules_are_deferred():
+    """No entry point pulls in numpy, pandas, dateparser or PyPDF2 at import time"""
+    for statement in Config.IMPORT_BUDGET_STATEMENTS + ("import accrual, work_calendar, sharding",):
+        assert _loaded_after(statement) == "[]", statement
+
+
+def test_first_use_loads_the_module():
+    """The lazy proxies import the real module when it is first needed"""
+    assert _loaded_after("import work_calendar; work_calendar.get_calendar()") == "['numpy']"
+
+
+if __name__ == "__main__":
+    test_heavy_modules_are_deferred()
+    test_first_use_loads_the_module()
+    print("✅ Startup tests passed")
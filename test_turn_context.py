@@ -0,0 +1,102 @@
+import sys
+import os
+import tempfile
+import threading
+from collections import Counter
+from datetime import date
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from turn_context import TurnContext, Prefetcher
+from chatbot_enhanced import EnhancedLeaveChatbot
+from database import LeaveDatabase
+
+
+def _counting_database():
+    """Temp database that counts calls to its read methods"""
+    db = LeaveDatabase(os.path.join(tempfile.mkdtemp(), 'Leave_Data.xlsx'))
+    calls = Counter()
+    for name in ('get_user_balance', 'get_user_leave_dates', 'check_date_overlap', 'get_user_leave_requests'):
+        def counted(*args, _name=name, _method=getattr(db, name), **kwargs):
+            calls[_name] += 1
+            return _method(*args, **kwargs)
+        setattr(db, name, counted)
+    return db, calls
+
+
+def test_snapshot_loads_once():
+    """Repeated reads in one turn hit the database once, and applied dates join the snapshot"""
+    db, calls = _counting_database()
+    turn = TurnContext(db, '1001')
+    assert turn.balance is turn.balance
+    assert not turn.has_leave_on(date(2031, 10, 6))
+    assert not turn.has_leave_on(date(2031, 10, 7))
+    turn.record_leave(date(2031, 10, 6))
+    assert turn.has_leave_on(date(2031, 10, 6))
+    assert calls == Counter({'get_user_balance': 1, 'get_user_leave_dates': 1})
+
+    db.add_leave_request(1001, '2031-10-07 00:00:00', 'EL', 'Test')
+    assert db.get_user_leave_dates(1001) >= {date(2031, 10, 7)}
+    assert db.check_date_overlap(1001, '2031-10-07 00:00:00')
+
+
+def test_application_reads_each_source_once():
+    """A three-day application reads the balance and existing leave once for the whole turn"""
+    db, calls = _counting_database()
+    bot = EnhancedLeaveChatbot(db)
+    bot.prefetcher.prefetch = lambda user_id: None          # measure the cold path
+    bot.process_message('1001', 'I want to apply leave')
+    bot.process_message('1001', 'EL')
+    calls.clear()
+
+    reply = bot.process_message('1001', '6 oct 2031 to 8 oct 2031')
+    assert reply.startswith('✅ **Application Submitted!**')
+    assert calls == Counter({'get_user_balance': 1, 'get_user_leave_dates': 1})
+
+
+def test_date_step_is_prefetched():
+    """Reaching the date step warms the next turn; a leave write in between drops the warm data"""
+    db, calls = _counting_database()
+    bot = EnhancedLeaveChatbot(db)
+    bot.process_message('1001', 'I want to apply leave')
+    bot.process_message('1001', 'EL')                      # now at the date step
+    bot.prefetcher._executor.shutdown(wait=True)            # let the background load finish
+    calls.clear()
+
+    reply = bot.process_message('1001', '6 oct 2031 to 8 oct 2031')
+    assert reply.startswith('✅ **Application Submitted!**')
+    assert calls == Counter()                               # validation served from warm data
+
+    prefetcher = Prefetcher(db)
+    prefetcher.prefetch('1001')
+    db.save_chat_turn('1001', 'chat only', 'reply')         # chat writes keep it warm
+    assert prefetcher.take('1001')['leave_dates'] >= {date(2031, 10, 6)}
+    prefetcher.prefetch('1001')
+    db.add_leave_request(1001, '2031-10-09 00:00:00', 'EL', 'Test')
+    assert prefetcher.take('1001') == {} and prefetcher.stats()['stale'] == 1
+
+
+def test_slow_prefetch_falls_back_to_a_synchronous_read():
+    """A load that is not ready in time is abandoned; the turn reads the data itself"""
+    db, calls = _counting_database()
+    release = threading.Event()
+    get_balance = db.get_user_balance
+    db.get_user_balance = lambda user_id: release.wait(5) and get_balance(user_id)
+
+    prefetcher = Prefetcher(db)
+    prefetcher.prefetch('1001')
+    assert prefetcher.take('1001', timeout=0.01) == {}
+    assert prefetcher.stats()['late'] == 1
+    release.set()
+    prefetcher.close()                                      # the abandoned load finishes unused
+    calls.clear()
+
+    turn = TurnContext(db, '1001', preloaded={})
+    assert turn.leave_dates is not None and calls['get_user_leave_dates'] == 1
+
+
+if __name__ == "__main__":
+    test_snapshot_loads_once()
+    test_application_reads_each_source_once()
+    test_date_step_is_prefetched()
+    test_slow_prefetch_falls_back_to_a_synchronous_read()
+    print("✅ Turn context tests passed")
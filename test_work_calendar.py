@@ -0,0 +1,61 @@
+import sys
+import os
+from datetime import date, timedelta
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from work_calendar import WorkingDayCalendar
+
+
+HOLIDAYS = ['2025-10-02', '2025-12-25']
+
+
+def _slow_count(calendar, start, end):
+    """Reference count - one day at a time"""
+    count = 0
+    current = start
+    while current <= end:
+        if current.weekday() < 5 and current.strftime('%Y-%m-%d') not in HOLIDAYS:
+            count += 1
+        current += timedelta(days=1)
+    return count
+
+
+def test_is_working_day():
+    """Weekends and public holidays are not working days"""
+    calendar = WorkingDayCalendar(HOLIDAYS)
+    assert calendar.is_working_day(date(2025, 10, 1))
+    assert not calendar.is_working_day(date(2025, 10, 2))   # holiday
+    assert not calendar.is_working_day(date(2025, 10, 4))   # Saturday
+    assert calendar.is_holiday('2025-12-25')
+
+
+def test_working_days_between_matches_day_walk():
+    """Prefix-sum counts agree with a day-by-day walk"""
+    calendar = WorkingDayCalendar(HOLIDAYS)
+    start = date(2025, 9, 1)
+    for span in (0, 1, 6, 30, 120, 400):
+        end = start + timedelta(days=span)
+        assert calendar.working_days_between(start, end) == _slow_count(calendar, start, end)
+    assert calendar.working_days_between(date(2025, 10, 3), date(2025, 10, 1)) == 0
+
+
+def test_nth_working_day_and_ranges():
+    """Day arithmetic skips weekends and holidays"""
+    calendar = WorkingDayCalendar(HOLIDAYS)
+    # Wed 1 Oct -> Fri 3 Oct (Thu 2 Oct is a holiday)
+    assert calendar.nth_working_day_after(date(2025, 10, 1), 1) == date(2025, 10, 3)
+    assert calendar.nth_working_day_after(date(2025, 10, 1), 2) == date(2025, 10, 6)
+
+    days = calendar.working_days_in_range(date(2025, 10, 1), date(2025, 10, 7))
+    assert days == [date(2025, 10, 1), date(2025, 10, 3), date(2025, 10, 6), date(2025, 10, 7)]
+    assert calendar.working_days_from(date(2025, 10, 4), 3) == [date(2025, 10, 6), date(2025, 10, 7), date(2025, 10, 8)]
+
+    # Outside the precomputed years falls back to walking
+    assert calendar.nth_working_day_after(date(2040, 1, 5), 1) == date(2040, 1, 6)
+
+
+if __name__ == "__main__":
+    test_is_working_day()
+    test_working_days_between_matches_day_walk()
+    test_nth_working_day_and_ranges()
+    print("✅ Working-day calendar tests passed")
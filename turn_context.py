@@ -0,0 +1,112 @@
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from config import Config
+from ttl_cache import TTLCache
+
+
+class TurnContext:
+    """Read snapshot for one chat turn - each piece of user data is loaded at most once"""
+
+    def __init__(self, database, user_id, history_source=None, preloaded=None):
+        self.db = database
+        self.user_id = user_id
+        self._history_source = history_source or database
+        self._loaded = dict(preloaded or {})
+
+    def _load(self, key, loader):
+        if key not in self._loaded:
+            self._loaded[key] = loader()
+        return self._loaded[key]
+
+    @property
+    def balance(self):
+        """Leave balance, or None if it could not be read"""
+        return self._load('balance', lambda: self.db.get_user_balance(self.user_id))
+
+    def recent_requests(self, limit=5):
+        """Newest leave requests first"""
+        return self._load(('requests', limit), lambda: self.db.get_user_leave_requests(
+            self.user_id, limit=limit, newest_first=True))
+
+    def recent_history(self, limit=5):
+        """Latest chat messages, oldest first"""
+        return self._load(('history', limit), lambda: self._history_source.get_chat_history(self.user_id, limit))
+
+    @property
+    def leave_dates(self):
+        """Dates already taken or applied for (not rejected) - None if they could not be read"""
+        return self._load('leave_dates', lambda: self.db.get_user_leave_dates(self.user_id))
+
+    def has_leave_on(self, day):
+        """Overlap check against the snapshot - unreadable data counts as a conflict"""
+        dates = self.leave_dates
+        return True if dates is None else day in dates
+
+    def record_leave(self, day):
+        """Keep the snapshot current after this turn applies for a date"""
+        if self.leave_dates is not None:
+            self.leave_dates.add(day)
+        self._loaded = {key: value for key, value in self._loaded.items()
+                        if not (isinstance(key, tuple) and key[0] == 'requests')}
+
+
+class Prefetcher:
+    """Loads a user's balance and existing leave dates in the background, ready for their next turn"""
+
+    def __init__(self, database, ttl_seconds=None, max_entries=None, workers=None):
+        self.db = database
+        self._cache = TTLCache(max_entries or Config.PREFETCH_MAX_ENTRIES,
+                               ttl_seconds or Config.PREFETCH_TTL_SECONDS)
+        self._executor = ThreadPoolExecutor(max_workers=workers or Config.PREFETCH_WORKERS,
+                                            thread_name_prefix='prefetch')
+        self.stale = 0
+        self.late = 0
+
+    def prefetch(self, user_id):
+        """Start loading a user's data - returns at once"""
+        self._cache.set(str(user_id), self._executor.submit(self._load, user_id))
+
+    def _load(self, user_id):
+        # Version first - a leave write that lands while loading makes the result stale
+        version = self.db.leave_data_version()
+        data = {
+            'balance': self.db.get_user_balance(user_id),
+            'leave_dates': self.db.get_user_leave_dates(user_id),
+        }
+        return version, data
+
+    def take(self, user_id, timeout=None):
+        """Prefetched data for a TurnContext, or {} - dropped if leave data changed since it was loaded
+
+        Waits at most `timeout` seconds for a load still running; a late
+        load is abandoned and the turn reads synchronously instead.
+        """
+        key = str(user_id)
+        future = self._cache.get(key)
+        if future is None:
+            return {}
+        self._cache.pop(key)
+
+        try:
+            version, data = future.result(timeout=Config.PREFETCH_WAIT_SECONDS if timeout is None else timeout)
+        except FutureTimeout:
+            future.cancel()               # only stops it if it has not started
+            self.late += 1
+            print(f"⚠️ Prefetch for user {user_id} not ready - reading synchronously")
+            return {}
+        except Exception as e:
+            print(f"❌ Prefetch failed for user {user_id}: {e}")
+            return {}
+        if version != self.db.leave_data_version():
+            self.stale += 1
+            return {}
+        return data
+
+    def close(self):
+        """Let running loads finish and drop the queued ones"""
+        self._executor.shutdown(wait=True, cancel_futures=True)
+
+    def stats(self):
+        stats = self._cache.stats()
+        stats['stale'] = self.stale
+        stats['late'] = self.late
+        return stats
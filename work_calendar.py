@@ -0,0 +1,126 @@
+from datetime import date, datetime, timedelta
+from config import Config
+from lazy_imports import lazy_import
+
+np = lazy_import('numpy')
+
+
+class WorkingDayCalendar:
+    """Precomputed working-day bitmap with prefix sums for O(1) day arithmetic"""
+
+    def __init__(self, holidays=None, start_year=None, end_year=None):
+        holidays = Config.PUBLIC_HOLIDAYS if holidays is None else holidays
+        self.holidays = {self._as_date(h) for h in holidays}
+
+        years = [h.year for h in self.holidays] + [datetime.now().year]
+        self.start_year = start_year or min(years) - 1
+        self.end_year = end_year or max(years) + 2
+
+        self.origin = date(self.start_year, 1, 1)
+        self.end = date(self.end_year, 12, 31)
+        num_days = (self.end - self.origin).days + 1
+
+        weekdays = (self.origin.weekday() + np.arange(num_days)) % 7
+        working = weekdays < 5
+        for holiday in self.holidays:
+            if self.origin <= holiday <= self.end:
+                working[(holiday - self.origin).days] = False
+
+        # _prefix[i] = number of working days strictly before offset i
+        self._working = working
+        self._prefix = np.concatenate(([0], np.cumsum(working)))
+        self._positions = np.flatnonzero(working)
+
+    @staticmethod
+    def _as_date(value):
+        """Accept date, datetime or 'YYYY-MM-DD' strings"""
+        if isinstance(value, datetime):
+            return value.date()
+        if isinstance(value, date):
+            return value
+        return datetime.strptime(str(value)[:10], '%Y-%m-%d').date()
+
+    def _offset(self, value):
+        """Offset into the bitmap, or None outside the precomputed years"""
+        offset = (self._as_date(value) - self.origin).days
+        return offset if 0 <= offset < len(self._working) else None
+
+    def is_holiday(self, value):
+        """Check if a date is a public holiday"""
+        return self._as_date(value) in self.holidays
+
+    def is_working_day(self, value):
+        """Check if a date is neither a weekend nor a public holiday"""
+        offset = self._offset(value)
+        if offset is None:
+            day = self._as_date(value)
+            return day.weekday() < 5 and day not in self.holidays
+        return bool(self._working[offset])
+
+    def working_days_between(self, start, end):
+        """Number of working days in [start, end], inclusive"""
+        start, end = self._as_date(start), self._as_date(end)
+        if end < start:
+            return 0
+        first, last = self._offset(start), self._offset(end)
+        if first is None or last is None:
+            return len(self._slow_range(start, end))
+        return int(self._prefix[last + 1] - self._prefix[first])
+
+    def nth_working_day_after(self, value, n):
+        """The nth working day strictly after a date (n=1 is the next working day)"""
+        offset = self._offset(value)
+        if offset is not None:
+            index = self._prefix[offset + 1] + n - 1
+            if 0 <= index < len(self._positions):
+                return self.origin + timedelta(days=int(self._positions[index]))
+
+        # Outside the precomputed years - walk day by day
+        current = self._as_date(value)
+        while n > 0:
+            current += timedelta(days=1)
+            if self.is_working_day(current):
+                n -= 1
+        return current
+
+    def working_days_in_range(self, start, end):
+        """All working days in [start, end], inclusive"""
+        start, end = self._as_date(start), self._as_date(end)
+        if end < start:
+            return []
+        first, last = self._offset(start), self._offset(end)
+        if first is None or last is None:
+            return self._slow_range(start, end)
+        lo = self._prefix[first]
+        hi = self._prefix[last + 1]
+        return [self.origin + timedelta(days=int(p)) for p in self._positions[lo:hi]]
+
+    def working_days_from(self, start, count):
+        """The first `count` working days on or after `start`"""
+        start = self._as_date(start)
+        if count <= 0:
+            return []
+        first = start if self.is_working_day(start) else self.nth_working_day_after(start, 1)
+        last = self.nth_working_day_after(first, count - 1) if count > 1 else first
+        return self.working_days_in_range(first, last)
+
+    def _slow_range(self, start, end):
+        """Day-by-day fallback outside the precomputed years"""
+        days = []
+        current = start
+        while current <= end:
+            if self.is_working_day(current):
+                days.append(current)
+            current += timedelta(days=1)
+        return days
+
+
+_default_calendar = None
+
+
+def get_calendar():
+    """Shared calendar built from Config.PUBLIC_HOLIDAYS"""
+    global _default_calendar
+    if _default_calendar is None:
+        _default_calendar = WorkingDayCalendar()
+    return _default_calendar